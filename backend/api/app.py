@@ -1,9 +1,9 @@
 """ Module for backend api endpoints. """
 
-from flask import Flask, Response, make_response, request
+from flask import Flask, Response, make_response, request, stream_with_context
 from flask_cors import CORS
 
-from . import config
+from . import config, web
 from . import main as core
 
 app = Flask(__name__)
@@ -16,6 +16,28 @@ def welcome() -> str:
     return "Welcome to backend api!"
 
 
+@app.route("/healthz")
+def read_liveness() -> Response:
+    """Function on '/healthz' getting liveness status."""
+    return _make_response(core.read_liveness())
+
+
+@app.route("/readyz")
+def read_readiness() -> Response:
+    """Function on '/readyz' getting readiness status per subsystem."""
+    ready, status = core.read_readiness()
+    return make_response(status, 200 if ready else 503)
+
+
+@app.route("/metrics")
+def read_metrics() -> Response:
+    """Function on '/metrics' getting runtime metrics."""
+    token = web.get_bearer_token(request)
+    if not core.validate_access_token(token, "read:metrics"):
+        return make_response("", 401)
+    return _make_response(core.read_metrics())
+
+
 @app.route("/get-access-token/<authorisation_code>")
 def get_access_token(authorisation_code) -> str:
     """Function on '/get-access-token' to get access token using authorisation code."""
@@ -25,7 +47,7 @@ def get_access_token(authorisation_code) -> str:
 @app.route("/validate-access-token/<asserted_claims>")
 def validate_access_token(asserted_claims) -> str:
     """Function on '/validate-access-token' to validate access token and verify claims."""
-    token = _get_bearer_token()
+    token = web.get_bearer_token(request)
     if not core.validate_access_token(token, asserted_claims):
         return make_response("", 401)
     return make_response("", 200)
@@ -34,71 +56,198 @@ def validate_access_token(asserted_claims) -> str:
 @app.route("/read-all-subjective-symptoms", methods=["GET"])
 def read_all_subjective_symptoms() -> Response:
     """Function on '/read-all-subjective-symptoms' getting all subjective symptoms."""
-    token = _get_bearer_token()
+    token = web.get_bearer_token(request)
     if not core.validate_access_token(token, "read:subjective_symptoms"):
         return make_response("", 401)
-    return _make_response(core.read_all_subjective_symptoms())
+    return _make_read_all_response("subjective_symptoms")
 
 
 @app.route("/read-all-objective-symptoms", methods=["GET"])
 def read_all_objective_symptoms() -> Response:
     """Function on '/read-all-objective-symptoms' getting all objective symptoms."""
-    token = _get_bearer_token()
+    token = web.get_bearer_token(request)
     if not core.validate_access_token(token, "read:objective_symptoms"):
         return make_response("", 401)
-    return _make_response(core.read_all_objective_symptoms())
+    return _make_read_all_response("objective_symptoms")
 
 
 @app.route("/predict-cause", methods=["POST"])
 def predict_cause() -> Response:
     """Function on '/predict-cause' getting prediction result for cause."""
-    token = _get_bearer_token()
+    token = web.get_bearer_token(request)
     if not core.validate_access_token(token, "predict:cause"):
         return make_response("", 401)
-    return _make_response(
+    return _make_prediction_response(
         core.predict_cause(
             request.form["subjective_symptoms"],
             request.form["objective_symptoms"],
             request.form["gender"],
+            web.get_model_name(request),
+        )
+    )
+
+
+@app.route("/predict-cause-by-ids", methods=["POST"])
+def predict_cause_by_ids() -> Response:
+    """Function on '/predict-cause-by-ids' getting prediction result for symptom ids."""
+    token = web.get_bearer_token(request)
+    if not core.validate_access_token(token, "predict:cause"):
+        return make_response("", 401)
+    return _make_prediction_response(
+        core.predict_cause_by_ids(
+            request.form["subjective_symptom_ids"],
+            request.form["objective_symptom_ids"],
+            request.form["gender"],
+            web.get_model_name(request),
         )
     )
 
 
+@app.route("/predict-causes", methods=["POST"])
+def predict_causes() -> Response:
+    """Function on '/predict-causes' getting prediction results for a batch of symptoms."""
+    token = web.get_bearer_token(request)
+    if not core.validate_access_token(token, "predict:cause"):
+        return make_response("", 401)
+    batch = request.get_json(silent=True)
+    if not web.is_valid_batch(batch):
+        return make_response("", 400)
+    return _make_prediction_response(
+        core.predict_causes(batch, web.get_model_name(request))
+    )
+
+
+@app.route("/predict-and-prescribe", methods=["POST"])
+def predict_and_prescribe() -> Response:
+    """Function on '/predict-and-prescribe' getting causes with etiologies and drugs."""
+    token = web.get_bearer_token(request)
+    if not core.validate_access_token(
+        token, "predict:cause read:etiologies read:drugs"
+    ):
+        return make_response("", 401)
+    return _make_prediction_response(
+        core.predict_and_prescribe(
+            request.form["subjective_symptoms"],
+            request.form["objective_symptoms"],
+            request.form["gender"],
+            web.get_model_name(request),
+        )
+    )
+
+
+@app.route("/create-prediction-session", methods=["POST"])
+def create_prediction_session() -> Response:
+    """Function on '/create-prediction-session' creating a symptom by symptom session."""
+    token = web.get_bearer_token(request)
+    if not core.validate_access_token(token, "predict:cause"):
+        return make_response("", 401)
+    return _make_response(core.create_prediction_session(request.form["gender"]))
+
+
+@app.route("/update-prediction-session/<session_id>", methods=["POST"])
+def update_prediction_session(session_id) -> Response:
+    """Function on '/update-prediction-session' getting prediction result for cause."""
+    token = web.get_bearer_token(request)
+    if not core.validate_access_token(token, "predict:cause"):
+        return make_response("", 401)
+    return _make_prediction_response(
+        core.update_prediction_session(
+            session_id,
+            request.form.get("add_symptoms", ""),
+            request.form.get("remove_symptoms", ""),
+        )
+    )
+
+
+@app.route("/delete-prediction-session/<session_id>", methods=["DELETE"])
+def delete_prediction_session(session_id) -> Response:
+    """Function on '/delete-prediction-session' deleting a symptom by symptom session."""
+    token = web.get_bearer_token(request)
+    if not core.validate_access_token(token, "predict:cause"):
+        return make_response("", 401)
+    return _make_response(core.delete_prediction_session(session_id))
+
+
+@app.route("/reload-model", methods=["POST"])
+def reload_model() -> Response:
+    """Function on '/reload-model' reloading model files if they changed."""
+    token = web.get_bearer_token(request)
+    if not core.validate_access_token(token, "reload:model"):
+        return make_response("", 401)
+    return _make_response(core.reload_model())
+
+
 @app.route("/read-all-etiologies", methods=["GET"])
 def read_all_etiologies() -> Response:
     """Function on '/read-all-etiologies' getting all etiologies."""
-    token = _get_bearer_token()
+    token = web.get_bearer_token(request)
     if not core.validate_access_token(token, "read:etiologies"):
         return make_response("", 401)
-    return _make_response(core.read_all_etiologies())
+    return _make_read_all_response("etiologies")
 
 
 @app.route("/read-etiology/<subjective_symptom_id>/<cause>", methods=["GET"])
 def read_etiology(subjective_symptom_id, cause) -> Response:
     """Function on '/read-etiology' getting etiology by subjective symptom and cause."""
-    token = _get_bearer_token()
+    token = web.get_bearer_token(request)
     if not core.validate_access_token(token, "read:etiologies"):
         return make_response("", 401)
-    return _make_response(core.read_etiology(subjective_symptom_id, cause))
+    return _make_response(
+        core.read_etiology(subjective_symptom_id, cause), validated=True
+    )
 
 
 @app.route("/read-drugs/<etiology_id>", methods=["GET"])
 def read_drugs(etiology_id) -> Response:
     """Function on '/read-drugs' getting drugs by etiology."""
-    token = _get_bearer_token()
+    token = web.get_bearer_token(request)
+    if not core.validate_access_token(token, "read:drugs"):
+        return make_response("", 401)
+    return _make_response(core.read_drugs(etiology_id), validated=True)
+
+
+@app.route("/read-drugs-by-etiologies/<etiology_ids>", methods=["GET"])
+def read_drugs_by_etiologies(etiology_ids) -> Response:
+    """Function on '/read-drugs-by-etiologies' getting drugs by comma separated ids."""
+    token = web.get_bearer_token(request)
     if not core.validate_access_token(token, "read:drugs"):
         return make_response("", 401)
-    return _make_response(core.read_drugs(etiology_id))
+    etiology_ids = web.get_etiology_ids(etiology_ids)
+    if etiology_ids is None:
+        return make_response("", 400)
+    return _make_response(core.read_drugs_by_etiologies(etiology_ids), validated=True)
 
 
-def _get_bearer_token() -> str:
-    header = request.headers.get(config.AUTHORISATION_HEADER_KEY)
-    return header.removeprefix("Bearer").strip() if header is not None else ""
+def _make_response(result, validated=False) -> Response:
+    return web.make_response(Response, request, result, validated)
 
 
-def _make_response(result) -> Response:
-    response = make_response("", 404) if result is None else make_response(result, 200)
-    return response
+def _make_read_all_response(collection) -> Response:
+    arguments = web.get_page_arguments(request, collection)
+    if arguments is None:
+        return make_response("", 400)
+    limit, after, fields = arguments
+    if web.is_streamed(request):
+        # documents go out as the cursor reads them, memory stays flat
+        return Response(
+            stream_with_context(core.stream_all(collection, after, fields, limit)),
+            200,
+            mimetype=web.NDJSON_MIMETYPE,
+        )
+    if limit is None and after is None and fields is None:
+        return web.make_serialised_response(
+            Response, request, core.read_all_serialised(collection)
+        )
+    documents, next_after = core.read_page(
+        collection, limit or config.READ_ALL_MAX_LIMIT, after, fields
+    )
+    return web.make_page_response(Response, request, documents, next_after)
+
+
+def _make_prediction_response(result) -> Response:
+    return web.make_prediction_response(
+        Response, request, result, core.read_model_version(), core.read_model_name()
+    )
 
 
 def main() -> None:
@@ -0,0 +1,285 @@
+""" Module for backend api endpoints served by an asgi server. """
+
+import uvicorn
+from quart import Quart, Response, jsonify, request
+from quart_cors import cors
+
+from . import async_main as core
+from . import config, web
+
+app = cors(Quart(__name__), allow_origin="*", allow_headers="*")
+# streamed reads last as long as the collection takes, as with the wsgi app
+app.config["RESPONSE_TIMEOUT"] = None
+
+
+@app.before_serving
+async def start() -> None:
+    """Function before serving starting the async clients on the event loop."""
+    await core.start()
+
+
+@app.after_serving
+async def stop() -> None:
+    """Function after serving stopping the async clients."""
+    await core.stop()
+
+
+@app.route("/")
+async def welcome() -> str:
+    """Function on '/' printing welcome message."""
+    return "Welcome to backend api!"
+
+
+@app.route("/healthz")
+async def read_liveness() -> Response:
+    """Function on '/healthz' getting liveness status."""
+    return _make_response(core.read_liveness())
+
+
+@app.route("/readyz")
+async def read_readiness() -> Response:
+    """Function on '/readyz' getting readiness status per subsystem."""
+    ready, status = core.read_readiness()
+    return jsonify(status), 200 if ready else 503
+
+
+@app.route("/metrics")
+async def read_metrics() -> Response:
+    """Function on '/metrics' getting runtime metrics."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "read:metrics"):
+        return "", 401
+    return _make_response(core.read_metrics())
+
+
+@app.route("/get-access-token/<authorisation_code>")
+async def get_access_token(authorisation_code) -> str:
+    """Function on '/get-access-token' to get access token using authorisation code."""
+    return _make_response(await core.get_access_token(authorisation_code))
+
+
+@app.route("/validate-access-token/<asserted_claims>")
+async def validate_access_token(asserted_claims) -> str:
+    """Function on '/validate-access-token' to validate access token and verify claims."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, asserted_claims):
+        return "", 401
+    return "", 200
+
+
+@app.route("/read-all-subjective-symptoms", methods=["GET"])
+async def read_all_subjective_symptoms() -> Response:
+    """Function on '/read-all-subjective-symptoms' getting all subjective symptoms."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "read:subjective_symptoms"):
+        return "", 401
+    return await _make_read_all_response("subjective_symptoms")
+
+
+@app.route("/read-all-objective-symptoms", methods=["GET"])
+async def read_all_objective_symptoms() -> Response:
+    """Function on '/read-all-objective-symptoms' getting all objective symptoms."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "read:objective_symptoms"):
+        return "", 401
+    return await _make_read_all_response("objective_symptoms")
+
+
+@app.route("/predict-cause", methods=["POST"])
+async def predict_cause() -> Response:
+    """Function on '/predict-cause' getting prediction result for cause."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "predict:cause"):
+        return "", 401
+    form = await request.form
+    return _make_prediction_response(
+        await core.predict_cause(
+            form["subjective_symptoms"],
+            form["objective_symptoms"],
+            form["gender"],
+            web.get_model_name(request),
+        )
+    )
+
+
+@app.route("/predict-cause-by-ids", methods=["POST"])
+async def predict_cause_by_ids() -> Response:
+    """Function on '/predict-cause-by-ids' getting prediction result for symptom ids."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "predict:cause"):
+        return "", 401
+    form = await request.form
+    return _make_prediction_response(
+        await core.predict_cause_by_ids(
+            form["subjective_symptom_ids"],
+            form["objective_symptom_ids"],
+            form["gender"],
+            web.get_model_name(request),
+        )
+    )
+
+
+@app.route("/predict-causes", methods=["POST"])
+async def predict_causes() -> Response:
+    """Function on '/predict-causes' getting prediction results for a batch of symptoms."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "predict:cause"):
+        return "", 401
+    batch = await request.get_json(silent=True)
+    if not web.is_valid_batch(batch):
+        return "", 400
+    return _make_prediction_response(
+        await core.predict_causes(batch, web.get_model_name(request))
+    )
+
+
+@app.route("/predict-and-prescribe", methods=["POST"])
+async def predict_and_prescribe() -> Response:
+    """Function on '/predict-and-prescribe' getting causes with etiologies and drugs."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(
+        token, "predict:cause read:etiologies read:drugs"
+    ):
+        return "", 401
+    form = await request.form
+    return _make_prediction_response(
+        await core.predict_and_prescribe(
+            form["subjective_symptoms"],
+            form["objective_symptoms"],
+            form["gender"],
+            web.get_model_name(request),
+        )
+    )
+
+
+@app.route("/create-prediction-session", methods=["POST"])
+async def create_prediction_session() -> Response:
+    """Function on '/create-prediction-session' creating a symptom by symptom session."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "predict:cause"):
+        return "", 401
+    form = await request.form
+    return _make_response(core.create_prediction_session(form["gender"]))
+
+
+@app.route("/update-prediction-session/<session_id>", methods=["POST"])
+async def update_prediction_session(session_id) -> Response:
+    """Function on '/update-prediction-session' getting prediction result for cause."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "predict:cause"):
+        return "", 401
+    form = await request.form
+    return _make_prediction_response(
+        await core.update_prediction_session(
+            session_id,
+            form.get("add_symptoms", ""),
+            form.get("remove_symptoms", ""),
+        )
+    )
+
+
+@app.route("/delete-prediction-session/<session_id>", methods=["DELETE"])
+async def delete_prediction_session(session_id) -> Response:
+    """Function on '/delete-prediction-session' deleting a symptom by symptom session."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "predict:cause"):
+        return "", 401
+    return _make_response(core.delete_prediction_session(session_id))
+
+
+@app.route("/reload-model", methods=["POST"])
+async def reload_model() -> Response:
+    """Function on '/reload-model' reloading model files if they changed."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "reload:model"):
+        return "", 401
+    return _make_response(await core.reload_model())
+
+
+@app.route("/read-all-etiologies", methods=["GET"])
+async def read_all_etiologies() -> Response:
+    """Function on '/read-all-etiologies' getting all etiologies."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "read:etiologies"):
+        return "", 401
+    return await _make_read_all_response("etiologies")
+
+
+@app.route("/read-etiology/<subjective_symptom_id>/<cause>", methods=["GET"])
+async def read_etiology(subjective_symptom_id, cause) -> Response:
+    """Function on '/read-etiology' getting etiology by subjective symptom and cause."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "read:etiologies"):
+        return "", 401
+    return _make_response(
+        await core.read_etiology(subjective_symptom_id, cause), validated=True
+    )
+
+
+@app.route("/read-drugs/<etiology_id>", methods=["GET"])
+async def read_drugs(etiology_id) -> Response:
+    """Function on '/read-drugs' getting drugs by etiology."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "read:drugs"):
+        return "", 401
+    return _make_response(await core.read_drugs(etiology_id), validated=True)
+
+
+@app.route("/read-drugs-by-etiologies/<etiology_ids>", methods=["GET"])
+async def read_drugs_by_etiologies(etiology_ids) -> Response:
+    """Function on '/read-drugs-by-etiologies' getting drugs by comma separated ids."""
+    token = web.get_bearer_token(request)
+    if not await core.validate_access_token(token, "read:drugs"):
+        return "", 401
+    etiology_ids = web.get_etiology_ids(etiology_ids)
+    if etiology_ids is None:
+        return "", 400
+    return _make_response(
+        await core.read_drugs_by_etiologies(etiology_ids), validated=True
+    )
+
+
+def _make_response(result, validated=False) -> Response:
+    return web.make_response(Response, request, result, validated)
+
+
+async def _make_read_all_response(collection) -> Response:
+    arguments = web.get_page_arguments(request, collection)
+    if arguments is None:
+        return "", 400
+    limit, after, fields = arguments
+    if web.is_streamed(request):
+        return Response(
+            core.stream_all(collection, after, fields, limit),
+            200,
+            mimetype=web.NDJSON_MIMETYPE,
+        )
+    if limit is None and after is None and fields is None:
+        return web.make_serialised_response(
+            Response, request, await core.read_all_serialised(collection)
+        )
+    documents, next_after = await core.read_page(
+        collection, limit or config.READ_ALL_MAX_LIMIT, after, fields
+    )
+    return web.make_page_response(Response, request, documents, next_after)
+
+
+def _make_prediction_response(result) -> Response:
+    return web.make_prediction_response(
+        Response, request, result, core.read_model_version(), core.read_model_name()
+    )
+
+
+def main() -> None:
+    """Entry point if called as executable."""
+    core.init()
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=int(config.PORT),
+        log_level="debug" if config.DEBUG_MODE else "info",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+""" Module for document db with an async driver, for the asgi app. """
+
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from bson.objectid import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from structlog import get_logger
+
+from . import config, document_db
+from .document_db import ReferenceData, to_json
+
+
+@dataclass(init=True)
+class State:
+    """Class for storing state."""
+
+    MONGODB_CLIENT = None
+    REFERENCE_DATA_LOCK = None
+
+
+def configure_mongodb_client() -> None:
+    """Configure async mongodb client, on the running event loop."""
+    logger = get_logger()
+
+    logger.info("Starting configure async mongodb client")
+    url = config.MONGODB_URL
+    State.MONGODB_CLIENT = AsyncIOMotorClient(url)
+    # made again on first use, on this event loop
+    State.REFERENCE_DATA_LOCK = None
+    logger.debug(f"Configured async mongodb client with {url}")
+    logger.info("Completed configure async mongodb client")
+
+
+def close_mongodb_client() -> None:
+    """Close async mongodb client."""
+    if State.MONGODB_CLIENT is not None:
+        State.MONGODB_CLIENT.close()
+        State.MONGODB_CLIENT = None
+
+
+async def read_all_subjective_symptoms() -> list[str]:
+    """Read all subjective symptoms."""
+    if _is_embedded():
+        return document_db.read_all_subjective_symptoms()
+    return await _read_all("subjective_symptoms")
+
+
+async def read_all_objective_symptoms() -> list[str]:
+    """Read all objective symptoms."""
+    if _is_embedded():
+        return document_db.read_all_objective_symptoms()
+    return await _read_all("objective_symptoms")
+
+
+async def read_symptoms_by_id() -> dict[str, str]:
+    """Read normalised subjective and objective symptoms by document id."""
+    if _is_embedded():
+        return document_db.read_symptoms_by_id()
+    if config.REFERENCE_DATA_CACHE_TIMEOUT > 0:
+        return (await _read_reference_data()).symptoms_by_id
+    # same memo as 'document_db.MongoStorage', rebuilt when the version changes
+    version = await _read_reference_data_version()
+    symptoms_by_id = document_db.read_memoised_symptoms_by_id(version)
+    if symptoms_by_id is None:
+        symptoms_by_id = document_db.memoise_symptoms_by_id(
+            version,
+            await _find_all("subjective_symptoms")
+            + await _find_all("objective_symptoms"),
+        )
+    return symptoms_by_id
+
+
+async def read_etiology(subjective_symptom_id, cause) -> dict:
+    """Read etiology data by subjective symptom and cause."""
+    if _is_embedded():
+        return document_db.read_etiology(subjective_symptom_id, cause)
+    logger = get_logger()
+
+    logger.info(
+        "Starting read etiology by symptom and cause",
+        subjective_symptom_id=subjective_symptom_id,
+        cause=cause,
+    )
+    if config.REFERENCE_DATA_CACHE_TIMEOUT > 0:
+        document = (await _read_reference_data()).etiologies_by_cause.get(
+            (str(ObjectId(subjective_symptom_id)), str(cause).lower())
+        )
+    else:
+        database = _database()
+        document = await database.etiologies.find_one(
+            {
+                "subjective_symptom_id": ObjectId(subjective_symptom_id),
+                "cause": str(cause).lower(),
+            }
+        )
+        document = to_json(document) if document is not None else None
+    logger.info(
+        "Completed read etiology by symptom and cause",
+        subjective_symptom=subjective_symptom_id,
+        cause=cause,
+    )
+
+    return document
+
+
+async def read_drugs(etiology_id) -> list[str]:
+    """Read drugs data by etiology."""
+    return (await read_drugs_by_etiologies([etiology_id]))[str(ObjectId(etiology_id))]
+
+
+async def read_drugs_by_etiologies(etiology_ids) -> dict[str, list]:
+    """Read drugs data for many etiologies at once, by etiology."""
+    if _is_embedded():
+        return document_db.read_drugs_by_etiologies(etiology_ids)
+    logger = get_logger()
+
+    logger.info("Starting read drugs by etiologies", etiology_ids=etiology_ids)
+    etiology_ids = [str(ObjectId(etiology_id)) for etiology_id in etiology_ids]
+    if config.REFERENCE_DATA_CACHE_TIMEOUT > 0:
+        drugs_by_etiology_id = (await _read_reference_data()).drugs_by_etiology_id
+        result = {
+            etiology_id: drugs_by_etiology_id.get(etiology_id, [])
+            for etiology_id in etiology_ids
+        }
+    else:
+        database = _database()
+        result = {etiology_id: [] for etiology_id in etiology_ids}
+        async for document in database.drugs.find(
+            {"etiology_id": {"$in": [ObjectId(item) for item in etiology_ids]}}
+        ):
+            document = to_json(document)
+            result[document["etiology_id"]].append(document)
+    logger.info("Completed read drugs by etiologies", etiology_ids=etiology_ids)
+
+    return result
+
+
+async def read_etiologies_with_drugs(symptoms_causes) -> dict[tuple, dict]:
+    """Read etiologies with their drugs by subjective symptom and cause pairs."""
+    if _is_embedded():
+        return document_db.read_etiologies_with_drugs(symptoms_causes)
+    logger = get_logger()
+
+    logger.info("Starting read etiologies with drugs", symptoms_causes=symptoms_causes)
+    symptoms_causes = [
+        (str(symptom), str(cause).lower()) for symptom, cause in symptoms_causes
+    ]
+    result = {}
+    if config.REFERENCE_DATA_CACHE_TIMEOUT > 0:
+        result = document_db.find_etiologies_with_drugs(
+            await _read_reference_data(), symptoms_causes
+        )
+    elif len(symptoms_causes) > 0:
+        database = _database()
+        async for document in database.subjective_symptoms.aggregate(
+            document_db.etiologies_with_drugs_pipeline(symptoms_causes)
+        ):
+            document = to_json(document)
+            result[(document["symptom"], document["etiology"]["cause"])] = document[
+                "etiology"
+            ]
+    logger.info("Completed read etiologies with drugs", etiologies=len(result))
+
+    return result
+
+
+async def read_all_serialised(collection) -> bytes:
+    """Read all documents of a reference data collection as json bytes."""
+    if _is_embedded():
+        return document_db.read_all_serialised(collection)
+    if collection not in document_db.REFERENCE_COLLECTIONS:
+        raise Exception(f"Error: unknown reference data collection - {collection}")
+    if config.REFERENCE_DATA_CACHE_TIMEOUT > 0:
+        return (await _read_reference_data()).serialised[collection]
+    return document_db.serialise(await _find_all(collection))
+
+
+async def read_page(collection, limit, after=None, fields=None) -> (list[dict], str):
+    """Read a page of documents ordered by id, with the id the next page follows."""
+    if _is_embedded():
+        return document_db.read_page(collection, limit, after, fields)
+    logger = get_logger()
+
+    logger.info("Starting read page", collection=collection, limit=limit, after=after)
+    documents = [
+        to_json(document)
+        async for document in _find_ordered(collection, after, fields).limit(limit + 1)
+    ]
+    next_after = documents[limit - 1]["_id"] if len(documents) > limit else None
+    documents = documents[:limit]
+    logger.info("Completed read page", collection=collection, documents=len(documents))
+
+    return documents, next_after
+
+
+async def stream_all(
+    collection, after=None, fields=None, limit=None
+) -> AsyncIterator[bytes]:
+    """Stream documents ordered by id as newline delimited json bytes."""
+    if _is_embedded():
+        for line in document_db.stream_all(collection, after, fields, limit):
+            yield line
+        return
+    logger = get_logger()
+
+    logger.info("Starting stream all", collection=collection, after=after)
+    cursor = _find_ordered(collection, after, fields).batch_size(
+        config.READ_ALL_BATCH_SIZE
+    )
+    if limit is not None:
+        cursor = cursor.limit(limit)
+    count = 0
+    try:
+        async for document in cursor:
+            count += 1
+            yield document_db.serialise_line(to_json(document))
+    finally:
+        await cursor.close()
+        logger.info("Completed stream all", collection=collection, documents=count)
+
+
+def _is_embedded() -> bool:
+    # in process reads never block the event loop for long, so they run as they are
+    return not document_db.State.STORAGE.remote
+
+
+async def _read_all(collection) -> list[str]:
+    logger = get_logger()
+
+    logger.info("Starting read all", collection=collection)
+    if config.REFERENCE_DATA_CACHE_TIMEOUT > 0:
+        result = (await _read_reference_data()).collections[collection]
+    else:
+        result = await _find_all(collection)
+    logger.info("Completed read all", collection=collection)
+
+    return result
+
+
+def _database():
+    if State.MONGODB_CLIENT is None:
+        raise Exception("Error: async mongodb client not configured")
+    return State.MONGODB_CLIENT.ai_hospital_services
+
+
+def _reference_data_lock() -> asyncio.Lock:
+    # made on first use, so it belongs to the running event loop
+    lock = State.REFERENCE_DATA_LOCK
+    if lock is None:
+        lock = State.REFERENCE_DATA_LOCK = asyncio.Lock()
+    return lock
+
+
+async def _find_all(collection) -> list[dict]:
+    database = _database()
+    return [
+        to_json(document) async for document in getattr(database, collection).find({})
+    ]
+
+
+def _find_ordered(collection, after, fields):
+    database = _database()
+    return (
+        getattr(database, collection)
+        .find(*document_db.page_query(collection, after, fields))
+        .sort("_id", 1)
+    )
+
+
+async def _read_reference_data_version() -> str:
+    database = _database()
+    document = await getattr(
+        database, document_db.REFERENCE_DATA_VERSION_COLLECTION
+    ).find_one({"_id": document_db.REFERENCE_DATA_VERSION_ID})
+    return document["version"] if document is not None else None
+
+
+async def _read_reference_data() -> ReferenceData:
+    # same cache as 'document_db', only the reads await the driver
+    reference_data = document_db.read_cached_reference_data()
+    if reference_data is not None:
+        return reference_data
+
+    async with _reference_data_lock():
+        reference_data = document_db.read_cached_reference_data()
+        if reference_data is not None:
+            return reference_data
+        reference_data = document_db.read_unexpired_reference_data()
+        if reference_data is not None and document_db.check_reference_data_version(
+            reference_data, await _read_checked_version(reference_data)
+        ):
+            return reference_data
+        return await _load_reference_data()
+
+
+async def _read_checked_version(reference_data) -> str:
+    logger = get_logger()
+
+    try:
+        return await _read_reference_data_version()
+    except Exception as exception:  # pylint: disable=broad-except
+        logger.error("Error reading reference data version", exception=str(exception))
+        return reference_data.version
+
+
+async def _load_reference_data() -> ReferenceData:
+    logger = get_logger()
+
+    logger.info("Starting load reference data")
+    version = await _read_reference_data_version()
+    collections = await asyncio.gather(
+        *[_find_all(collection) for collection in document_db.REFERENCE_COLLECTIONS]
+    )
+    reference_data = document_db.cache_reference_data(
+        version, dict(zip(document_db.REFERENCE_COLLECTIONS, collections))
+    )
+    logger.info("Completed load reference data", version=version)
+
+    return reference_data
@@ -0,0 +1,208 @@
+""" Module for async versions of the core functions, for the asgi app. """
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from structlog import get_logger
+
+from . import (
+    async_document_db,
+    async_oauth2,
+    config,
+    machine_learning,
+    main,
+    model_registry,
+)
+
+
+@dataclass(init=True)
+class State:
+    """Class for storing state."""
+
+    INFERENCE_EXECUTOR = None
+
+
+def init() -> None:
+    """Read config, configure logging and start warming up, as the sync app does."""
+    main.init()
+
+
+async def start() -> None:
+    """Start the async clients and the inference threads on the running event loop."""
+    logger = get_logger()
+
+    logger.info("Starting async core", threads=config.ASGI_INFERENCE_THREADS)
+    async_document_db.configure_mongodb_client()
+    async_oauth2.configure_http_client()
+    State.INFERENCE_EXECUTOR = ThreadPoolExecutor(
+        max_workers=config.ASGI_INFERENCE_THREADS, thread_name_prefix="inference"
+    )
+    logger.info("Completed async core")
+
+
+async def stop() -> None:
+    """Stop the async clients and the inference threads."""
+    async_document_db.close_mongodb_client()
+    await async_oauth2.close_http_client()
+    if State.INFERENCE_EXECUTOR is not None:
+        State.INFERENCE_EXECUTOR.shutdown(wait=True)
+        State.INFERENCE_EXECUTOR = None
+
+
+async def read_all_subjective_symptoms() -> list[str]:
+    """Read all subjective symptoms."""
+    return await async_document_db.read_all_subjective_symptoms()
+
+
+async def read_all_serialised(collection) -> bytes:
+    """Read all documents of a reference data collection as json bytes."""
+    return await async_document_db.read_all_serialised(collection)
+
+
+async def read_page(collection, limit, after=None, fields=None) -> (list[dict], str):
+    """Read a page of reference data documents, with the id the next page follows."""
+    return await async_document_db.read_page(collection, limit, after, fields)
+
+
+def stream_all(collection, after=None, fields=None, limit=None) -> AsyncIterator[bytes]:
+    """Stream reference data documents as newline delimited json bytes."""
+    return async_document_db.stream_all(collection, after, fields, limit)
+
+
+async def read_all_objective_symptoms() -> list[str]:
+    """Read all objective symptoms."""
+    return await async_document_db.read_all_objective_symptoms()
+
+
+async def predict_cause(
+    subjective_symptoms, objective_symptoms, gender, model_name=None
+) -> list[(str, float)]:
+    """Predict cause from symptoms."""
+    return await _run_inference(
+        main.predict_cause, subjective_symptoms, objective_symptoms, gender, model_name
+    )
+
+
+async def predict_cause_by_ids(
+    subjective_symptom_ids, objective_symptom_ids, gender, model_name=None
+) -> list[(str, float)]:
+    """Predict cause from symptom ids."""
+    return await _run_inference(
+        main.predict_cause_by_ids,
+        subjective_symptom_ids,
+        objective_symptom_ids,
+        gender,
+        model_name,
+        await async_document_db.read_symptoms_by_id(),
+    )
+
+
+async def predict_causes(batch, model_name=None) -> list[dict]:
+    """Predict causes for a batch of symptoms records."""
+    return await _run_inference(main.predict_causes, batch, model_name)
+
+
+async def predict_and_prescribe(
+    subjective_symptoms, objective_symptoms, gender, model_name=None
+) -> list[dict]:
+    """Predict cause from symptoms, with the etiology and drugs of each cause."""
+    causes = await predict_cause(
+        subjective_symptoms, objective_symptoms, gender, model_name
+    )
+    symptoms_causes = main.split_causes(causes)
+    return main.make_prescriptions(
+        causes,
+        symptoms_causes,
+        await async_document_db.read_etiologies_with_drugs(symptoms_causes),
+    )
+
+
+def create_prediction_session(gender) -> dict:
+    """Create a session for predicting cause symptom by symptom."""
+    return main.create_prediction_session(gender)
+
+
+async def update_prediction_session(
+    session_id, add_symptoms, remove_symptoms
+) -> list[(str, float)]:
+    """Add and remove session symptoms and predict cause."""
+    return await _run_inference(
+        main.update_prediction_session, session_id, add_symptoms, remove_symptoms
+    )
+
+
+def delete_prediction_session(session_id) -> dict:
+    """Delete a prediction session."""
+    return main.delete_prediction_session(session_id)
+
+
+async def read_etiology(subjective_symptom_id, cause) -> dict:
+    """Read etiology data by subjective symptom and cause."""
+    return await async_document_db.read_etiology(subjective_symptom_id, cause)
+
+
+async def read_drugs(etiology_id) -> list[str]:
+    """Read drugs by etiology."""
+    return await async_document_db.read_drugs(etiology_id)
+
+
+async def read_drugs_by_etiologies(etiology_ids) -> dict[str, list]:
+    """Read drugs by many etiologies."""
+    return await async_document_db.read_drugs_by_etiologies(etiology_ids)
+
+
+async def reload_model() -> dict:
+    """Reload model files if they changed."""
+    return await _run_inference(main.reload_model)
+
+
+def read_model_version() -> str:
+    """Read the version of the model that served the latest prediction."""
+    return main.read_model_version()
+
+
+def read_model_name() -> str:
+    """Read the name of the model that served the latest prediction."""
+    return main.read_model_name()
+
+
+def read_metrics() -> dict:
+    """Read runtime metrics."""
+    return main.read_metrics()
+
+
+async def get_access_token(authorisation_code) -> str:
+    """Get access token using authorisation code."""
+    return await async_oauth2.get_access_token(authorisation_code)
+
+
+async def validate_access_token(token, claims) -> bool:
+    """Validate access token and verify claims."""
+    return await async_oauth2.validate_access_token(token, claims)
+
+
+def read_liveness() -> dict:
+    """Read liveness status."""
+    return main.read_liveness()
+
+
+def read_readiness() -> (bool, dict):
+    """Read readiness status per subsystem."""
+    return main.read_readiness()
+
+
+async def _run_inference(function, *args):
+    # model inference holds the cpu, so it runs on the few inference threads and
+    # the event loop keeps serving, in a copy of the request context
+    context = contextvars.copy_context()
+    result = await asyncio.get_running_loop().run_in_executor(
+        State.INFERENCE_EXECUTOR, functools.partial(context.run, function, *args)
+    )
+    # carry the model version and name back for the response headers
+    machine_learning.MODEL_VERSION.set(context.get(machine_learning.MODEL_VERSION))
+    model_registry.MODEL_NAME.set(context.get(model_registry.MODEL_NAME))
+    return result
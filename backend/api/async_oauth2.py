@@ -0,0 +1,134 @@
+""" Module for OAuth2 with an async http client, for the asgi app. """
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+import httpx
+from structlog import get_logger
+
+from . import config, oauth2
+
+
+@dataclass(init=True)
+class State:
+    """Class for storing state."""
+
+    HTTP_CLIENT = None
+    LOCK = None
+    REFRESH = None
+
+
+def configure_http_client() -> None:
+    """Configure async http client, on the running event loop."""
+    State.HTTP_CLIENT = httpx.AsyncClient(timeout=float(config.WEB_REQUEST_TIMEOUT))
+    # made again on first use, on this event loop
+    State.LOCK = None
+
+
+async def close_http_client() -> None:
+    """Close async http client."""
+    if State.HTTP_CLIENT is not None:
+        await State.HTTP_CLIENT.aclose()
+        State.HTTP_CLIENT = None
+
+
+async def init_cache_state() -> None:
+    """Initialise cache and state, shared with 'oauth2'."""
+    logger = get_logger()
+
+    logger.info("Starting init cache and state")
+    response = await _http_client().get(
+        f"https://{config.TENANT_DOMAIN}/.well-known/openid-configuration"
+    )
+    openid_configuration = response.json()
+    response = await _http_client().get(openid_configuration["jwks_uri"])
+    oauth2.set_tenant_configuration(openid_configuration, response.content)
+    logger.info("Completed init cache and state")
+
+
+async def check_cache() -> None:
+    """Check cache for expiration and initialise if yes."""
+    logger = get_logger()
+
+    logger.info("Starting check cache")
+    if oauth2.State.JWKS is None:
+        # one load for all requests waiting on the first tenant configuration
+        async with _lock():
+            if oauth2.State.JWKS is None:
+                await init_cache_state()
+    elif oauth2.is_refresh_due() and State.REFRESH is None:
+        # serve the current keys while a task renews them
+        State.REFRESH = asyncio.create_task(_refresh_cache_state())
+    logger.info("Completed check cache")
+
+
+async def get_access_token(authorisation_code) -> str:
+    """Get access token using authorisation code."""
+    logger = get_logger()
+    logger.info("Starting get access token")
+
+    if authorisation_code is None or authorisation_code.strip() == "":
+        logger.error("Empty authorisation_code", authorisation_code=authorisation_code)
+        return None
+
+    await check_cache()
+
+    url, headers, body = oauth2.prepare_token_request(authorisation_code)
+    response = await _http_client().post(url=url, headers=headers, content=body)
+    logger.info("Completed get access token")
+
+    return response.text
+
+
+async def validate_access_token(token, asserted_claims) -> bool:
+    """Validate access token and verify claims."""
+    logger = get_logger()
+    logger.info("Starting validate access token")
+
+    if (
+        token is None
+        or asserted_claims is None
+        or token.strip() == ""
+        or asserted_claims.strip() == ""
+    ):
+        logger.error(
+            "Empty token or asserted claims",
+            token=token,
+            asserted_claims=asserted_claims,
+        )
+        return False
+
+    await check_cache()
+
+    # signature checks are short and cpu bound, so they stay on the event loop
+    return oauth2.verify_access_token(token, asserted_claims)
+
+
+def _http_client() -> httpx.AsyncClient:
+    if State.HTTP_CLIENT is None:
+        raise Exception("Error: async http client not configured")
+    return State.HTTP_CLIENT
+
+
+def _lock() -> asyncio.Lock:
+    # made on first use, so it belongs to the running event loop
+    lock = State.LOCK
+    if lock is None:
+        lock = State.LOCK = asyncio.Lock()
+    return lock
+
+
+async def _refresh_cache_state() -> None:
+    logger = get_logger()
+
+    oauth2.State.REFRESH_TRIED_AT = time.monotonic()
+    try:
+        await init_cache_state()
+    except Exception as exception:  # pylint: disable=broad-except
+        logger.error(
+            "Error refreshing tenant configuration, serving the current keys",
+            exception=str(exception),
+        )
+    finally:
+        State.REFRESH = None
@@ -0,0 +1,174 @@
+""" Module for micro-batching concurrent prediction requests. """
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+from structlog import get_logger
+
+from . import config, machine_learning
+
+
+def _new_statistics() -> dict:
+    return {
+        "batches": 0,
+        "requests": 0,
+        "max_batch_size": 0,
+        "max_queue_depth": 0,
+        "batch_size_histogram": {},
+        "total_queue_wait_ms": 0.0,
+    }
+
+
+@dataclass(init=True)
+class State:
+    """Class for storing state."""
+
+    QUEUE = None
+    WORKER = None
+    STATISTICS_LOCK = threading.Lock()
+    STATISTICS = _new_statistics()
+
+
+@dataclass(init=True)
+class PendingPrediction:
+    """Class for a prediction request waiting to be batched."""
+
+    record: dict
+    enqueued_at: float = field(default_factory=time.monotonic)
+    done: threading.Event = field(default_factory=threading.Event)
+    result: dict = None
+    model_version: str = None
+
+
+def start() -> None:
+    """Start the batching worker thread."""
+    logger = get_logger()
+
+    logger.info("Starting batch scheduler")
+    if State.WORKER is not None:
+        logger.info("Completed batch scheduler - already running")
+        return
+    State.QUEUE = queue.Queue()
+    State.STATISTICS = _new_statistics()
+    State.WORKER = threading.Thread(
+        target=_run, args=(State.QUEUE,), name="batch-scheduler", daemon=True
+    )
+    State.WORKER.start()
+    logger.info(
+        "Completed batch scheduler",
+        max_wait_ms=config.BATCHING_MAX_WAIT_MS,
+        max_batch_size=config.BATCHING_MAX_BATCH_SIZE,
+    )
+
+
+def stop() -> None:
+    """Stop the batching worker thread after draining queued requests."""
+    if State.WORKER is None:
+        return
+    State.QUEUE.put(None)
+    State.WORKER.join()
+    State.WORKER = None
+    State.QUEUE = None
+
+
+def predict_cause(
+    subjective_symptoms, objective_symptoms, gender
+) -> list[(str, float)]:
+    """Predict cause from symptoms as part of the next micro-batch."""
+    pending = PendingPrediction(
+        record={
+            "subjective_symptoms": subjective_symptoms,
+            "objective_symptoms": objective_symptoms,
+            "gender": gender,
+        }
+    )
+    pending_queue = State.QUEUE
+    if pending_queue is None:
+        raise Exception("Error: batch scheduler not started")
+    pending_queue.put(pending)
+    if not pending.done.wait(config.BATCHING_TIMEOUT):
+        raise Exception("Error: batch scheduler timed out")
+    machine_learning.MODEL_VERSION.set(pending.model_version)
+    if "error" in pending.result:
+        raise Exception(pending.result["error"])
+    return pending.result["causes"]
+
+
+def read_statistics() -> dict:
+    """Read queue depth and batch size statistics."""
+    with State.STATISTICS_LOCK:
+        statistics = dict(State.STATISTICS)
+        statistics["batch_size_histogram"] = dict(statistics["batch_size_histogram"])
+    statistics["queue_depth"] = State.QUEUE.qsize() if State.QUEUE is not None else 0
+    statistics["mean_batch_size"] = (
+        statistics["requests"] / statistics["batches"]
+        if statistics["batches"] > 0
+        else 0.0
+    )
+    total_queue_wait_ms = statistics.pop("total_queue_wait_ms")
+    statistics["mean_queue_wait_ms"] = (
+        total_queue_wait_ms / statistics["requests"]
+        if statistics["requests"] > 0
+        else 0.0
+    )
+    return statistics
+
+
+def _run(pending_queue) -> None:
+    stopping = False
+    while not stopping:
+        pending = pending_queue.get()
+        if pending is None:
+            return
+        batch = [pending]
+        deadline = pending.enqueued_at + config.BATCHING_MAX_WAIT_MS / 1000
+        while len(batch) < config.BATCHING_MAX_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            try:
+                pending = (
+                    pending_queue.get(timeout=timeout)
+                    if timeout > 0
+                    else pending_queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if pending is None:
+                stopping = True
+                break
+            batch.append(pending)
+        _execute(batch, pending_queue.qsize())
+
+
+def _execute(batch, queue_depth) -> None:
+    logger = get_logger()
+
+    started_at = time.monotonic()
+    # one model for the whole batch, so a reload mid batch cannot mislabel it
+    artefacts = machine_learning.State.ARTEFACTS
+    try:
+        results = machine_learning.predict_causes(
+            [item.record for item in batch], artefacts=artefacts
+        )
+    except Exception as exception:  # pylint: disable=broad-except
+        logger.error("Error executing prediction batch", exception=str(exception))
+        results = [{"error": f"Error: {exception}"}] * len(batch)
+    model_version = artefacts.version if artefacts is not None else None
+    for item, result in zip(batch, results):
+        item.result = result
+        item.model_version = model_version
+        item.done.set()
+
+    with State.STATISTICS_LOCK:
+        statistics = State.STATISTICS
+        statistics["batches"] += 1
+        statistics["requests"] += len(batch)
+        statistics["max_batch_size"] = max(statistics["max_batch_size"], len(batch))
+        statistics["max_queue_depth"] = max(statistics["max_queue_depth"], queue_depth)
+        statistics["batch_size_histogram"][len(batch)] = (
+            statistics["batch_size_histogram"].get(len(batch), 0) + 1
+        )
+        statistics["total_queue_wait_ms"] += sum(
+            (started_at - item.enqueued_at) * 1000 for item in batch
+        )
@@ -4,21 +4,65 @@ DEBUG_MODE = False
 
 # flask
 PORT = 8080
+WARM_UP_RETRY_INTERVAL = 5
+ASGI_INFERENCE_THREADS = 4
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+RESPONSE_COMPRESSION_LEVEL = 6
+RESPONSE_COMPRESSION_CACHE_MAX_SIZE = 64
 
 # machine learning
+MODEL_BACKEND = "keras"
 MODEL_FILE = "api/data/model.h5"
 SYMPTOMS_TOKENISER_FILE = "api/data/symptoms_tokeniser.json"
 CAUSES_TOKENISER_FILE = "api/data/causes_tokeniser.json"
 SYMPTOMS_SEPARATOR = ";"
+# genders sessions accept, separated as symptoms are
+GENDERS = "female;male"
 SYMPTOMS_SEQUENCE_PADDING_TYPE = "pre"
 SYMPTOMS_SEQUENCE_MAXLEN = 9
+MODEL_RELOAD_POLL_INTERVAL = 0
+MODEL_RELOAD_GRACE_PERIOD = 60
+MODEL_TFLITE_QUANTISATION = "float16"
+MODEL_AGREEMENT_SAMPLES = 256
+MODEL_MIN_AGREEMENT = 0.95
+INFERENCE_WORKERS = 0
+INFERENCE_WORKER_TIMEOUT = 30
+PREDICTION_TOP_K = 3
+PREDICTION_MAX_BATCH_SIZE = 256
+PREDICTION_CACHE_MAX_SIZE = 1024
+PREDICTION_CACHE_TIMEOUT = 3600
+PREDICTION_SESSION_MAX_SIZE = 10000
+PREDICTION_SESSION_TIMEOUT = 1800
+BATCHING_ENABLED = False
+BATCHING_MAX_WAIT_MS = 5
+BATCHING_MAX_BATCH_SIZE = 32
+BATCHING_TIMEOUT = 30
+MODEL_NAME = "default"
+MODEL_REGISTRY = ""
+MODEL_SHADOW = ""
+MODEL_SHADOW_WORKERS = 1
+MODEL_SHADOW_MAX_PENDING = 64
+MODEL_ROUTING_HEADER_KEY = "X-Model-Name"
+MODEL_LATENCY_SAMPLES = 1024
 
 # mongodb
 MONGODB_URL = "mongodb://localhost:27017/"
+REFERENCE_DATA_CACHE_TIMEOUT = 3600
+REFERENCE_DATA_VERSION_INTERVAL = 30
+READ_ALL_MAX_LIMIT = 1000
+READ_ALL_BATCH_SIZE = 500
+QUERY_PLAN_CHECK_ENABLED = True
+# "mongodb", or "embedded" to serve the migration data files with no mongodb, or
+# "snapshot" to memory-map the snapshot file written after the migrations
+STORAGE_BACKEND = "mongodb"
+STORAGE_DATA_DIRECTORY = "api/migrations/data/20220901000000"
+STORAGE_SNAPSHOT_FILE = "api/data/reference_data.snapshot"
 
 # oauth2
 WEB_REQUEST_TIMEOUT = 15
 CACHE_TIMEOUT = 600
+CACHE_REFRESH_INTERVAL = 480
+TOKEN_CACHE_MAX_SIZE = 10000
 TENANT_DOMAIN = "<TENANT DOMAIN>"
 TENANT_OPENID_CONFIGURATION_CACHE_KEY = "TENANT_OPENID_CONFIGURATION"
 AUTHORISATION_HEADER_KEY = "Authorization"
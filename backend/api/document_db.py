@@ -1,15 +1,166 @@
 """ Module for document db. """
 
-import json
-import re
-from dataclasses import dataclass
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterator
 
 from bson import json_util
 from bson.objectid import ObjectId
 from pymongo import MongoClient
 from structlog import get_logger
 
-from . import config
+from . import config, encoding
+
+
+# reference data collections, read all at once and kept in memory
+REFERENCE_COLLECTIONS = [
+    "subjective_symptoms",
+    "objective_symptoms",
+    "etiologies",
+    "drugs",
+]
+# document keys per reference data collection, the only fields reads project
+REFERENCE_FIELDS = {
+    "subjective_symptoms": ["_id", "symptom"],
+    "objective_symptoms": ["_id", "subjective_symptom_id", "symptom"],
+    "etiologies": ["_id", "subjective_symptom_id", "cause", "etiology"],
+    "drugs": [
+        "_id",
+        "etiology_id",
+        "drug_category",
+        "drug_use",
+        "mode_of_action",
+        "dose",
+    ],
+}
+# written by migrations, see 'api/migrations/reference_data_version.py'
+REFERENCE_DATA_VERSION_COLLECTION = "reference_data_version"
+REFERENCE_DATA_VERSION_ID = "reference_data"
+# hot query filters, each expected to be served by an index from the migrations
+QUERY_PLAN_CHECKS = [
+    ("etiologies", {"subjective_symptom_id": ObjectId(), "cause": ""}),
+    ("drugs", {"etiology_id": ObjectId()}),
+]
+
+
+@dataclass(init=True)
+class ReferenceData:
+    """Class for reference data collections and their lookups, swapped as a whole."""
+
+    version: str
+    loaded_at: float
+    checked_at: float
+    collections: dict = field(default_factory=dict)
+    serialised: dict = field(default_factory=dict)
+    subjective_symptom_ids: dict = field(default_factory=dict)
+    symptoms_by_id: dict = field(default_factory=dict)
+    etiologies_by_cause: dict = field(default_factory=dict)
+    drugs_by_etiology_id: dict = field(default_factory=dict)
+
+
+class MongoStorage:
+    """Class for reading reference data from mongodb, the default storage backend."""
+
+    # reads go over the network, so they are cached and their plans checked
+    remote = True
+
+    def ping(self) -> None:
+        """Ping mongodb server."""
+        State.MONGODB_CLIENT.admin.command("ping")
+
+    def read_version(self) -> str:
+        """Read the reference data version written by the migrations."""
+        database = State.MONGODB_CLIENT.ai_hospital_services
+        document = getattr(database, REFERENCE_DATA_VERSION_COLLECTION).find_one(
+            {"_id": REFERENCE_DATA_VERSION_ID}
+        )
+        return document["version"] if document is not None else None
+
+    def read_serialised(self, collection) -> bytes:
+        """Read all documents of a collection as json bytes."""
+        return serialise(self.find_all(collection))
+
+    def find_all(self, collection) -> list[dict]:
+        """Find all documents of a collection."""
+        database = State.MONGODB_CLIENT.ai_hospital_services
+        return [
+            to_json(document) for document in getattr(database, collection).find({})
+        ]
+
+    def find_symptoms_by_id(self) -> dict[str, str]:
+        """Find normalised symptoms by document id, rebuilt when the version changes."""
+        version = self.read_version()
+        symptoms_by_id = read_memoised_symptoms_by_id(version)
+        if symptoms_by_id is None:
+            symptoms_by_id = memoise_symptoms_by_id(
+                version,
+                self.find_all("subjective_symptoms")
+                + self.find_all("objective_symptoms"),
+            )
+        return symptoms_by_id
+
+    def find_etiology(self, subjective_symptom_id, cause) -> dict:
+        """Find an etiology by subjective symptom id and lower case cause."""
+        database = State.MONGODB_CLIENT.ai_hospital_services
+        document = database.etiologies.find_one(
+            {"subjective_symptom_id": ObjectId(subjective_symptom_id), "cause": cause}
+        )
+        return to_json(document) if document is not None else None
+
+    def find_drugs(self, etiology_id) -> list[dict]:
+        """Find drugs by etiology id."""
+        database = State.MONGODB_CLIENT.ai_hospital_services
+        return [
+            to_json(document)
+            for document in database.drugs.find({"etiology_id": ObjectId(etiology_id)})
+        ]
+
+    def find_drugs_by_etiologies(self, etiology_ids) -> dict[str, list]:
+        """Find drugs by etiology for many etiology ids."""
+        database = State.MONGODB_CLIENT.ai_hospital_services
+        result = {etiology_id: [] for etiology_id in etiology_ids}
+        for document in database.drugs.find(
+            {"etiology_id": {"$in": [ObjectId(item) for item in etiology_ids]}}
+        ):
+            document = to_json(document)
+            result[document["etiology_id"]].append(document)
+        return result
+
+    def find_etiologies_with_drugs(self, symptoms_causes) -> dict[tuple, dict]:
+        """Find etiologies with their drugs by symptom and lower case cause."""
+        # one round trip, the lookups use the etiology and drug indexes
+        database = State.MONGODB_CLIENT.ai_hospital_services
+        result = {}
+        for document in database.subjective_symptoms.aggregate(
+            etiologies_with_drugs_pipeline(symptoms_causes)
+        ):
+            document = to_json(document)
+            result[(document["symptom"], document["etiology"]["cause"])] = document[
+                "etiology"
+            ]
+        return result
+
+    def find_ordered(self, collection, after, fields, limit=None) -> Iterator[dict]:
+        """Find documents ordered by id after an id, closing the cursor when done."""
+        database = State.MONGODB_CLIENT.ai_hospital_services
+        # the id index serves both the range and the order, so pages cost the same
+        cursor = (
+            getattr(database, collection)
+            .find(*page_query(collection, after, fields))
+            .sort("_id", 1)
+            .batch_size(config.READ_ALL_BATCH_SIZE)
+        )
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        try:
+            for document in cursor:
+                yield to_json(document)
+        finally:
+            # also reached when the client disconnects mid stream
+            cursor.close()
 
 
 @dataclass(init=True)
@@ -17,6 +168,12 @@ class State:
     """Class for storing state."""
 
     MONGODB_CLIENT = None
+    STORAGE = MongoStorage()
+    REFERENCE_DATA = None
+    REFERENCE_DATA_LOCK = threading.Lock()
+    REFERENCE_DATA_STATISTICS = {"loads": 0, "version_checks": 0, "hits": 0}
+    # symptoms by id lookup of the last version, for reads with the cache turned off
+    SYMPTOMS_BY_ID = {}
 
 
 def configure_mongodb_client() -> None:
@@ -30,6 +187,24 @@ def configure_mongodb_client() -> None:
     logger.info("Completed configure mongodb client")
 
 
+def configure_storage(storage) -> None:
+    """Configure the storage backend reads go to, instead of mongodb."""
+    logger = get_logger()
+
+    logger.info("Starting configure storage", storage=type(storage).__name__)
+    State.STORAGE = storage
+    logger.info("Completed configure storage")
+
+
+def ping() -> None:
+    """Ping mongodb server."""
+    logger = get_logger()
+
+    logger.info("Starting ping mongodb")
+    State.STORAGE.ping()
+    logger.info("Completed ping mongodb")
+
+
 def log_mongodb_status() -> None:
     """Log mongodb status."""
     logger = get_logger()
@@ -40,17 +215,42 @@ def log_mongodb_status() -> None:
     logger.info("Completed log mongodb status")
 
 
+def check_query_plans() -> list[str]:
+    """Explain the hot queries, warning about and listing any collection scans."""
+    logger = get_logger()
+
+    logger.info("Starting check query plans")
+    if not State.STORAGE.remote:
+        logger.info("Completed check query plans, storage is embedded")
+        return []
+    database = State.MONGODB_CLIENT.ai_hospital_services
+    collection_scans = []
+    for collection, filter_ in QUERY_PLAN_CHECKS:
+        plan = getattr(database, collection).find(filter_).explain()
+        stages = _find_stages(plan["queryPlanner"]["winningPlan"])
+        if "COLLSCAN" in stages:
+            logger.warning(
+                "Query falls back to a collection scan, check the migrations ran",
+                collection=collection,
+                fields=list(filter_),
+            )
+            collection_scans.append(collection)
+        else:
+            logger.debug("Query uses an index", collection=collection, stages=stages)
+    logger.info("Completed check query plans", collection_scans=collection_scans)
+
+    return collection_scans
+
+
 def read_all_subjective_symptoms() -> list[str]:
     """Read all subjective symptoms."""
     logger = get_logger()
 
     logger.info("Starting read all subjective symptoms")
-    database = State.MONGODB_CLIENT.ai_hospital_services
-    result = []
-    for document in database.subjective_symptoms.find({}):
-        document = json_util.dumps(document)
-        document = _replace_oid(document)
-        result.append(json.loads(document))
+    if _is_cached():
+        result = _read_reference_data().collections["subjective_symptoms"]
+    else:
+        result = State.STORAGE.find_all("subjective_symptoms")
     logger.info("Completed read all subjective symptoms")
 
     return result
@@ -61,36 +261,39 @@ def read_all_objective_symptoms() -> list[str]:
     logger = get_logger()
 
     logger.info("Starting read all objective symptoms")
-    database = State.MONGODB_CLIENT.ai_hospital_services
-    result = []
-    for document in database.objective_symptoms.find({}):
-        document = json_util.dumps(document)
-        document = _replace_oid(document)
-        result.append(json.loads(document))
-
+    if _is_cached():
+        result = _read_reference_data().collections["objective_symptoms"]
+    else:
+        result = State.STORAGE.find_all("objective_symptoms")
     logger.info("Completed read all objective symptoms")
 
     return result
 
 
+def read_symptoms_by_id() -> dict[str, str]:
+    """Read normalised subjective and objective symptoms by document id."""
+    if _is_cached():
+        # rebuilt with the reference data when its version changes
+        return _read_reference_data().symptoms_by_id
+    # built once per storage, or per version, not on every request
+    return State.STORAGE.find_symptoms_by_id()
+
+
 def read_all_etiologies() -> list[str]:
     """Read all etiologies data."""
     logger = get_logger()
 
     logger.info("Starting read all etiologies")
-    database = State.MONGODB_CLIENT.ai_hospital_services
-    result = []
-    for document in database.etiologies.find({}):
-        document = json_util.dumps(document)
-        document = _replace_oid(document)
-        result.append(json.loads(document))
-
+    if _is_cached():
+        result = _read_reference_data().collections["etiologies"]
+    else:
+        result = State.STORAGE.find_all("etiologies")
     logger.info("Completed read all etiologies")
 
     return result
 
 
-def read_etiology(subjective_symptom_id, cause) -> str:
+def read_etiology(subjective_symptom_id, cause) -> dict:
     """Read etiology data by subjective symptom and cause."""
     logger = get_logger()
 
@@ -99,23 +302,21 @@ def read_etiology(subjective_symptom_id, cause) -> str:
         subjective_symptom_id=subjective_symptom_id,
         cause=cause,
     )
-    database = State.MONGODB_CLIENT.ai_hospital_services
-    document = database.etiologies.find_one(
-        {
-            "subjective_symptom_id": ObjectId(subjective_symptom_id),
-            "cause": str(cause).lower(),
-        }
-    )
-    document = json_util.dumps(document) if document is not None else None
-    document = _replace_oid(document) if document is not None else None
-    document = json.loads(document) if document is not None else None
+    if _is_cached():
+        document = _read_reference_data().etiologies_by_cause.get(
+            (str(ObjectId(subjective_symptom_id)), str(cause).lower())
+        )
+    else:
+        document = State.STORAGE.find_etiology(
+            str(ObjectId(subjective_symptom_id)), str(cause).lower()
+        )
     logger.info(
         "Completed read etiology by symptom and cause",
         subjective_symptom=subjective_symptom_id,
         cause=cause,
     )
 
-    return str(document) if document is not None else None
+    return document
 
 
 def read_drugs(etiology_id) -> list[str]:
@@ -123,22 +324,358 @@ def read_drugs(etiology_id) -> list[str]:
     logger = get_logger()
 
     logger.info("Starting read drugs by etiology", etiology_id=etiology_id)
-    database = State.MONGODB_CLIENT.ai_hospital_services
-    result = []
-    for document in database.drugs.find({"etiology_id": ObjectId(etiology_id)}):
-        document = json_util.dumps(document)
-        document = _replace_oid(document)
-        result.append(json.loads(document))
+    if _is_cached():
+        result = _read_reference_data().drugs_by_etiology_id.get(
+            str(ObjectId(etiology_id)), []
+        )
+    else:
+        result = State.STORAGE.find_drugs(str(ObjectId(etiology_id)))
     logger.info("Completed read drugs by etiology", etiology_id=etiology_id)
 
     return result
 
 
-def _replace_oid(string):
-    while True:
-        pattern = re.compile(r'{\s*"\$oid":\s*("[a-z0-9]{1,}")\s*}')
-        match = re.search(pattern, string)
-        if match:
-            string = string.replace(match.group(0), match.group(1))
-        else:
-            return string
+def read_drugs_by_etiologies(etiology_ids) -> dict[str, list]:
+    """Read drugs data for many etiologies at once, by etiology."""
+    logger = get_logger()
+
+    logger.info("Starting read drugs by etiologies", etiology_ids=etiology_ids)
+    etiology_ids = [str(ObjectId(etiology_id)) for etiology_id in etiology_ids]
+    if _is_cached():
+        drugs_by_etiology_id = _read_reference_data().drugs_by_etiology_id
+        result = {
+            etiology_id: drugs_by_etiology_id.get(etiology_id, [])
+            for etiology_id in etiology_ids
+        }
+    else:
+        result = State.STORAGE.find_drugs_by_etiologies(etiology_ids)
+    logger.info("Completed read drugs by etiologies", etiology_ids=etiology_ids)
+
+    return result
+
+
+def read_etiologies_with_drugs(symptoms_causes) -> dict[tuple, dict]:
+    """Read etiologies with their drugs by subjective symptom and cause pairs."""
+    logger = get_logger()
+
+    logger.info("Starting read etiologies with drugs", symptoms_causes=symptoms_causes)
+    symptoms_causes = [
+        (str(symptom), str(cause).lower()) for symptom, cause in symptoms_causes
+    ]
+    result = {}
+    if _is_cached():
+        result = find_etiologies_with_drugs(_read_reference_data(), symptoms_causes)
+    elif len(symptoms_causes) > 0:
+        result = State.STORAGE.find_etiologies_with_drugs(symptoms_causes)
+    logger.info("Completed read etiologies with drugs", etiologies=len(result))
+
+    return result
+
+
+def read_all_serialised(collection) -> bytes:
+    """Read all documents of a reference data collection as json bytes."""
+    if collection not in REFERENCE_COLLECTIONS:
+        raise Exception(f"Error: unknown reference data collection - {collection}")
+    if _is_cached():
+        return _read_reference_data().serialised[collection]
+    return State.STORAGE.read_serialised(collection)
+
+
+def read_page(collection, limit, after=None, fields=None) -> (list[dict], str):
+    """Read a page of documents ordered by id, with the id the next page follows."""
+    logger = get_logger()
+
+    logger.info("Starting read page", collection=collection, limit=limit, after=after)
+    # one extra document tells whether another page follows
+    documents = list(State.STORAGE.find_ordered(collection, after, fields, limit + 1))
+    next_after = documents[limit - 1]["_id"] if len(documents) > limit else None
+    documents = documents[:limit]
+    logger.info("Completed read page", collection=collection, documents=len(documents))
+
+    return documents, next_after
+
+
+def stream_all(collection, after=None, fields=None, limit=None) -> Iterator[bytes]:
+    """Stream documents ordered by id as newline delimited json bytes."""
+    logger = get_logger()
+
+    logger.info("Starting stream all", collection=collection, after=after)
+    count = 0
+    try:
+        for document in State.STORAGE.find_ordered(collection, after, fields, limit):
+            count += 1
+            yield serialise_line(document)
+    finally:
+        logger.info("Completed stream all", collection=collection, documents=count)
+
+
+def load_reference_data() -> None:
+    """Load reference data into memory ahead of the first read."""
+    if _is_cached():
+        _read_reference_data()
+
+
+def read_reference_data_statistics() -> dict:
+    """Read reference data cache version, age and counters."""
+    reference_data = State.REFERENCE_DATA
+    return {
+        "version": reference_data.version if reference_data is not None else None,
+        "age_seconds": (
+            time.monotonic() - reference_data.loaded_at
+            if reference_data is not None
+            else None
+        ),
+        **State.REFERENCE_DATA_STATISTICS,
+    }
+
+
+def page_query(collection, after, fields) -> (dict, dict):
+    """Make the filter and projection of reads ordered by id, after an id."""
+    if collection not in REFERENCE_COLLECTIONS:
+        raise Exception(f"Error: unknown reference data collection - {collection}")
+    return (
+        {"_id": {"$gt": ObjectId(after)}} if after is not None else {},
+        {name: 1 for name in fields} if fields else None,
+    )
+
+
+def find_etiologies_with_drugs(reference_data, symptoms_causes) -> dict[tuple, dict]:
+    """Find etiologies with their drugs in reference data, by symptom and cause."""
+    result = {}
+    for symptom, cause in symptoms_causes:
+        etiology = reference_data.etiologies_by_cause.get(
+            (reference_data.subjective_symptom_ids.get(symptom), cause)
+        )
+        if etiology is not None:
+            result[(symptom, cause)] = {
+                **etiology,
+                "drugs": reference_data.drugs_by_etiology_id.get(etiology["_id"], []),
+            }
+    return result
+
+
+def etiologies_with_drugs_pipeline(symptoms_causes) -> list[dict]:
+    """Make the aggregation from subjective symptoms to their etiologies and drugs."""
+    return [
+        {
+            "$match": {
+                "symptom": {"$in": sorted({symptom for symptom, _ in symptoms_causes})}
+            }
+        },
+        {
+            "$lookup": {
+                "from": "etiologies",
+                "localField": "_id",
+                "foreignField": "subjective_symptom_id",
+                "as": "etiology",
+            }
+        },
+        {"$unwind": "$etiology"},
+        {
+            "$match": {
+                "$or": [
+                    {"symptom": symptom, "etiology.cause": cause}
+                    for symptom, cause in symptoms_causes
+                ]
+            }
+        },
+        {
+            "$lookup": {
+                "from": "drugs",
+                "localField": "etiology._id",
+                "foreignField": "etiology_id",
+                "as": "etiology.drugs",
+            }
+        },
+        {"$project": {"_id": 0, "symptom": 1, "etiology": 1}},
+    ]
+
+
+def build_reference_data(version, collections) -> ReferenceData:
+    """Build reference data and its lookups from whole collections."""
+    now = time.monotonic()
+    reference_data = ReferenceData(version=version, loaded_at=now, checked_at=now)
+    for collection in REFERENCE_COLLECTIONS:
+        reference_data.collections[collection] = collections[collection]
+        reference_data.serialised[collection] = serialise(collections[collection])
+    for document in reference_data.collections["subjective_symptoms"]:
+        reference_data.subjective_symptom_ids[document.get("symptom")] = document["_id"]
+    reference_data.symptoms_by_id = build_symptoms_by_id(
+        reference_data.collections["subjective_symptoms"]
+        + reference_data.collections["objective_symptoms"]
+    )
+    for document in reference_data.collections["etiologies"]:
+        reference_data.etiologies_by_cause[
+            (document.get("subjective_symptom_id"), document.get("cause"))
+        ] = document
+    for document in reference_data.collections["drugs"]:
+        reference_data.drugs_by_etiology_id.setdefault(
+            document.get("etiology_id"), []
+        ).append(document)
+    return reference_data
+
+
+def build_symptoms_by_id(symptoms) -> dict[str, str]:
+    """Build the normalised symptoms by document id lookup, for predicting by ids."""
+    return {
+        document["_id"]: str(document.get("symptom", "")).lower().strip()
+        for document in symptoms
+    }
+
+
+def read_cached_reference_data() -> ReferenceData:
+    """Read the cached reference data within its timeout and version interval."""
+    reference_data = read_unexpired_reference_data()
+    if (
+        reference_data is None
+        or time.monotonic() - reference_data.checked_at
+        >= config.REFERENCE_DATA_VERSION_INTERVAL
+    ):
+        return None
+    State.REFERENCE_DATA_STATISTICS["hits"] += 1
+    return reference_data
+
+
+def read_unexpired_reference_data() -> ReferenceData:
+    """Read the cached reference data within its timeout, however long unchecked."""
+    reference_data = State.REFERENCE_DATA
+    if (
+        reference_data is None
+        or time.monotonic() - reference_data.loaded_at
+        >= config.REFERENCE_DATA_CACHE_TIMEOUT
+    ):
+        return None
+    return reference_data
+
+
+def check_reference_data_version(reference_data, version) -> bool:
+    """Check cached reference data against the version read, marking it if current."""
+    State.REFERENCE_DATA_STATISTICS["version_checks"] += 1
+    if version != reference_data.version:
+        return False
+    reference_data.checked_at = time.monotonic()
+    return True
+
+
+def cache_reference_data(version, collections) -> ReferenceData:
+    """Build reference data from whole collections and cache it."""
+    reference_data = build_reference_data(version, collections)
+    State.REFERENCE_DATA = reference_data
+    State.REFERENCE_DATA_STATISTICS["loads"] += 1
+    return reference_data
+
+
+def read_memoised_symptoms_by_id(version) -> dict[str, str]:
+    """Read the symptoms by id lookup memoised for a version, if any."""
+    # without a version there is nothing to tell a stale lookup by
+    return State.SYMPTOMS_BY_ID.get(version) if version is not None else None
+
+
+def memoise_symptoms_by_id(version, symptoms) -> dict[str, str]:
+    """Build the symptoms by id lookup and memoise it for a version."""
+    symptoms_by_id = build_symptoms_by_id(symptoms)
+    State.SYMPTOMS_BY_ID = {version: symptoms_by_id}
+    return symptoms_by_id
+
+
+def serialise(documents) -> bytes:
+    """Serialise documents as compact json bytes, the same as the responses."""
+    return encoding.dumps(documents) + b"\n"
+
+
+def serialise_line(document) -> bytes:
+    """Serialise a json ready document as a line of newline delimited json bytes."""
+    return encoding.dumps(document) + b"\n"
+
+
+def to_json(value):
+    """Convert a bson document to json ready values, object ids as strings."""
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if isinstance(value, ObjectId):
+        return str(value)
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    # other bson types as relaxed extended json, same as 'json_util.dumps'
+    return to_json(json_util.default(value))
+
+
+def _is_cached() -> bool:
+    # an embedded storage already holds the data and its lookups in memory
+    return State.STORAGE.remote and config.REFERENCE_DATA_CACHE_TIMEOUT > 0
+
+
+def _find_stages(plan) -> list[str]:
+    # plans nest as 'inputStage' or 'inputStages', and as 'queryPlan' since 7.0
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ["queryPlan", "inputStage"]:
+        if key in plan:
+            stages += _find_stages(plan[key])
+    for input_stage in plan.get("inputStages", []):
+        stages += _find_stages(input_stage)
+    return stages
+
+
+def _read_reference_data_version() -> str:
+    return State.STORAGE.read_version()
+
+
+def _read_reference_data() -> ReferenceData:
+    reference_data = read_cached_reference_data()
+    if reference_data is not None:
+        return reference_data
+
+    with State.REFERENCE_DATA_LOCK:
+        # another request may have refreshed the data while waiting for the lock
+        reference_data = read_cached_reference_data()
+        if reference_data is not None:
+            return reference_data
+        reference_data = read_unexpired_reference_data()
+        if reference_data is not None and check_reference_data_version(
+            reference_data, _read_checked_version(reference_data)
+        ):
+            return reference_data
+        return _load_reference_data()
+
+
+def _read_checked_version(reference_data) -> str:
+    logger = get_logger()
+
+    try:
+        return _read_reference_data_version()
+    except Exception as exception:  # pylint: disable=broad-except
+        # keep serving the cached data until mongodb is reachable again
+        logger.error("Error reading reference data version", exception=str(exception))
+        return reference_data.version
+
+
+def _load_reference_data() -> ReferenceData:
+    logger = get_logger()
+
+    logger.info("Starting load reference data")
+    # read the version first, so a migration running meanwhile loads again
+    version = _read_reference_data_version()
+    reference_data = cache_reference_data(
+        version,
+        {
+            collection: State.STORAGE.find_all(collection)
+            for collection in REFERENCE_COLLECTIONS
+        },
+    )
+    logger.info("Completed load reference data", version=version)
+
+    return reference_data
+
+
+def main() -> None:
+    """Entry point to check the hot queries are served by indexes."""
+    config.MONGODB_URL = os.environ.get("MONGODB_URL", default=config.MONGODB_URL)
+    configure_mongodb_client()
+    if len(check_query_plans()) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
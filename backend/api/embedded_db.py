@@ -0,0 +1,113 @@
+""" Module for an embedded read-only storage built from the migration data files. """
+
+import bisect
+import os
+from typing import Iterator
+
+from bson import json_util
+from bson.objectid import ObjectId
+from structlog import get_logger
+
+from . import document_db
+
+
+class Storage:
+    """Class for reading reference data from json files held in memory.
+
+    Same interface as 'document_db.MongoStorage', so it stands in for mongodb.
+    """
+
+    # reads are in process, so they skip the cache and the query plan checks
+    remote = False
+
+    def __init__(self, path) -> None:
+        logger = get_logger()
+
+        logger.info("Starting load embedded storage", path=path)
+        collections = {}
+        for collection in document_db.REFERENCE_COLLECTIONS:
+            with open(os.path.join(path, f"{collection}.json"), "r") as file:
+                documents = document_db.to_json(json_util.loads(file.read()))
+            collections[collection] = sorted(
+                documents, key=lambda document: ObjectId(document["_id"])
+            )
+        # the data directory is named after the migration that inserts it
+        self.version = os.path.basename(os.path.normpath(path))
+        self.reference_data = document_db.build_reference_data(
+            self.version, collections
+        )
+        # ids in order per collection, to find where reads after an id start
+        self.ids = {
+            collection: [ObjectId(document["_id"]) for document in documents]
+            for collection, documents in collections.items()
+        }
+        logger.info(
+            "Completed load embedded storage",
+            version=self.version,
+            documents={
+                collection: len(documents)
+                for collection, documents in collections.items()
+            },
+        )
+
+    def ping(self) -> None:
+        """Nothing to reach, the data is in memory."""
+
+    def read_version(self) -> str:
+        """Read the reference data version, the name of the data directory."""
+        return self.version
+
+    def read_serialised(self, collection) -> bytes:
+        """Read all documents of a collection as json bytes."""
+        return self.reference_data.serialised[collection]
+
+    def find_all(self, collection) -> list[dict]:
+        """Find all documents of a collection."""
+        return self.reference_data.collections[collection]
+
+    def find_symptoms_by_id(self) -> dict[str, str]:
+        """Find normalised symptoms by document id, built with the storage."""
+        return self.reference_data.symptoms_by_id
+
+    def find_etiology(self, subjective_symptom_id, cause) -> dict:
+        """Find an etiology by subjective symptom id and lower case cause."""
+        return self.reference_data.etiologies_by_cause.get(
+            (subjective_symptom_id, cause)
+        )
+
+    def find_drugs(self, etiology_id) -> list[dict]:
+        """Find drugs by etiology id."""
+        return self.reference_data.drugs_by_etiology_id.get(etiology_id, [])
+
+    def find_drugs_by_etiologies(self, etiology_ids) -> dict[str, list]:
+        """Find drugs by etiology for many etiology ids."""
+        return {
+            etiology_id: self.find_drugs(etiology_id) for etiology_id in etiology_ids
+        }
+
+    def find_etiologies_with_drugs(self, symptoms_causes) -> dict[tuple, dict]:
+        """Find etiologies with their drugs by symptom and lower case cause."""
+        return document_db.find_etiologies_with_drugs(
+            self.reference_data, symptoms_causes
+        )
+
+    def find_ordered(self, collection, after, fields, limit=None) -> Iterator[dict]:
+        """Find documents ordered by id after an id."""
+        _, projection = document_db.page_query(collection, after, fields)
+        documents = self.reference_data.collections[collection]
+        start = (
+            bisect.bisect_right(self.ids[collection], ObjectId(after))
+            if after is not None
+            else 0
+        )
+        end = len(documents) if limit is None else min(start + limit, len(documents))
+        for document in documents[start:end]:
+            if projection is None:
+                yield document
+            else:
+                # as with mongodb, the id is always projected
+                yield {
+                    key: value
+                    for key, value in document.items()
+                    if key == "_id" or key in projection
+                }
@@ -0,0 +1,147 @@
+""" Module for encoding response bodies, as json, compressed and with validators. """
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+
+import orjson
+
+from . import config
+from .lru_cache import LRUCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/x-msgpack"
+
+
+@dataclass(init=True)
+class State:
+    """Class for storing state."""
+
+    COMPRESSION_CACHE = None
+    TRANSCODING_CACHE = None
+
+
+def configure() -> None:
+    """Configure the caches of compressed and transcoded bodies, by body digest."""
+    State.COMPRESSION_CACHE = (
+        LRUCache(max_size=config.RESPONSE_COMPRESSION_CACHE_MAX_SIZE, timeout=None)
+        if config.RESPONSE_COMPRESSION_CACHE_MAX_SIZE > 0
+        else None
+    )
+    State.TRANSCODING_CACHE = (
+        LRUCache(max_size=config.RESPONSE_COMPRESSION_CACHE_MAX_SIZE, timeout=None)
+        if config.RESPONSE_COMPRESSION_CACHE_MAX_SIZE > 0
+        else None
+    )
+
+
+def dumps(value) -> bytes:
+    """Serialise a value as compact json bytes with sorted keys."""
+    return orjson.dumps(
+        value,
+        option=orjson.OPT_SORT_KEYS
+        | orjson.OPT_SERIALIZE_NUMPY
+        | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+def packb(value) -> bytes:
+    """Serialise a value as message pack bytes, the binary form of its json."""
+    return msgpack.packb(value, default=_to_builtin)
+
+
+def serialise(value, mimetype) -> bytes:
+    """Serialise a value as json or message pack bytes, by mimetype."""
+    return packb(value) if mimetype == MSGPACK_MIMETYPE else dumps(value)
+
+
+def transcode(body, mimetype) -> bytes:
+    """Transcode a json body to a mimetype, reusing bodies with the same digest."""
+    if mimetype == JSON_MIMETYPE:
+        return body
+    if State.TRANSCODING_CACHE is None:
+        return serialise(orjson.loads(body), mimetype)
+    return State.TRANSCODING_CACHE.get_or_set(
+        (make_etag(body), mimetype), lambda: serialise(orjson.loads(body), mimetype)
+    )
+
+
+def negotiate_mimetype(accept_mimetypes) -> str:
+    """Choose json, or message pack if accepted before json and available."""
+    if msgpack is None:
+        return JSON_MIMETYPE
+    return accept_mimetypes.best_match(
+        [JSON_MIMETYPE, MSGPACK_MIMETYPE], default=JSON_MIMETYPE
+    )
+
+
+def make_etag(body) -> str:
+    """Make an entity tag from the digest of a body."""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def negotiate(accept_encodings) -> str:
+    """Choose the content encoding of a body from the accepted encodings."""
+    return accept_encodings.best_match(
+        ["br", "gzip"] if brotli is not None else ["gzip"]
+    )
+
+
+def compress(body, encoding, etag=None) -> bytes:
+    """Compress a body, reusing the compressed body of a body with the same digest."""
+    if State.COMPRESSION_CACHE is None:
+        return _compress(body, encoding)
+    return State.COMPRESSION_CACHE.get_or_set(
+        (etag or make_etag(body), encoding), lambda: _compress(body, encoding)
+    )
+
+
+def encode(body, accept_encodings, if_none_match=None) -> (int, bytes, dict):
+    """Encode a body, answering 304 if validated and matching 'If-None-Match'."""
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    etag = None
+    if if_none_match is not None:
+        etag = make_etag(body)
+        # the same weak tag for every encoding of the body
+        headers["ETag"] = f'W/"{etag}"'
+        if if_none_match.contains_weak(etag):
+            return 304, b"", headers
+    if len(body) >= config.RESPONSE_COMPRESSION_MIN_SIZE:
+        encoding = negotiate(accept_encodings)
+        if encoding is not None:
+            body = compress(body, encoding, etag)
+            headers["Content-Encoding"] = encoding
+    return 200, body, headers
+
+
+def read_cache_statistics() -> dict:
+    """Read compression and transcoding cache statistics."""
+    if State.COMPRESSION_CACHE is None:
+        return {}
+    return {
+        "compression": State.COMPRESSION_CACHE.statistics(),
+        "transcoding": State.TRANSCODING_CACHE.statistics(),
+    }
+
+
+def _to_builtin(value):
+    # numpy scalars and arrays
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Error: cannot serialise - {type(value).__name__}")
+
+
+def _compress(body, encoding) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=config.RESPONSE_COMPRESSION_LEVEL)
+    # no timestamp, so the same body always compresses the same
+    return gzip.compress(body, compresslevel=config.RESPONSE_COMPRESSION_LEVEL, mtime=0)
@@ -6,13 +6,24 @@
 #Args         : $1 - runtime behavior indicator -
 #               'api', 'migrate' or 'migrateThenApi'
 #             : $* - remaining args are passed through to the 'api' command
+#Env          : ASGI_ENABLED - 'true' to serve the api with the asgi app
+#             : STORAGE_SNAPSHOT_FILE - snapshot file 'migrate' writes, if set
+#             : MIGRATION_BATCH_SIZE - documents per insert of 'migrate' (1000)
 ###########################################################################
 
 function api() {
-    FLASK_DEBUG=${FLASK_DEBUG} python -m api.app "$@"
+    if [ "${ASGI_ENABLED}" = "true" ]; then
+        python -m api.asgi_app "$@"
+    else
+        FLASK_DEBUG=${FLASK_DEBUG} python -m api.app "$@"
+    fi
 }
 function migrate() {
-    mongodb-migrate --url ${MONGODB_URL} --migrations "api/migrations"
+    mongodb-migrate --url ${MONGODB_URL} --migrations "api/migrations" &&
+        MONGODB_URL=${MONGODB_URL} python -m api.document_db &&
+        if [ -n "${STORAGE_SNAPSHOT_FILE}" ]; then
+            MONGODB_URL=${MONGODB_URL} python -m api.snapshot "${STORAGE_SNAPSHOT_FILE}"
+        fi
 }
 
 mode=$1
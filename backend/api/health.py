@@ -0,0 +1,127 @@
+""" Module for startup phases, warm-up and health status. """
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from structlog import get_logger
+
+from . import config
+
+
+@dataclass(init=True)
+class State:
+    """Class for storing state."""
+
+    LOCK = threading.Lock()
+    SUBSYSTEMS = {}
+    STARTUP_PHASES = []
+    WARM_UP_THREAD = None
+
+
+@contextmanager
+def timed_phase(name):
+    """Time a blocking init phase for the startup report."""
+    logger = get_logger()
+
+    logger.info("Starting init phase", phase=name)
+    started_at = time.perf_counter()
+    yield
+    duration = time.perf_counter() - started_at
+    _record_phase(name, duration)
+    logger.info("Completed init phase", phase=name, seconds=round(duration, 3))
+
+
+def run_phase(name, function) -> bool:
+    """Run and time a warm-up phase, recording its subsystem status."""
+    logger = get_logger()
+
+    logger.info("Starting init phase", phase=name)
+    _set_status(name, "starting")
+    started_at = time.perf_counter()
+    try:
+        function()
+    except Exception as exception:  # pylint: disable=broad-except
+        duration = time.perf_counter() - started_at
+        logger.error(
+            "Error in init phase",
+            phase=name,
+            exception=str(exception),
+            seconds=duration,
+        )
+        _set_status(name, "failed", str(exception))
+        return False
+    duration = time.perf_counter() - started_at
+    _set_status(name, "ready")
+    _record_phase(name, duration)
+    logger.info("Completed init phase", phase=name, seconds=round(duration, 3))
+
+    return True
+
+
+def start_warm_up(phases) -> None:
+    """Run init phases in a background thread, retrying failed ones until ready."""
+    State.WARM_UP_THREAD = threading.Thread(
+        target=_warm_up, args=(phases,), name="warm-up", daemon=True
+    )
+    State.WARM_UP_THREAD.start()
+
+
+def read_liveness() -> dict:
+    """Read liveness status."""
+    return {"status": "alive"}
+
+
+def read_readiness() -> (bool, dict):
+    """Read readiness status of every subsystem and the startup report."""
+    with State.LOCK:
+        subsystems = {name: dict(status) for name, status in State.SUBSYSTEMS.items()}
+        startup_phases = list(State.STARTUP_PHASES)
+    ready = len(subsystems) > 0 and all(
+        status["status"] == "ready" for status in subsystems.values()
+    )
+    return ready, {
+        "status": "ready" if ready else "not ready",
+        "subsystems": subsystems,
+        "startup": {
+            "phases": startup_phases,
+            "seconds": round(sum(phase["seconds"] for phase in startup_phases), 3),
+        },
+    }
+
+
+def _warm_up(phases) -> None:
+    logger = get_logger()
+
+    logger.info("Starting warm-up", phases=[name for name, _ in phases])
+    for name, _ in phases:
+        _set_status(name, "pending")
+    pending = list(phases)
+    while True:
+        pending = [
+            (name, function)
+            for name, function in pending
+            if not run_phase(name, function)
+        ]
+        if len(pending) == 0:
+            break
+        time.sleep(config.WARM_UP_RETRY_INTERVAL)
+    _, readiness = read_readiness()
+    logger.info("Completed warm-up", startup=readiness["startup"])
+
+
+def _set_status(name, status, error=None) -> None:
+    with State.LOCK:
+        attempts = State.SUBSYSTEMS.get(name, {}).get("attempts", 0)
+        State.SUBSYSTEMS[name] = {
+            "status": status,
+            "attempts": attempts + 1 if status in ["ready", "failed"] else attempts,
+        }
+        if error is not None:
+            State.SUBSYSTEMS[name]["error"] = error
+
+
+def _record_phase(name, duration) -> None:
+    with State.LOCK:
+        State.STARTUP_PHASES.append({"phase": name, "seconds": round(duration, 3)})
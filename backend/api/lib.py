@@ -60,14 +60,60 @@ def log_config_settings() -> None:
     logger.info("Starting log config settings in DEBUG mode")
     logger.debug("", DEBUG_MODE=config.DEBUG_MODE)
     logger.debug("", PORT=config.PORT)
+    logger.debug("", WARM_UP_RETRY_INTERVAL=config.WARM_UP_RETRY_INTERVAL)
+    logger.debug("", ASGI_INFERENCE_THREADS=config.ASGI_INFERENCE_THREADS)
+    logger.debug("", RESPONSE_COMPRESSION_MIN_SIZE=config.RESPONSE_COMPRESSION_MIN_SIZE)
+    logger.debug("", RESPONSE_COMPRESSION_LEVEL=config.RESPONSE_COMPRESSION_LEVEL)
+    logger.debug(
+        "",
+        RESPONSE_COMPRESSION_CACHE_MAX_SIZE=config.RESPONSE_COMPRESSION_CACHE_MAX_SIZE,
+    )
     logger.debug(
         "",
         SYMPTOMS_TOKENISER_FILE=config.SYMPTOMS_TOKENISER_FILE,
     )
     logger.debug("", CAUSES_TOKENISER_FILE=config.CAUSES_TOKENISER_FILE)
+    logger.debug("", GENDERS=config.GENDERS)
+    logger.debug("", MODEL_BACKEND=config.MODEL_BACKEND)
     logger.debug("", MODEL_FILE=config.MODEL_FILE)
+    logger.debug("", MODEL_RELOAD_POLL_INTERVAL=config.MODEL_RELOAD_POLL_INTERVAL)
+    logger.debug("", MODEL_RELOAD_GRACE_PERIOD=config.MODEL_RELOAD_GRACE_PERIOD)
+    logger.debug("", MODEL_TFLITE_QUANTISATION=config.MODEL_TFLITE_QUANTISATION)
+    logger.debug("", MODEL_AGREEMENT_SAMPLES=config.MODEL_AGREEMENT_SAMPLES)
+    logger.debug("", MODEL_MIN_AGREEMENT=config.MODEL_MIN_AGREEMENT)
+    logger.debug("", INFERENCE_WORKERS=config.INFERENCE_WORKERS)
+    logger.debug("", INFERENCE_WORKER_TIMEOUT=config.INFERENCE_WORKER_TIMEOUT)
+    logger.debug("", PREDICTION_TOP_K=config.PREDICTION_TOP_K)
+    logger.debug("", PREDICTION_MAX_BATCH_SIZE=config.PREDICTION_MAX_BATCH_SIZE)
+    logger.debug("", PREDICTION_CACHE_MAX_SIZE=config.PREDICTION_CACHE_MAX_SIZE)
+    logger.debug("", PREDICTION_CACHE_TIMEOUT=config.PREDICTION_CACHE_TIMEOUT)
+    logger.debug("", PREDICTION_SESSION_MAX_SIZE=config.PREDICTION_SESSION_MAX_SIZE)
+    logger.debug("", PREDICTION_SESSION_TIMEOUT=config.PREDICTION_SESSION_TIMEOUT)
+    logger.debug("", BATCHING_ENABLED=config.BATCHING_ENABLED)
+    logger.debug("", BATCHING_MAX_WAIT_MS=config.BATCHING_MAX_WAIT_MS)
+    logger.debug("", BATCHING_MAX_BATCH_SIZE=config.BATCHING_MAX_BATCH_SIZE)
+    logger.debug("", BATCHING_TIMEOUT=config.BATCHING_TIMEOUT)
+    logger.debug("", MODEL_NAME=config.MODEL_NAME)
+    logger.debug("", MODEL_REGISTRY=config.MODEL_REGISTRY)
+    logger.debug("", MODEL_SHADOW=config.MODEL_SHADOW)
+    logger.debug("", MODEL_SHADOW_WORKERS=config.MODEL_SHADOW_WORKERS)
+    logger.debug("", MODEL_SHADOW_MAX_PENDING=config.MODEL_SHADOW_MAX_PENDING)
+    logger.debug("", MODEL_ROUTING_HEADER_KEY=config.MODEL_ROUTING_HEADER_KEY)
+    logger.debug("", MODEL_LATENCY_SAMPLES=config.MODEL_LATENCY_SAMPLES)
+    logger.debug("", REFERENCE_DATA_CACHE_TIMEOUT=config.REFERENCE_DATA_CACHE_TIMEOUT)
+    logger.debug(
+        "", REFERENCE_DATA_VERSION_INTERVAL=config.REFERENCE_DATA_VERSION_INTERVAL
+    )
+    logger.debug("", READ_ALL_MAX_LIMIT=config.READ_ALL_MAX_LIMIT)
+    logger.debug("", READ_ALL_BATCH_SIZE=config.READ_ALL_BATCH_SIZE)
+    logger.debug("", QUERY_PLAN_CHECK_ENABLED=config.QUERY_PLAN_CHECK_ENABLED)
+    logger.debug("", STORAGE_BACKEND=config.STORAGE_BACKEND)
+    logger.debug("", STORAGE_DATA_DIRECTORY=config.STORAGE_DATA_DIRECTORY)
+    logger.debug("", STORAGE_SNAPSHOT_FILE=config.STORAGE_SNAPSHOT_FILE)
     logger.debug("", WEB_REQUEST_TIMEOUT=config.WEB_REQUEST_TIMEOUT)
     logger.debug("", CACHE_TIMEOUT=config.CACHE_TIMEOUT)
+    logger.debug("", CACHE_REFRESH_INTERVAL=config.CACHE_REFRESH_INTERVAL)
+    logger.debug("", TOKEN_CACHE_MAX_SIZE=config.TOKEN_CACHE_MAX_SIZE)
     logger.debug("", TENANT_DOMAIN=config.TENANT_DOMAIN)
     logger.debug(
         "",
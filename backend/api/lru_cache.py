@@ -0,0 +1,108 @@
+""" Module for a bounded least recently used cache with expiry. """
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Class for a thread safe least recently used cache with expiry and metrics."""
+
+    def __init__(self, max_size, timeout) -> None:
+        self.max_size = max_size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._statistics = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "coalesced": 0,
+        }
+
+    def get(self, key, default=None):
+        """Get value by key, or default if missing or expired."""
+        with self._lock:
+            found, value = self._lookup(key)
+            self._statistics["hits" if found else "misses"] += 1
+            return value if found else default
+
+    def set(self, key, value, timeout=None) -> None:
+        """Set value by key, expiring after timeout seconds or the cache timeout."""
+        with self._lock:
+            self._store(key, value, timeout)
+
+    def get_or_set(self, key, compute, timeout=None):
+        """Get value by key, or compute and set it once for concurrent callers."""
+        while True:
+            with self._lock:
+                found, value = self._lookup(key)
+                if found:
+                    self._statistics["hits"] += 1
+                    return value
+                pending = self._pending.get(key)
+                if pending is None:
+                    self._statistics["misses"] += 1
+                    pending = threading.Event()
+                    self._pending[key] = pending
+                    generation = self._generation
+                    break
+                self._statistics["coalesced"] += 1
+            # another caller is computing the same key, wait and look it up again
+            pending.wait()
+
+        try:
+            value = compute()
+            with self._lock:
+                # skip storing a value computed before the cache was cleared
+                if generation == self._generation:
+                    self._store(key, value, timeout)
+            return value
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.set()
+
+    def delete(self, key) -> None:
+        """Delete value by key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Clear all values."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def statistics(self) -> dict:
+        """Read size and hit, miss, eviction and expiration counters."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                **self._statistics,
+            }
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            self._statistics["expirations"] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value, timeout) -> None:
+        timeout = self.timeout if timeout is None else timeout
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._statistics["evictions"] += 1
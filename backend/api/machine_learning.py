@@ -1,90 +1,643 @@
 """ Module for prediction. """
 
-from dataclasses import dataclass
+import contextvars
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
 
 import numpy as np
-import tensorflow as tf
 from structlog import get_logger
 
-from . import config
+from . import config, numpy_model, tflite_model, worker_pool
+from .lru_cache import LRUCache
+
+# version of the model that served the latest prediction in the current context
+MODEL_VERSION = contextvars.ContextVar("MODEL_VERSION", default=None)
+
+
+@dataclass(init=True)
+class Artefacts:
+    """Class for a model and its vocabularies, swapped together on reload."""
+
+    version: str
+    model: object
+    symptoms_vocabulary: dict
+    causes_vocabulary: list
+    prediction_cache: LRUCache = None
+    files_stamp: tuple = None
+    embedding: np.ndarray = None
+    head: object = None
+
+
+@dataclass(init=True)
+class Session:
+    """Class for the symptoms entered so far and their running embedding sum."""
+
+    gender: str
+    symptoms: list = field(default_factory=list)
+    version: str = None
+    symptoms_sequence: list = None
+    embedding_sum: np.ndarray = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
 
 
 @dataclass(init=True)
 class State:
     """Class for storing state."""
 
-    SYMPTOMS_TOKENISER = None
-    CAUSES_TOKENISER = None
-    MODEL = None
+    ARTEFACTS = None
+    RELOAD_LOCK = threading.Lock()
+    WATCHER = None
+    SESSIONS = None
 
 
 def configure() -> None:
-    """Configure machine learning tokenisers and model."""
-    with open(file=config.SYMPTOMS_TOKENISER_FILE, mode="r", encoding="utf-8") as file:
-        State.SYMPTOMS_TOKENISER = tf.keras.preprocessing.text.tokenizer_from_json(
-            file.read()
+    """Configure machine learning vocabularies, model and sessions."""
+    State.ARTEFACTS = load_artefacts()
+    if State.SESSIONS is None:
+        State.SESSIONS = LRUCache(
+            max_size=config.PREDICTION_SESSION_MAX_SIZE,
+            timeout=config.PREDICTION_SESSION_TIMEOUT,
         )
-    with open(file=config.CAUSES_TOKENISER_FILE, mode="r", encoding="utf-8") as file:
-        State.CAUSES_TOKENISER = tf.keras.preprocessing.text.tokenizer_from_json(
-            file.read()
+
+
+def load_artefacts(
+    model_file=None, symptoms_tokeniser_file=None, causes_tokeniser_file=None
+) -> Artefacts:
+    """Load model and vocabularies, by default from the configured files."""
+    logger = get_logger()
+
+    files = _read_files(model_file, symptoms_tokeniser_file, causes_tokeniser_file)
+    logger.info("Starting load artefacts", backend=config.MODEL_BACKEND, files=files)
+    if config.MODEL_BACKEND == "numpy":
+        load_model = numpy_model.load_model
+    elif config.MODEL_BACKEND == "tflite":
+        load_model = tflite_model.load_model
+    elif config.MODEL_BACKEND == "keras":
+        # imported on first use, so the numpy backend never loads tensorflow
+        import tensorflow as tf  # pylint: disable=import-outside-toplevel
+
+        load_model = tf.keras.models.load_model
+    else:
+        raise Exception(f"Error: unknown model backend - {config.MODEL_BACKEND}")
+    files_stamp = _read_files_stamp(files)
+    symptoms_vocabulary = _read_vocabulary(files[1])
+    causes_word_index = _read_vocabulary(files[2])
+    causes_vocabulary = [None] * len(causes_word_index)
+    for cause, index in causes_word_index.items():
+        causes_vocabulary[index - 1] = cause
+    # the tflite backend serves the quantised export next to the keras model
+    model = load_model(files[3] if config.MODEL_BACKEND == "tflite" else files[0])
+    if config.MODEL_BACKEND == "tflite" and config.MODEL_AGREEMENT_SAMPLES > 0:
+        _check_agreement(model, files[0], len(symptoms_vocabulary))
+    try:
+        embedding, head = numpy_model.split_embedding(model)
+    except Exception as exception:  # pylint: disable=broad-except
+        # sessions then predict from the full symptoms sequence
+        logger.info("Skipped split model embedding", reason=str(exception))
+        embedding, head = None, None
+    if config.INFERENCE_WORKERS > 0:
+        if config.MODEL_BACKEND == "tflite":
+            raise Exception("Error: inference workers need the keras or numpy backend")
+        model = worker_pool.Pool(
+            model, config.INFERENCE_WORKERS, timeout=config.INFERENCE_WORKER_TIMEOUT
         )
-    State.MODEL = tf.keras.models.load_model(config.MODEL_FILE)
+    artefacts = Artefacts(
+        version=_read_files_version(files),
+        model=model,
+        symptoms_vocabulary=symptoms_vocabulary,
+        causes_vocabulary=causes_vocabulary,
+        # every model gets its own, empty prediction cache
+        prediction_cache=(
+            LRUCache(
+                max_size=config.PREDICTION_CACHE_MAX_SIZE,
+                timeout=config.PREDICTION_CACHE_TIMEOUT,
+            )
+            if config.PREDICTION_CACHE_MAX_SIZE > 0
+            else None
+        ),
+        files_stamp=files_stamp,
+        embedding=embedding,
+        head=head,
+    )
+    logger.info("Completed load artefacts", version=artefacts.version)
+
+    return artefacts
+
+
+def warm_up(artefacts=None) -> None:
+    """Run a dummy inference so the first request does not pay for it."""
+    logger = get_logger()
+
+    artefacts = artefacts or State.ARTEFACTS
+    logger.info("Starting warm up machine learning", version=artefacts.version)
+    artefacts.model.predict(
+        np.zeros((1, int(config.SYMPTOMS_SEQUENCE_MAXLEN)), dtype=np.int32)
+    )
+    logger.info("Completed warm up machine learning", version=artefacts.version)
+
+
+def reload(force=False) -> dict:
+    """Load and warm up changed model files, then swap them in as a whole."""
+    logger = get_logger()
+
+    with State.RELOAD_LOCK:
+        logger.info("Starting reload machine learning", force=force)
+        current = State.ARTEFACTS
+        files = _read_files()
+        files_stamp = _read_files_stamp(files)
+        if current is not None and not force:
+            if files_stamp == current.files_stamp:
+                logger.info("Completed reload machine learning - files unchanged")
+                return {"version": current.version, "reloaded": False}
+            if _read_files_version(files) == current.version:
+                current.files_stamp = files_stamp
+                logger.info("Completed reload machine learning - same version")
+                return {"version": current.version, "reloaded": False}
+        artefacts = load_artefacts()
+        warm_up(artefacts)
+        State.ARTEFACTS = artefacts
+        if current is not None and isinstance(current.model, worker_pool.Pool):
+            # requests that took the previous artefacts before the swap still
+            # predict with them, so their workers stop after a grace period
+            closer = threading.Timer(
+                config.MODEL_RELOAD_GRACE_PERIOD, current.model.close
+            )
+            closer.daemon = True
+            closer.start()
+        logger.info(
+            "Completed reload machine learning",
+            version=artefacts.version,
+            previous_version=current.version if current is not None else None,
+        )
+
+    return {"version": artefacts.version, "reloaded": True}
+
+
+def start_watching() -> None:
+    """Start polling the model files and reload them when they change."""
+    if State.WATCHER is not None:
+        return
+    State.WATCHER = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+    State.WATCHER.start()
+
+
+def read_model_version() -> str:
+    """Read the version of the model that served the latest prediction."""
+    version = MODEL_VERSION.get()
+    if version is None and State.ARTEFACTS is not None:
+        version = State.ARTEFACTS.version
+    return version
 
 
 def predict_cause(
-    subjective_symptoms, objective_symptoms, gender
+    subjective_symptoms, objective_symptoms, gender, artefacts=None
 ) -> list[(str, float)]:
-    """Predict cause from symptoms."""
+    """Predict cause from symptoms, with the given or the current artefacts."""
     logger = get_logger()
     logger.info("Starting predict cause", subjective_symptoms=subjective_symptoms)
     logger.debug("", objective_symptoms=objective_symptoms, gender=gender)
 
-    # prepare symptoms corpus
-    symptoms_corpus = (
+    artefacts = artefacts or State.ARTEFACTS
+
+    # validate arguments
+    symptoms_sequence, message = _encode_symptoms(
+        artefacts, subjective_symptoms, objective_symptoms, gender
+    )
+    if message is not None:
+        logger.error("Completed predict cause", message=message)
+        raise Exception(message)
+
+    response = _predict_sequences(
+        artefacts, [symptoms_sequence], config.PREDICTION_TOP_K
+    )[0]
+    MODEL_VERSION.set(artefacts.version)
+    logger.info("Completed predict cause", subjective_symptom=subjective_symptoms)
+
+    return response
+
+
+def predict_cause_by_ids(
+    subjective_symptom_ids,
+    objective_symptom_ids,
+    gender,
+    symptoms_by_id,
+    artefacts=None,
+) -> list[(str, float)]:
+    """Predict cause from symptom document ids, with the given or current artefacts.
+
+    Ids are looked up in 'symptoms_by_id', normalised symptoms by document id.
+    """
+    logger = get_logger()
+    logger.info(
+        "Starting predict cause by ids", subjective_symptom_ids=subjective_symptom_ids
+    )
+    logger.debug("", objective_symptom_ids=objective_symptom_ids, gender=gender)
+
+    artefacts = artefacts or State.ARTEFACTS
+
+    # validate arguments
+    symptoms_sequence = []
+    for item in (
+        subjective_symptom_ids + config.SYMPTOMS_SEPARATOR + objective_symptom_ids
+    ).split(config.SYMPTOMS_SEPARATOR):
+        index = artefacts.symptoms_vocabulary.get(symptoms_by_id.get(item.strip(), ""))
+        if index is None:
+            message = f"Error: invalid or unknown symptom id - {item}"
+            logger.error("Completed predict cause by ids", message=message)
+            raise Exception(message)
+        symptoms_sequence.append(index)
+    index = artefacts.symptoms_vocabulary.get(str(gender).lower().strip())
+    if index is None:
+        message = f"Error: invalid or unknown symptom - {gender}"
+        logger.error("Completed predict cause by ids", message=message)
+        raise Exception(message)
+    symptoms_sequence.append(index)
+
+    response = _predict_sequences(
+        artefacts, [symptoms_sequence], config.PREDICTION_TOP_K
+    )[0]
+    MODEL_VERSION.set(artefacts.version)
+    logger.info(
+        "Completed predict cause by ids", subjective_symptom_ids=subjective_symptom_ids
+    )
+
+    return response
+
+
+def predict_causes(batch, top_k=None, artefacts=None) -> list[dict]:
+    """Predict causes for a batch of symptoms records in a single model call."""
+    logger = get_logger()
+    logger.info("Starting predict causes", batch_size=len(batch))
+
+    artefacts = artefacts or State.ARTEFACTS
+    top_k = config.PREDICTION_TOP_K if top_k is None else top_k
+    response = [None] * len(batch)
+    valid_indices = []
+    valid_sequences = []
+    for index, record in enumerate(batch):
+        try:
+            symptoms_sequence, message = _encode_symptoms(
+                artefacts,
+                record["subjective_symptoms"],
+                record["objective_symptoms"],
+                record["gender"],
+            )
+        except (KeyError, TypeError) as exception:
+            response[index] = {"error": f"Error: invalid record - {exception}"}
+            continue
+        if message is not None:
+            response[index] = {"error": message}
+            continue
+        valid_indices.append(index)
+        valid_sequences.append(symptoms_sequence)
+
+    if len(valid_sequences) > 0:
+        rankings = _predict_sequences(artefacts, valid_sequences, top_k)
+        for index, causes in zip(valid_indices, rankings):
+            response[index] = {"causes": causes}
+    MODEL_VERSION.set(artefacts.version)
+
+    logger.info(
+        "Completed predict causes",
+        batch_size=len(batch),
+        invalid_records=len(batch) - len(valid_indices),
+    )
+
+    return response
+
+
+def create_session(gender) -> str:
+    """Create a session for entering symptoms one at a time."""
+    logger = get_logger()
+    logger.info("Starting create session", gender=gender)
+
+    artefacts = State.ARTEFACTS
+    gender, _, message = _encode_symptom(artefacts, gender)
+    # any vocabulary word encodes, only a gender token belongs in its place
+    if message is None and gender not in _split_genders():
+        message = f"Error: invalid or unknown gender - {gender}"
+    if message is not None:
+        logger.error("Completed create session", message=message)
+        raise Exception(message)
+    session = Session(gender=gender)
+    _rebuild_session(artefacts, session)
+    session_id = secrets.token_urlsafe(16)
+    State.SESSIONS.set(session_id, session)
+    logger.info("Completed create session")
+
+    return session_id
+
+
+def update_session(
+    session_id, add_symptoms="", remove_symptoms=""
+) -> list[(str, float)]:
+    """Add and remove session symptoms, then predict cause incrementally."""
+    logger = get_logger()
+    logger.info(
+        "Starting update session",
+        add_symptoms=add_symptoms,
+        remove_symptoms=remove_symptoms,
+    )
+
+    session = State.SESSIONS.get(session_id)
+    if session is None:
+        logger.info("Completed update session - unknown or expired session")
+        return None
+    artefacts = State.ARTEFACTS
+    with session.lock:
+        # start over from the symptoms after the model was reloaded
+        if session.version != artefacts.version:
+            _rebuild_session(artefacts, session)
+
+        # validate arguments
+        symptoms = list(session.symptoms)
+        added_indices = []
+        removed_indices = []
+        for item in _split_symptoms(add_symptoms):
+            item, index, message = _encode_symptom(artefacts, item)
+            if message is not None:
+                logger.error("Completed update session", message=message)
+                raise Exception(message)
+            symptoms.append(item)
+            added_indices.append(index)
+        for item in _split_symptoms(remove_symptoms):
+            item, index, _ = _encode_symptom(artefacts, item)
+            if item not in symptoms:
+                message = f"Error: symptom not in session - {item}"
+                logger.error("Completed update session", message=message)
+                raise Exception(message)
+            symptoms.remove(item)
+            removed_indices.append(index)
+
+        session.symptoms = symptoms
+        session.symptoms_sequence = [
+            artefacts.symptoms_vocabulary[item] for item in symptoms + [session.gender]
+        ]
+        if artefacts.embedding is not None:
+            session.embedding_sum = (
+                session.embedding_sum
+                + artefacts.embedding[added_indices].sum(axis=0)
+                - artefacts.embedding[removed_indices].sum(axis=0)
+            )
+        response = _predict_session(artefacts, session, config.PREDICTION_TOP_K)
+    # refresh the session expiry
+    State.SESSIONS.set(session_id, session)
+    MODEL_VERSION.set(artefacts.version)
+    logger.info("Completed update session", symptoms=len(symptoms))
+
+    return response
+
+
+def delete_session(session_id) -> None:
+    """Delete a session."""
+    State.SESSIONS.delete(session_id)
+
+
+def read_session_statistics() -> dict:
+    """Read session store statistics."""
+    return State.SESSIONS.statistics() if State.SESSIONS is not None else {}
+
+
+def read_cache_statistics() -> dict:
+    """Read prediction cache statistics."""
+    artefacts = State.ARTEFACTS
+    if artefacts is None or artefacts.prediction_cache is None:
+        return {}
+    return {"version": artefacts.version, **artefacts.prediction_cache.statistics()}
+
+
+def _watch() -> None:
+    logger = get_logger()
+
+    while True:
+        time.sleep(config.MODEL_RELOAD_POLL_INTERVAL)
+        if State.ARTEFACTS is None:
+            continue
+        try:
+            reload()
+        except Exception as exception:  # pylint: disable=broad-except
+            # keep serving the current model until the files load again
+            logger.error("Error reloading machine learning", exception=str(exception))
+
+
+def _read_files(
+    model_file=None, symptoms_tokeniser_file=None, causes_tokeniser_file=None
+) -> tuple:
+    files = (
+        model_file or config.MODEL_FILE,
+        symptoms_tokeniser_file or config.SYMPTOMS_TOKENISER_FILE,
+        causes_tokeniser_file or config.CAUSES_TOKENISER_FILE,
+    )
+    if config.MODEL_BACKEND == "tflite":
+        root, _ = os.path.splitext(files[0])
+        files += (f"{root}_{config.MODEL_TFLITE_QUANTISATION}.tflite",)
+    return files
+
+
+def _check_agreement(model, reference_model_file, symptoms_vocabulary_size) -> None:
+    logger = get_logger()
+
+    # compare against the float model read with numpy, without tensorflow
+    reference_model = numpy_model.load_model(reference_model_file)
+    maxlen = int(config.SYMPTOMS_SEQUENCE_MAXLEN)
+    generator = np.random.default_rng(seed=42)
+    symptoms_sequences = [
+        generator.choice(
+            np.arange(1, symptoms_vocabulary_size + 1),
+            size=generator.integers(1, min(maxlen, symptoms_vocabulary_size) + 1),
+            replace=False,
+        )
+        for _ in range(config.MODEL_AGREEMENT_SAMPLES)
+    ]
+    symptoms_padded = numpy_model.pad_sequences(
+        symptoms_sequences,
+        padding=config.SYMPTOMS_SEQUENCE_PADDING_TYPE,
+        maxlen=maxlen,
+    )
+    top_k = config.PREDICTION_TOP_K
+    top_causes = np.argsort(-np.asarray(model.predict(symptoms_padded)), axis=1)
+    reference_top_causes = np.argsort(
+        -np.asarray(reference_model.predict(symptoms_padded)), axis=1
+    )
+    agreement = float(
+        np.mean(
+            [
+                set(causes[:top_k]) == set(reference_causes[:top_k])
+                for causes, reference_causes in zip(top_causes, reference_top_causes)
+            ]
+        )
+    )
+    logger.info("Completed check agreement", top_k=top_k, agreement=agreement)
+    if agreement < config.MODEL_MIN_AGREEMENT:
+        raise Exception(
+            f"Error: top {top_k} agreement with the float model too low - {agreement}"
+        )
+
+
+def _read_files_stamp(files) -> tuple:
+    return tuple((os.stat(file).st_mtime_ns, os.stat(file).st_size) for file in files)
+
+
+def _read_files_version(files) -> str:
+    digest = hashlib.sha256()
+    for file in files:
+        with open(file=file, mode="rb") as artefact_file:
+            digest.update(artefact_file.read())
+    return digest.hexdigest()[:12]
+
+
+def _read_vocabulary(file) -> dict[str, int]:
+    # keep only the word index of a keras tokeniser json, not its word counts
+    with open(file=file, mode="r", encoding="utf-8") as tokeniser_file:
+        tokeniser_config = json.load(tokeniser_file)["config"]
+    return json.loads(tokeniser_config["word_index"])
+
+
+def _encode_symptoms(artefacts, subjective_symptoms, objective_symptoms, gender):
+    symptoms = (
         subjective_symptoms
         + config.SYMPTOMS_SEPARATOR
         + objective_symptoms
         + config.SYMPTOMS_SEPARATOR
         + gender
-    )
-    symptoms_corpus = symptoms_corpus.split(config.SYMPTOMS_SEPARATOR)
-    symptoms_corpus = [str(item).lower().strip() for item in symptoms_corpus]
-    symptoms_corpus = f"{config.SYMPTOMS_SEPARATOR}".join(symptoms_corpus)
+    ).split(config.SYMPTOMS_SEPARATOR)
+    symptoms_sequence = []
+    for item in symptoms:
+        _, index, message = _encode_symptom(artefacts, item)
+        if message is not None:
+            return None, message
+        symptoms_sequence.append(index)
+    return symptoms_sequence, None
 
-    # validate arguments
-    for item in symptoms_corpus.split(config.SYMPTOMS_SEPARATOR):
-        if not item in list(State.SYMPTOMS_TOKENISER.word_index.keys()):
-            message = f"Error: invalid or unknown symptom - {item}"
-            logger.error("Completed predict cause", message=message)
+
+def _encode_symptom(artefacts, item) -> (str, int, str):
+    item = str(item).lower().strip()
+    index = artefacts.symptoms_vocabulary.get(item)
+    if index is None:
+        return item, None, f"Error: invalid or unknown symptom - {item}"
+    return item, index, None
+
+
+def _split_symptoms(symptoms) -> list[str]:
+    return [
+        item
+        for item in str(symptoms or "").split(config.SYMPTOMS_SEPARATOR)
+        if item.strip() != ""
+    ]
+
+
+def _split_genders() -> set[str]:
+    return {
+        item.lower().strip()
+        for item in config.GENDERS.split(config.SYMPTOMS_SEPARATOR)
+        if item.strip() != ""
+    }
+
+
+def _rebuild_session(artefacts, session) -> None:
+    symptoms_sequence = []
+    for item in session.symptoms + [session.gender]:
+        _, index, message = _encode_symptom(artefacts, item)
+        if message is not None:
             raise Exception(message)
+        symptoms_sequence.append(index)
+    session.symptoms_sequence = symptoms_sequence
+    session.embedding_sum = (
+        artefacts.embedding[symptoms_sequence].sum(axis=0)
+        if artefacts.embedding is not None
+        else None
+    )
+    session.version = artefacts.version
+
+
+def _predict_session(artefacts, session, top_k) -> list[(str, float)]:
+    symptoms_sequence = session.symptoms_sequence
+    embedding_sum = session.embedding_sum
+    maxlen = int(config.SYMPTOMS_SEQUENCE_MAXLEN)
+
+    def compute():
+        if artefacts.head is None or len(symptoms_sequence) > maxlen:
+            return tuple(_run_model(artefacts, [symptoms_sequence], top_k)[0])
+        # average over maxlen positions, as padding embeddings are averaged too
+        pooled = (
+            embedding_sum + (maxlen - len(symptoms_sequence)) * artefacts.embedding[0]
+        ) / maxlen
+        causes_probabilities = artefacts.head.predict(pooled[np.newaxis])
+        return tuple(_rank_causes(artefacts, causes_probabilities, top_k)[0])
+
+    if artefacts.prediction_cache is None:
+        return list(compute())
+    return list(
+        artefacts.prediction_cache.get_or_set(
+            _cache_key(symptoms_sequence, top_k), compute
+        )
+    )
+
+
+def _predict_sequences(
+    artefacts, symptoms_sequences, top_k
+) -> list[list[(str, float)]]:
+    cache = artefacts.prediction_cache
+    if cache is None:
+        return _run_model(artefacts, symptoms_sequences, top_k)
+
+    if len(symptoms_sequences) == 1:
+        ranking = cache.get_or_set(
+            _cache_key(symptoms_sequences[0], top_k),
+            lambda: tuple(_run_model(artefacts, symptoms_sequences, top_k)[0]),
+        )
+        return [list(ranking)]
+
+    rankings = [cache.get(_cache_key(item, top_k)) for item in symptoms_sequences]
+    missing = [index for index, ranking in enumerate(rankings) if ranking is None]
+    if len(missing) > 0:
+        computed = _run_model(
+            artefacts, [symptoms_sequences[index] for index in missing], top_k
+        )
+        for index, ranking in zip(missing, computed):
+            rankings[index] = tuple(ranking)
+            cache.set(_cache_key(symptoms_sequences[index], top_k), rankings[index])
+    return [list(ranking) for ranking in rankings]
+
+
+def _cache_key(symptoms_sequence, top_k) -> tuple:
+    # averaged embeddings make the prediction independent of the symptoms order,
+    # unless the sequence is longer than maxlen and gets truncated
+    if len(symptoms_sequence) <= int(config.SYMPTOMS_SEQUENCE_MAXLEN):
+        symptoms_sequence = sorted(symptoms_sequence)
+    return (tuple(symptoms_sequence), top_k)
 
-    symptoms_sequences = State.SYMPTOMS_TOKENISER.texts_to_sequences([symptoms_corpus])
-    symptoms_padded = tf.keras.preprocessing.sequence.pad_sequences(
+
+def _run_model(artefacts, symptoms_sequences, top_k) -> list[list[(str, float)]]:
+    symptoms_padded = numpy_model.pad_sequences(
         symptoms_sequences,
         padding=config.SYMPTOMS_SEQUENCE_PADDING_TYPE,
         maxlen=config.SYMPTOMS_SEQUENCE_MAXLEN,
     )
-    symptoms_padded = np.array(symptoms_padded)
-
-    causes_probabilities = State.MODEL.predict(symptoms_padded)[0]
-    causes_rankings = np.argsort(causes_probabilities).tolist()
-    response = [
-        # first most probable
-        (
-            State.CAUSES_TOKENISER.index_word[causes_rankings[-1] + 1],
-            round(causes_probabilities[causes_rankings[-1]] * 100, 2),
-        ),
-        # second most probable
-        (
-            State.CAUSES_TOKENISER.index_word[causes_rankings[-2] + 1],
-            round(causes_probabilities[causes_rankings[-2]] * 100, 2),
-        ),
-        # third most probable
-        (
-            State.CAUSES_TOKENISER.index_word[causes_rankings[-3] + 1],
-            round(causes_probabilities[causes_rankings[-3]] * 100, 2),
-        ),
-    ]
-    logger.info("Completed predict cause", subjective_symptom=subjective_symptoms)
+    causes_probabilities = artefacts.model.predict(symptoms_padded)
+    return _rank_causes(artefacts, causes_probabilities, top_k)
 
-    return response
+
+def _rank_causes(artefacts, causes_probabilities, top_k) -> list[list[(str, float)]]:
+    # select the top k causes per row with a partial sort, then order only those
+    causes_probabilities = np.asarray(causes_probabilities)
+    top_k = min(top_k, causes_probabilities.shape[1])
+    candidates = np.argpartition(causes_probabilities, -top_k, axis=1)[:, -top_k:]
+    result = []
+    for probabilities, indices in zip(causes_probabilities, candidates):
+        indices = indices[np.argsort(-probabilities[indices], kind="stable")]
+        result.append(
+            [
+                (
+                    artefacts.causes_vocabulary[index],
+                    round(float(probabilities[index]) * 100, 2),
+                )
+                for index in indices.tolist()
+            ]
+        )
+    return result
@@ -1,8 +1,21 @@
 """ Module for command line interface (cli). """
 
 import os
+from typing import Iterator
 
-from . import config, document_db, lib, machine_learning, oauth2
+from . import (
+    batch_scheduler,
+    config,
+    document_db,
+    embedded_db,
+    encoding,
+    health,
+    lib,
+    machine_learning,
+    model_registry,
+    oauth2,
+    snapshot,
+)
 
 
 def read_all_subjective_symptoms() -> list[str]:
@@ -10,26 +23,127 @@ def read_all_subjective_symptoms() -> list[str]:
     return document_db.read_all_subjective_symptoms()
 
 
+def read_all_serialised(collection) -> bytes:
+    """Read all documents of a reference data collection as json bytes."""
+    return document_db.read_all_serialised(collection)
+
+
+def read_page(collection, limit, after=None, fields=None) -> (list[dict], str):
+    """Read a page of reference data documents, with the id the next page follows."""
+    return document_db.read_page(collection, limit, after, fields)
+
+
+def stream_all(collection, after=None, fields=None, limit=None) -> Iterator[bytes]:
+    """Stream reference data documents as newline delimited json bytes."""
+    return document_db.stream_all(collection, after, fields, limit)
+
+
 def read_all_objective_symptoms() -> list[str]:
     """Read all objective symptoms."""
     return document_db.read_all_objective_symptoms()
 
 
 def predict_cause(
-    subjective_symptoms, objective_symptoms, gender
+    subjective_symptoms, objective_symptoms, gender, model_name=None
 ) -> list[(str, float)]:
     """Predict cause from symptoms."""
-    return machine_learning.predict_cause(
-        subjective_symptoms, objective_symptoms, gender
+
+    def predict(artefacts):
+        # only the default model is served through the micro-batches
+        if config.BATCHING_ENABLED and artefacts is None:
+            return batch_scheduler.predict_cause(
+                subjective_symptoms, objective_symptoms, gender
+            )
+        return machine_learning.predict_cause(
+            subjective_symptoms, objective_symptoms, gender, artefacts
+        )
+
+    return model_registry.predict(predict, model_name)
+
+
+def predict_cause_by_ids(
+    subjective_symptom_ids,
+    objective_symptom_ids,
+    gender,
+    model_name=None,
+    symptoms_by_id=None,
+) -> list[(str, float)]:
+    """Predict cause from symptom ids."""
+    if symptoms_by_id is None:
+        symptoms_by_id = document_db.read_symptoms_by_id()
+    return model_registry.predict(
+        lambda artefacts: machine_learning.predict_cause_by_ids(
+            subjective_symptom_ids,
+            objective_symptom_ids,
+            gender,
+            symptoms_by_id,
+            artefacts,
+        ),
+        model_name,
     )
 
 
+def predict_causes(batch, model_name=None) -> list[dict]:
+    """Predict causes for a batch of symptoms records."""
+    return model_registry.predict(
+        lambda artefacts: machine_learning.predict_causes(batch, artefacts=artefacts),
+        model_name,
+    )
+
+
+def predict_and_prescribe(
+    subjective_symptoms, objective_symptoms, gender, model_name=None
+) -> list[dict]:
+    """Predict cause from symptoms, with the etiology and drugs of each cause."""
+    causes = predict_cause(subjective_symptoms, objective_symptoms, gender, model_name)
+    symptoms_causes = split_causes(causes)
+    return make_prescriptions(
+        causes, symptoms_causes, document_db.read_etiologies_with_drugs(symptoms_causes)
+    )
+
+
+def split_causes(causes) -> list[(str, str)]:
+    """Split predicted cause labels into subjective symptom and cause pairs."""
+    # cause labels are 'subjective symptom|cause', as in the training pipeline
+    return [tuple(label.partition("|")[::2]) for label, _ in causes]
+
+
+def make_prescriptions(causes, symptoms_causes, etiologies) -> list[dict]:
+    """Make predicted causes with the etiology and drugs of each."""
+    return [
+        {
+            "cause": label,
+            "probability": probability,
+            "etiology": etiologies.get((symptom, cause.lower())),
+        }
+        for (label, probability), (symptom, cause) in zip(causes, symptoms_causes)
+    ]
+
+
+def create_prediction_session(gender) -> dict:
+    """Create a session for predicting cause symptom by symptom."""
+    return {"session_id": machine_learning.create_session(gender)}
+
+
+def update_prediction_session(
+    session_id, add_symptoms, remove_symptoms
+) -> list[(str, float)]:
+    """Add and remove session symptoms and predict cause."""
+    return machine_learning.update_session(session_id, add_symptoms, remove_symptoms)
+
+
+def delete_prediction_session(session_id) -> dict:
+    """Delete a prediction session."""
+    machine_learning.delete_session(session_id)
+    return {"session_id": session_id}
+
+
 def read_all_etiologies() -> list[str]:
     """Read all etiologies data."""
     return document_db.read_all_etiologies()
 
 
-def read_etiology(subjective_symptom_id, cause) -> str:
+def read_etiology(subjective_symptom_id, cause) -> dict:
     """Read etiology data by subjective symptom and cause."""
     return document_db.read_etiology(subjective_symptom_id, cause)
 
@@ -39,6 +153,39 @@ def read_drugs(etiology_id) -> list[str]:
     return document_db.read_drugs(etiology_id)
 
 
+def read_drugs_by_etiologies(etiology_ids) -> dict[str, list]:
+    """Read drugs by many etiologies."""
+    return document_db.read_drugs_by_etiologies(etiology_ids)
+
+
+def reload_model() -> dict:
+    """Reload model files if they changed."""
+    return machine_learning.reload()
+
+
+def read_model_version() -> str:
+    """Read the version of the model that served the latest prediction."""
+    return machine_learning.read_model_version()
+
+
+def read_model_name() -> str:
+    """Read the name of the model that served the latest prediction."""
+    return model_registry.read_model_name()
+
+
+def read_metrics() -> dict:
+    """Read runtime metrics."""
+    return {
+        "batching": batch_scheduler.read_statistics(),
+        "response_caches": encoding.read_cache_statistics(),
+        "prediction_cache": machine_learning.read_cache_statistics(),
+        "prediction_sessions": machine_learning.read_session_statistics(),
+        "models": model_registry.read_statistics(),
+        "reference_data": document_db.read_reference_data_statistics(),
+        "token_cache": oauth2.read_token_cache_statistics(),
+    }
+
+
 def get_access_token(authorisation_code) -> str:
     """Get access token using authorisation code."""
     return oauth2.get_access_token(authorisation_code)
@@ -49,11 +196,72 @@ def validate_access_token(token, claims) -> bool:
     return oauth2.validate_access_token(token, claims)
 
 
+def read_liveness() -> dict:
+    """Read liveness status."""
+    return health.read_liveness()
+
+
+def read_readiness() -> (bool, dict):
+    """Read readiness status per subsystem."""
+    return health.read_readiness()
+
+
 def init() -> None:
     """Entry point if called as an executable."""
+    with health.timed_phase("config"):
+        _read_config()
+    with health.timed_phase("logging"):
+        lib.configure_global_logging_level()
+        lib.log_config_settings()
+        encoding.configure()
+        oauth2.configure_token_cache()
+    with health.timed_phase("storage"):
+        if config.STORAGE_BACKEND == "embedded":
+            document_db.configure_storage(
+                embedded_db.Storage(config.STORAGE_DATA_DIRECTORY)
+            )
+        elif config.STORAGE_BACKEND == "snapshot":
+            document_db.configure_storage(
+                snapshot.Storage(config.STORAGE_SNAPSHOT_FILE)
+            )
+        else:
+            document_db.configure_mongodb_client()
+    if config.BATCHING_ENABLED:
+        batch_scheduler.start()
+    if config.MODEL_RELOAD_POLL_INTERVAL > 0:
+        machine_learning.start_watching()
+    if config.CACHE_REFRESH_INTERVAL > 0:
+        oauth2.start_refreshing()
+
+    # load the model and reach the tenant after the port is bound, reporting
+    # readiness once every subsystem has warmed up
+    health.start_warm_up(
+        [
+            ("machine_learning", _warm_up_machine_learning),
+            ("mongodb", _warm_up_mongodb),
+            ("oauth2", oauth2.init_cache_state),
+        ]
+    )
+
+
+def _warm_up_machine_learning() -> None:
+    machine_learning.configure()
+    machine_learning.warm_up()
+    model_registry.configure()
+
+
+def _warm_up_mongodb() -> None:
+    document_db.ping()
+    if config.QUERY_PLAN_CHECK_ENABLED:
+        document_db.check_query_plans()
+    document_db.load_reference_data()
+
+
+def _read_config() -> None:
     cli_args = lib.parse_cli_args()
     config.DEBUG_MODE = cli_args.debug_mode
     config.PORT = cli_args.port
+    config.MODEL_BACKEND = os.environ.get("MODEL_BACKEND", default=config.MODEL_BACKEND)
     config.MODEL_FILE = os.environ.get("MODEL_FILE", default=config.MODEL_FILE)
     config.SYMPTOMS_TOKENISER_FILE = os.environ.get(
         "SYMPTOMS_TOKENISER_FILE", default=config.SYMPTOMS_TOKENISER_FILE
@@ -64,17 +272,147 @@ def init() -> None:
     config.SYMPTOMS_SEPARATOR = os.environ.get(
         "SYMPTOMS_SEPARATOR", default=config.SYMPTOMS_SEPARATOR
     )
+    config.GENDERS = os.environ.get("GENDERS", default=config.GENDERS)
     config.SYMPTOMS_SEQUENCE_PADDING_TYPE = os.environ.get(
         "SYMPTOMS_SEQUENCE_PADDING_TYPE", default=config.SYMPTOMS_SEQUENCE_PADDING_TYPE
     )
     config.SYMPTOMS_SEQUENCE_MAXLEN = os.environ.get(
         "SYMPTOMS_SEQUENCE_MAXLEN", default=config.SYMPTOMS_SEQUENCE_MAXLEN
     )
+    config.MODEL_RELOAD_POLL_INTERVAL = float(
+        os.environ.get(
+            "MODEL_RELOAD_POLL_INTERVAL", default=config.MODEL_RELOAD_POLL_INTERVAL
+        )
+    )
+    config.MODEL_RELOAD_GRACE_PERIOD = float(
+        os.environ.get(
+            "MODEL_RELOAD_GRACE_PERIOD", default=config.MODEL_RELOAD_GRACE_PERIOD
+        )
+    )
+    config.MODEL_TFLITE_QUANTISATION = os.environ.get(
+        "MODEL_TFLITE_QUANTISATION", default=config.MODEL_TFLITE_QUANTISATION
+    )
+    config.MODEL_AGREEMENT_SAMPLES = int(
+        os.environ.get(
+            "MODEL_AGREEMENT_SAMPLES", default=config.MODEL_AGREEMENT_SAMPLES
+        )
+    )
+    config.MODEL_MIN_AGREEMENT = float(
+        os.environ.get("MODEL_MIN_AGREEMENT", default=config.MODEL_MIN_AGREEMENT)
+    )
+    config.INFERENCE_WORKERS = int(
+        os.environ.get("INFERENCE_WORKERS", default=config.INFERENCE_WORKERS)
+    )
+    config.INFERENCE_WORKER_TIMEOUT = float(
+        os.environ.get(
+            "INFERENCE_WORKER_TIMEOUT", default=config.INFERENCE_WORKER_TIMEOUT
+        )
+    )
+    config.PREDICTION_TOP_K = int(
+        os.environ.get("PREDICTION_TOP_K", default=config.PREDICTION_TOP_K)
+    )
+    config.PREDICTION_MAX_BATCH_SIZE = int(
+        os.environ.get(
+            "PREDICTION_MAX_BATCH_SIZE", default=config.PREDICTION_MAX_BATCH_SIZE
+        )
+    )
+    config.PREDICTION_CACHE_MAX_SIZE = int(
+        os.environ.get(
+            "PREDICTION_CACHE_MAX_SIZE", default=config.PREDICTION_CACHE_MAX_SIZE
+        )
+    )
+    config.PREDICTION_CACHE_TIMEOUT = float(
+        os.environ.get(
+            "PREDICTION_CACHE_TIMEOUT", default=config.PREDICTION_CACHE_TIMEOUT
+        )
+    )
+    config.PREDICTION_SESSION_MAX_SIZE = int(
+        os.environ.get(
+            "PREDICTION_SESSION_MAX_SIZE", default=config.PREDICTION_SESSION_MAX_SIZE
+        )
+    )
+    config.PREDICTION_SESSION_TIMEOUT = float(
+        os.environ.get(
+            "PREDICTION_SESSION_TIMEOUT", default=config.PREDICTION_SESSION_TIMEOUT
+        )
+    )
+    config.BATCHING_ENABLED = (
+        os.environ.get("BATCHING_ENABLED", default=str(config.BATCHING_ENABLED)).lower()
+        == "true"
+    )
+    config.BATCHING_MAX_WAIT_MS = float(
+        os.environ.get("BATCHING_MAX_WAIT_MS", default=config.BATCHING_MAX_WAIT_MS)
+    )
+    config.BATCHING_MAX_BATCH_SIZE = int(
+        os.environ.get(
+            "BATCHING_MAX_BATCH_SIZE", default=config.BATCHING_MAX_BATCH_SIZE
+        )
+    )
+    config.BATCHING_TIMEOUT = float(
+        os.environ.get("BATCHING_TIMEOUT", default=config.BATCHING_TIMEOUT)
+    )
+    config.MODEL_NAME = os.environ.get("MODEL_NAME", default=config.MODEL_NAME)
+    config.MODEL_REGISTRY = os.environ.get(
+        "MODEL_REGISTRY", default=config.MODEL_REGISTRY
+    )
+    config.MODEL_SHADOW = os.environ.get("MODEL_SHADOW", default=config.MODEL_SHADOW)
+    config.MODEL_SHADOW_WORKERS = int(
+        os.environ.get("MODEL_SHADOW_WORKERS", default=config.MODEL_SHADOW_WORKERS)
+    )
+    config.MODEL_SHADOW_MAX_PENDING = int(
+        os.environ.get(
+            "MODEL_SHADOW_MAX_PENDING", default=config.MODEL_SHADOW_MAX_PENDING
+        )
+    )
+    config.MODEL_ROUTING_HEADER_KEY = os.environ.get(
+        "MODEL_ROUTING_HEADER_KEY", default=config.MODEL_ROUTING_HEADER_KEY
+    )
+    config.MODEL_LATENCY_SAMPLES = int(
+        os.environ.get("MODEL_LATENCY_SAMPLES", default=config.MODEL_LATENCY_SAMPLES)
+    )
     config.MONGODB_URL = os.environ.get("MONGODB_URL", default=config.MONGODB_URL)
+    config.REFERENCE_DATA_CACHE_TIMEOUT = float(
+        os.environ.get(
+            "REFERENCE_DATA_CACHE_TIMEOUT", default=config.REFERENCE_DATA_CACHE_TIMEOUT
+        )
+    )
+    config.REFERENCE_DATA_VERSION_INTERVAL = float(
+        os.environ.get(
+            "REFERENCE_DATA_VERSION_INTERVAL",
+            default=config.REFERENCE_DATA_VERSION_INTERVAL,
+        )
+    )
+    config.READ_ALL_MAX_LIMIT = int(
+        os.environ.get("READ_ALL_MAX_LIMIT", default=config.READ_ALL_MAX_LIMIT)
+    )
+    config.READ_ALL_BATCH_SIZE = int(
+        os.environ.get("READ_ALL_BATCH_SIZE", default=config.READ_ALL_BATCH_SIZE)
+    )
+    config.QUERY_PLAN_CHECK_ENABLED = (
+        os.environ.get(
+            "QUERY_PLAN_CHECK_ENABLED", default=str(config.QUERY_PLAN_CHECK_ENABLED)
+        ).lower()
+        == "true"
+    )
+    config.STORAGE_BACKEND = os.environ.get(
+        "STORAGE_BACKEND", default=config.STORAGE_BACKEND
+    )
+    config.STORAGE_DATA_DIRECTORY = os.environ.get(
+        "STORAGE_DATA_DIRECTORY", default=config.STORAGE_DATA_DIRECTORY
+    )
+    config.STORAGE_SNAPSHOT_FILE = os.environ.get(
+        "STORAGE_SNAPSHOT_FILE", default=config.STORAGE_SNAPSHOT_FILE
+    )
     config.WEB_REQUEST_TIMEOUT = os.environ.get(
         "WEB_REQUEST_TIMEOUT", default=config.WEB_REQUEST_TIMEOUT
     )
     config.CACHE_TIMEOUT = os.environ.get("CACHE_TIMEOUT", default=config.CACHE_TIMEOUT)
+    config.CACHE_REFRESH_INTERVAL = float(
+        os.environ.get("CACHE_REFRESH_INTERVAL", default=config.CACHE_REFRESH_INTERVAL)
+    )
+    config.TOKEN_CACHE_MAX_SIZE = int(
+        os.environ.get("TOKEN_CACHE_MAX_SIZE", default=config.TOKEN_CACHE_MAX_SIZE)
+    )
     config.TENANT_DOMAIN = os.environ.get("TENANT_DOMAIN", default=config.TENANT_DOMAIN)
     config.TENANT_OPENID_CONFIGURATION_CACHE_KEY = os.environ.get(
         "TENANT_OPENID_CONFIGURATION_CACHE_KEY",
@@ -86,14 +424,29 @@ def init() -> None:
     config.REDIRECT_URL = os.environ.get("REDIRECT_URL", default=config.REDIRECT_URL)
     config.CLIENT_ID = os.environ.get("CLIENT_ID", default=config.CLIENT_ID)
     config.CLIENT_SECRET = os.environ.get("CLIENT_SECRET", default=config.CLIENT_SECRET)
-
-    lib.configure_global_logging_level()
-    lib.log_config_settings()
-
-    machine_learning.configure()
-    document_db.configure_mongodb_client()
-    # mongodb.log_mongodb_status()
-    oauth2.init_cache_state()
+    config.WARM_UP_RETRY_INTERVAL = float(
+        os.environ.get("WARM_UP_RETRY_INTERVAL", default=config.WARM_UP_RETRY_INTERVAL)
+    )
+    config.ASGI_INFERENCE_THREADS = int(
+        os.environ.get("ASGI_INFERENCE_THREADS", default=config.ASGI_INFERENCE_THREADS)
+    )
+    config.RESPONSE_COMPRESSION_MIN_SIZE = int(
+        os.environ.get(
+            "RESPONSE_COMPRESSION_MIN_SIZE",
+            default=config.RESPONSE_COMPRESSION_MIN_SIZE,
+        )
+    )
+    config.RESPONSE_COMPRESSION_LEVEL = int(
+        os.environ.get(
+            "RESPONSE_COMPRESSION_LEVEL", default=config.RESPONSE_COMPRESSION_LEVEL
+        )
+    )
+    config.RESPONSE_COMPRESSION_CACHE_MAX_SIZE = int(
+        os.environ.get(
+            "RESPONSE_COMPRESSION_CACHE_MAX_SIZE",
+            default=config.RESPONSE_COMPRESSION_CACHE_MAX_SIZE,
+        )
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,10 @@
+import reference_data_version
+from mongodb_migrations.base import BaseMigration
+
+
+class Migration(BaseMigration):
+    def upgrade(self):
+        reference_data_version.write(self.db, "20221001000000")
+
+    def downgrade(self):
+        reference_data_version.delete(self.db)
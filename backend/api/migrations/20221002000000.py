@@ -0,0 +1,16 @@
+from mongodb_migrations.base import BaseMigration
+from pymongo import ASCENDING
+
+
+class Migration(BaseMigration):
+    def upgrade(self):
+        # serve 'read_etiology' and 'read_drugs' lookups without collection scans
+        self.db.etiologies.create_index(
+            [("subjective_symptom_id", ASCENDING), ("cause", ASCENDING)],
+            name="subjective_symptom_id_cause",
+        )
+        self.db.drugs.create_index([("etiology_id", ASCENDING)], name="etiology_id")
+
+    def downgrade(self):
+        self.db.drugs.drop_index("etiology_id")
+        self.db.etiologies.drop_index("subjective_symptom_id_cause")
@@ -0,0 +1,21 @@
+import bulk_loader
+import reference_data_version
+from mongodb_migrations.base import BaseMigration
+
+COLLECTIONS = ["subjective_symptoms", "objective_symptoms", "etiologies", "drugs"]
+
+
+class Migration(BaseMigration):
+    def upgrade(self):
+        # the data of 20220901000000 again, streamed into staging collections and
+        # swapped in with their indexes, the way later data migrations load
+        path = "./api/migrations/data/20220901000000"
+        for collection in COLLECTIONS:
+            bulk_loader.load(self.db, collection, f"{path}/{collection}.json")
+        bulk_loader.swap(self.db, COLLECTIONS)
+        # only after the last swap, so backend api caches load all collections again
+        reference_data_version.write(self.db, "20221003000000")
+
+    def downgrade(self):
+        # the same data stays, under the version it had before
+        reference_data_version.write(self.db, "20221001000000")
@@ -0,0 +1,82 @@
+""" Module for streaming data files into staging collections and swapping them in. """
+
+import json
+import os
+
+from bson import json_util
+
+# documents per unordered insert, so memory stays flat whatever the file size
+BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", default=1000))
+# characters read from a data file at a time
+CHUNK_SIZE = 65536
+STAGING_SUFFIX = "_staging"
+
+
+def iter_documents(path, chunk_size=CHUNK_SIZE):
+    """Iterate the documents of a json array file of extended json, one at a time."""
+    decoder = json.JSONDecoder(object_pairs_hook=json_util.object_pairs_hook)
+    with open(path, "r") as file:
+        buffer = ""
+        position = 0
+        end_of_file = False
+        while True:
+            # skip the array brackets and the commas between documents
+            while position < len(buffer) and buffer[position] in "[], \t\r\n":
+                position += 1
+            if position < len(buffer):
+                try:
+                    document, position = decoder.raw_decode(buffer, position)
+                    yield document
+                    continue
+                except json.JSONDecodeError:
+                    # a document cut by the chunk end, unless the file ended
+                    if end_of_file:
+                        raise
+            elif end_of_file:
+                return
+            chunk = file.read(chunk_size)
+            end_of_file = chunk == ""
+            buffer = buffer[position:] + chunk
+            position = 0
+
+
+def load(database, collection, path, batch_size=BATCH_SIZE) -> int:
+    """Load a data file into the staging collection of a collection, in batches."""
+    staging = database[f"{collection}{STAGING_SUFFIX}"]
+    # leftovers of a failed run
+    staging.drop()
+    count = 0
+    batch = []
+    for document in iter_documents(path):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            staging.insert_many(batch, ordered=False)
+            count += len(batch)
+            batch = []
+    if len(batch) > 0:
+        staging.insert_many(batch, ordered=False)
+        count += len(batch)
+    if count == 0:
+        # inserts create the collection, an empty file still needs one to swap in
+        database.create_collection(f"{collection}{STAGING_SUFFIX}")
+    return count
+
+
+def swap(database, collections) -> None:
+    """Replace collections with their staging collections, keeping their indexes.
+
+    Each rename replaces one collection at once, but the swap is not atomic
+    across collections: until the last rename, readers may see new data in some
+    collections and old data in others. Write the reference data version only
+    after this returns, so backend api caches load again once all are swapped.
+    """
+    existing_collections = database.list_collection_names()
+    for collection in collections:
+        staging = database[f"{collection}{STAGING_SUFFIX}"]
+        if collection in existing_collections:
+            for name, index in database[collection].index_information().items():
+                if name != "_id_":
+                    staging.create_index(
+                        index["key"], name=name, unique=index.get("unique", False)
+                    )
+        staging.rename(collection, dropTarget=True)
@@ -0,0 +1,21 @@
+""" Module for the reference data version marker written by migrations. """
+
+from datetime import datetime, timezone
+
+# read by the backend api, see 'api/document_db.py'
+COLLECTION = "reference_data_version"
+ID = "reference_data"
+
+
+def write(database, version) -> None:
+    """Write the reference data version, so backend api caches load it again."""
+    database[COLLECTION].replace_one(
+        {"_id": ID},
+        {"_id": ID, "version": version, "updated_at": datetime.now(timezone.utc)},
+        upsert=True,
+    )
+
+
+def delete(database) -> None:
+    """Delete the reference data version."""
+    database[COLLECTION].delete_one({"_id": ID})
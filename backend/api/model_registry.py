@@ -0,0 +1,217 @@
+""" Module for serving several named models with a/b and shadow routing. """
+
+import contextvars
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+from structlog import get_logger
+
+from . import config, machine_learning
+
+# name of the model that served the latest prediction in the current context
+MODEL_NAME = contextvars.ContextVar("MODEL_NAME", default=None)
+
+
+@dataclass(init=True)
+class State:
+    """Class for storing state."""
+
+    MODELS = {}
+    WEIGHTS = {}
+    LOCK = threading.Lock()
+    STATISTICS = {}
+    SHADOW_EXECUTOR = None
+    SHADOW_SLOTS = None
+
+
+def configure() -> None:
+    """Configure named candidate models alongside the default model."""
+    logger = get_logger()
+
+    logger.info("Starting configure model registry")
+    registry = json.loads(config.MODEL_REGISTRY) if config.MODEL_REGISTRY else {}
+    models = {}
+    weights = {}
+    for name, entry in registry.items():
+        artefacts = machine_learning.load_artefacts(
+            entry["model_file"],
+            entry["symptoms_tokeniser_file"],
+            entry["causes_tokeniser_file"],
+        )
+        machine_learning.warm_up(artefacts)
+        models[name] = artefacts
+        weights[name] = float(entry.get("weight", 0))
+    if sum(weights.values()) > 1:
+        raise Exception("Error: model registry weights add up to more than 1")
+    if config.MODEL_SHADOW and config.MODEL_SHADOW not in models:
+        raise Exception(f"Error: unknown shadow model - {config.MODEL_SHADOW}")
+    # the default model keeps the share of traffic not routed to a candidate
+    weights[config.MODEL_NAME] = 1 - sum(weights.values())
+    State.MODELS = models
+    State.WEIGHTS = weights
+    if config.MODEL_SHADOW and State.SHADOW_EXECUTOR is None:
+        State.SHADOW_EXECUTOR = ThreadPoolExecutor(
+            max_workers=config.MODEL_SHADOW_WORKERS, thread_name_prefix="shadow"
+        )
+        State.SHADOW_SLOTS = threading.BoundedSemaphore(config.MODEL_SHADOW_MAX_PENDING)
+    logger.info(
+        "Completed configure model registry",
+        weights=weights,
+        shadow=config.MODEL_SHADOW,
+    )
+
+
+def predict(predict_function, model_name=None):
+    """Predict with the requested or a weighted random model, shadowing if set.
+
+    The predict function is called with the artefacts of the selected model,
+    or None for the default model.
+    """
+    name = _select(model_name)
+    artefacts = State.MODELS.get(name)
+    started_at = time.perf_counter()
+    try:
+        result = predict_function(artefacts)
+    except Exception:
+        _record(name, time.perf_counter() - started_at, error=True)
+        raise
+    _record(name, time.perf_counter() - started_at)
+    MODEL_NAME.set(name)
+
+    if config.MODEL_SHADOW and name != config.MODEL_SHADOW:
+        _submit_shadow(predict_function, result)
+
+    return result
+
+
+def read_model_name() -> str:
+    """Read the name of the model that served the latest prediction."""
+    return MODEL_NAME.get() or config.MODEL_NAME
+
+
+def read_statistics() -> dict:
+    """Read per model latency and shadow agreement statistics."""
+    with State.LOCK:
+        statistics = {
+            name: {
+                key: (list(value) if isinstance(value, deque) else value)
+                for key, value in model_statistics.items()
+            }
+            for name, model_statistics in State.STATISTICS.items()
+        }
+    result = {}
+    for name, model_statistics in statistics.items():
+        latencies = model_statistics.pop("latencies_ms")
+        if len(latencies) > 0:
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+            model_statistics["latency_ms"] = {"p50": p50, "p95": p95, "p99": p99}
+        if model_statistics.get("shadow_comparisons", 0) > 0:
+            model_statistics["top1_agreement_rate"] = (
+                model_statistics["top1_agreements"]
+                / model_statistics["shadow_comparisons"]
+            )
+            model_statistics["mean_topk_overlap"] = (
+                model_statistics.pop("total_topk_overlap")
+                / model_statistics["shadow_comparisons"]
+            )
+        model_statistics.pop("total_topk_overlap", None)
+        model_statistics["weight"] = State.WEIGHTS.get(name, 0.0)
+        result[name] = model_statistics
+    return result
+
+
+def _select(model_name) -> str:
+    if model_name == config.MODEL_NAME or model_name in State.MODELS:
+        return model_name
+    if len(State.MODELS) == 0:
+        return config.MODEL_NAME
+    names = list(State.WEIGHTS.keys())
+    return random.choices(names, weights=list(State.WEIGHTS.values()))[0]
+
+
+def _submit_shadow(predict_function, primary_result) -> None:
+    # drop the shadow prediction rather than queue without bound under load
+    if not State.SHADOW_SLOTS.acquire(blocking=False):
+        _record_shadow(config.MODEL_SHADOW, dropped=True)
+        return
+    try:
+        State.SHADOW_EXECUTOR.submit(
+            _run_shadow, predict_function, primary_result
+        ).add_done_callback(lambda _: State.SHADOW_SLOTS.release())
+    except RuntimeError:
+        State.SHADOW_SLOTS.release()
+
+
+def _run_shadow(predict_function, primary_result) -> None:
+    logger = get_logger()
+
+    name = config.MODEL_SHADOW
+    started_at = time.perf_counter()
+    try:
+        shadow_result = predict_function(State.MODELS[name])
+    except Exception as exception:  # pylint: disable=broad-except
+        logger.error("Error in shadow prediction", model=name, exception=str(exception))
+        _record(name, time.perf_counter() - started_at, error=True)
+        return
+    _record(name, time.perf_counter() - started_at)
+    for primary, shadow in zip(_rankings(primary_result), _rankings(shadow_result)):
+        if primary is None or shadow is None or len(primary) == 0:
+            continue
+        primary_causes = {cause for cause, _ in primary}
+        shadow_causes = {cause for cause, _ in shadow}
+        _record_shadow(
+            name,
+            top1_agreement=primary[0][0] == shadow[0][0],
+            topk_overlap=len(primary_causes & shadow_causes) / len(primary_causes),
+        )
+
+
+def _rankings(result) -> list:
+    # a batch result is a list of records, a single result is one ranking
+    if len(result) > 0 and isinstance(result[0], dict):
+        return [record.get("causes") for record in result]
+    return [result]
+
+
+def _record(name, duration, error=False) -> None:
+    with State.LOCK:
+        statistics = _get_statistics(name)
+        statistics["requests"] += 1
+        statistics["errors"] += 1 if error else 0
+        statistics["latencies_ms"].append(duration * 1000)
+
+
+def _record_shadow(name, dropped=False, top1_agreement=False, topk_overlap=0.0):
+    with State.LOCK:
+        statistics = _get_statistics(name)
+        if dropped:
+            statistics["shadow_dropped"] += 1
+            return
+        statistics["shadow_comparisons"] += 1
+        statistics["top1_agreements"] += 1 if top1_agreement else 0
+        statistics["total_topk_overlap"] += topk_overlap
+
+
+def _get_statistics(name) -> dict:
+    if name not in State.STATISTICS:
+        State.STATISTICS[name] = {
+            "requests": 0,
+            "errors": 0,
+            "latencies_ms": deque(maxlen=config.MODEL_LATENCY_SAMPLES),
+        }
+        if name == config.MODEL_SHADOW:
+            State.STATISTICS[name].update(
+                {
+                    "shadow_comparisons": 0,
+                    "shadow_dropped": 0,
+                    "top1_agreements": 0,
+                    "total_topk_overlap": 0.0,
+                }
+            )
+    return State.STATISTICS[name]
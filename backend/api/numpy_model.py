@@ -0,0 +1,200 @@
+""" Module for numpy based model inference without tensorflow. """
+
+import argparse
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+
+SUPPORTED_ACTIVATIONS = {
+    "linear": lambda values: values,
+    "relu": lambda values: np.maximum(values, 0),
+    "sigmoid": lambda values: 1 / (1 + np.exp(-values)),
+    "tanh": np.tanh,
+    "softmax": lambda values: _softmax(values),
+}
+
+
+@dataclass(init=True)
+class Layer:
+    """Class for a model layer and its weights."""
+
+    class_name: str
+    activation: str = None
+    weights: list = field(default_factory=list)
+
+
+class Model:
+    """Class for running an embedding, pooling and dense layers model with numpy."""
+
+    def __init__(self, layers) -> None:
+        self.layers = layers
+
+    def predict(self, inputs) -> np.ndarray:
+        """Predict output probabilities for a batch of padded sequences."""
+        values = np.asarray(inputs)
+        for layer in self.layers:
+            if layer.class_name == "Embedding":
+                values = layer.weights[0][values.astype(np.int64)]
+            elif layer.class_name == "GlobalAveragePooling1D":
+                values = values.mean(axis=1)
+            elif layer.class_name == "Dense":
+                values = values @ layer.weights[0]
+                if len(layer.weights) > 1:
+                    values = values + layer.weights[1]
+                values = SUPPORTED_ACTIVATIONS[layer.activation](values)
+        return values
+
+
+def from_keras(model) -> Model:
+    """Copy the layers and weights of a keras model, or return a numpy model as is."""
+    if isinstance(model, Model):
+        return model
+    return Model(
+        [
+            _make_layer(
+                layer.__class__.__name__, layer.get_config(), layer.get_weights()
+            )
+            for layer in model.layers
+            if layer.__class__.__name__ != "InputLayer"
+        ]
+    )
+
+
+def split_embedding(model) -> (np.ndarray, Model):
+    """Split a keras or numpy model into its embedding matrix and dense head.
+
+    Returns None for both if the model does not start with averaged embeddings.
+    """
+    model = from_keras(model)
+    if [layer.class_name for layer in model.layers[:2]] != [
+        "Embedding",
+        "GlobalAveragePooling1D",
+    ]:
+        return None, None
+    return model.layers[0].weights[0], Model(model.layers[2:])
+
+
+def pad_sequences(sequences, padding, maxlen, truncating="pre") -> np.ndarray:
+    """Pad sequences to the same length, same as keras 'pad_sequences'."""
+    maxlen = (
+        int(maxlen)
+        if maxlen is not None
+        else max((len(sequence) for sequence in sequences), default=0)
+    )
+    result = np.zeros((len(sequences), maxlen), dtype=np.int32)
+    for row, sequence in enumerate(sequences):
+        if len(sequence) == 0 or maxlen == 0:
+            continue
+        sequence = sequence[-maxlen:] if truncating == "pre" else sequence[:maxlen]
+        if padding == "pre":
+            result[row, -len(sequence) :] = sequence
+        else:
+            result[row, : len(sequence)] = sequence
+    return result
+
+
+def load_model(file) -> Model:
+    """Load model from a keras h5 file or an exported numpy weights file."""
+    if str(file).endswith(".npz"):
+        return _load_npz(file)
+    return _load_h5(file)
+
+
+def save_model(model, file) -> None:
+    """Export model layers and weights to a numpy weights file."""
+    arrays = {
+        "layers": np.array(
+            json.dumps(
+                [
+                    {"class_name": layer.class_name, "activation": layer.activation}
+                    for layer in model.layers
+                ]
+            )
+        )
+    }
+    for layer_index, layer in enumerate(model.layers):
+        for weight_index, weight in enumerate(layer.weights):
+            arrays[f"layer_{layer_index}_weight_{weight_index}"] = weight
+    np.savez(file, **arrays)
+
+
+def _load_h5(file) -> Model:
+    # pylint: disable=import-outside-toplevel
+    import h5py
+
+    with h5py.File(file, mode="r") as h5_file:
+        model_config = h5_file.attrs["model_config"]
+        model_config = json.loads(
+            model_config.decode("utf-8")
+            if isinstance(model_config, bytes)
+            else model_config
+        )
+        weights_group = h5_file["model_weights"]
+        layers = []
+        for layer_config in model_config["config"]["layers"]:
+            class_name = layer_config["class_name"]
+            if class_name == "InputLayer":
+                continue
+            name = layer_config["config"]["name"]
+            weights = []
+            if name in weights_group:
+                layer_group = weights_group[name]
+                weights = [
+                    np.asarray(
+                        layer_group[
+                            (
+                                weight_name.decode("utf-8")
+                                if isinstance(weight_name, bytes)
+                                else weight_name
+                            )
+                        ]
+                    )
+                    for weight_name in layer_group.attrs["weight_names"]
+                ]
+            layers.append(_make_layer(class_name, layer_config["config"], weights))
+
+    return Model(layers)
+
+
+def _load_npz(file) -> Model:
+    with np.load(file, allow_pickle=False) as arrays:
+        layers = []
+        for layer_index, layer_config in enumerate(json.loads(str(arrays["layers"]))):
+            weights = []
+            while f"layer_{layer_index}_weight_{len(weights)}" in arrays:
+                weights.append(arrays[f"layer_{layer_index}_weight_{len(weights)}"])
+            layers.append(
+                _make_layer(layer_config["class_name"], layer_config, weights)
+            )
+
+    return Model(layers)
+
+
+def _make_layer(class_name, layer_config, weights) -> Layer:
+    if class_name not in ["Embedding", "GlobalAveragePooling1D", "Dense"]:
+        raise Exception(f"Error: unsupported layer for numpy model - {class_name}")
+    if class_name == "Embedding" and layer_config.get("mask_zero", False):
+        raise Exception("Error: unsupported masked embedding for numpy model")
+    activation = layer_config.get("activation")
+    if class_name == "Dense" and activation not in SUPPORTED_ACTIVATIONS:
+        raise Exception(f"Error: unsupported activation for numpy model - {activation}")
+    return Layer(class_name=class_name, activation=activation, weights=weights)
+
+
+def _softmax(values) -> np.ndarray:
+    exponents = np.exp(values - values.max(axis=-1, keepdims=True))
+    return exponents / exponents.sum(axis=-1, keepdims=True)
+
+
+def main() -> None:
+    """Entry point to export a keras h5 model as a numpy weights file."""
+    parser = argparse.ArgumentParser(description="Export model weights for numpy")
+    parser.add_argument("model_file", help="Keras h5 model file to read")
+    parser.add_argument("weights_file", help="Numpy weights file (.npz) to write")
+    args = parser.parse_args()
+    save_model(load_model(args.model_file), args.weights_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 """ Module for OAuth2. """
 
 from dataclasses import dataclass
+import hashlib
 import json
+import threading
+import time
 
 import requests
 from cache3 import SafeCache
@@ -10,6 +13,7 @@ from oauthlib import oauth2
 from structlog import get_logger
 
 from . import config
+from .lru_cache import LRUCache
 
 
 @dataclass(init=True)
@@ -19,6 +23,29 @@ class State:
     CACHE = None
     TOKEN_URL = None
     JWKS = None
+    JWKS_SOURCE = None
+    TOKEN_CACHE = None
+    LOCK = threading.Lock()
+    REFRESHER = None
+    REFRESH_TRIED_AT = None
+
+
+@dataclass(init=True)
+class VerifiedToken:
+    """Class for the claims of an access token with a verified signature."""
+
+    claims: dict
+    scope: frozenset
+    expires_at: float
+
+
+def configure_token_cache() -> None:
+    """Configure the cache of verified access tokens, by token digest."""
+    State.TOKEN_CACHE = (
+        LRUCache(max_size=config.TOKEN_CACHE_MAX_SIZE, timeout=None)
+        if config.TOKEN_CACHE_MAX_SIZE > 0
+        else None
+    )
 
 
 def init_cache_state() -> None:
@@ -26,51 +53,109 @@ def init_cache_state() -> None:
     logger = get_logger()
 
     logger.info("Starting init cache and state")
-
-    if State.CACHE is not None:
-        State.CACHE.clear()
-
-    State.CACHE = SafeCache()
-    State.CACHE.timeout = config.CACHE_TIMEOUT
-
-    response = requests.get(
+    openid_configuration = requests.get(
         f"https://{config.TENANT_DOMAIN}/.well-known/openid-configuration",
         timeout=config.WEB_REQUEST_TIMEOUT,
-    )
-    State.CACHE.set(
-        key=config.TENANT_OPENID_CONFIGURATION_CACHE_KEY, value=response.json()
-    )
-    State.TOKEN_URL = State.CACHE.get(config.TENANT_OPENID_CONFIGURATION_CACHE_KEY)[
-        "token_endpoint"
-    ]
+    ).json()
     response = requests.get(
-        State.CACHE.get(config.TENANT_OPENID_CONFIGURATION_CACHE_KEY)["jwks_uri"],
-        timeout=config.WEB_REQUEST_TIMEOUT,
+        openid_configuration["jwks_uri"], timeout=config.WEB_REQUEST_TIMEOUT
     )
-    State.JWKS = jwk.JWKSet.from_json(keyset=response.content)
+    set_tenant_configuration(openid_configuration, response.content)
+
+    logger.info("Completed init cache and state")
+
+
+def set_tenant_configuration(openid_configuration, jwks) -> None:
+    """Set the tenant openid configuration and json web key set in the cache."""
+    logger = get_logger()
+
+    # a new cache swapped in whole, so readers never see an empty one
+    cache = SafeCache()
+    cache.timeout = config.CACHE_TIMEOUT
+    cache.set(
+        key=config.TENANT_OPENID_CONFIGURATION_CACHE_KEY, value=openid_configuration
+    )
+    State.CACHE = cache
+    State.TOKEN_URL = openid_configuration["token_endpoint"]
+    State.JWKS = jwk.JWKSet.from_json(keyset=jwks)
+    if State.TOKEN_CACHE is not None and jwks != State.JWKS_SOURCE:
+        # the keys changed, so tokens are verified again
+        State.TOKEN_CACHE.clear()
+    State.JWKS_SOURCE = jwks
 
     logger.debug(
         "Initialised cache and state with tenant configuration",
-        TENANT_OPENID_CONFIGURATION=State.CACHE.get(
-            config.TENANT_OPENID_CONFIGURATION_CACHE_KEY
-        ),
+        TENANT_OPENID_CONFIGURATION=openid_configuration,
         TOKEN_URL=State.TOKEN_URL,
         JWKS=State.JWKS,
     )
 
-    logger.info("Completed init cache and state")
-
 
 def check_cache() -> None:
-    """Check cache for expiration and initialise if yes."""
+    """Check cache for expiration, serving the current keys while renewing them."""
     logger = get_logger()
 
     logger.info("Starting check cache")
-    if not State.CACHE.has_key(config.TENANT_OPENID_CONFIGURATION_CACHE_KEY):
-        init_cache_state()
+    if State.JWKS is None:
+        # nothing to serve yet, so the first load waits, once for all requests
+        with State.LOCK:
+            if State.JWKS is None:
+                init_cache_state()
+    elif is_refresh_due() and State.LOCK.acquire(blocking=False):
+        try:
+            # marked as tried before the thread starts, so a burst starts one
+            if is_refresh_due():
+                State.REFRESH_TRIED_AT = time.monotonic()
+                threading.Thread(
+                    target=refresh_cache_state, name="tenant-refresh", daemon=True
+                ).start()
+        finally:
+            State.LOCK.release()
     logger.info("Completed check cache")
 
 
+def refresh_cache_state() -> bool:
+    """Renew cache and state unless a renewal runs, keeping them if it fails."""
+    logger = get_logger()
+
+    if not State.LOCK.acquire(blocking=False):
+        return False
+    try:
+        State.REFRESH_TRIED_AT = time.monotonic()
+        init_cache_state()
+        return True
+    except Exception as exception:  # pylint: disable=broad-except
+        logger.error(
+            "Error refreshing tenant configuration, serving the current keys",
+            exception=str(exception),
+        )
+        return False
+    finally:
+        State.LOCK.release()
+
+
+def is_refresh_due() -> bool:
+    """Check the tenant configuration expired and no renewal was tried lately."""
+    if State.CACHE is not None and State.CACHE.has_key(
+        config.TENANT_OPENID_CONFIGURATION_CACHE_KEY
+    ):
+        return False
+    return (
+        State.REFRESH_TRIED_AT is None
+        or time.monotonic() - State.REFRESH_TRIED_AT >= config.WARM_UP_RETRY_INTERVAL
+    )
+
+
+def start_refreshing() -> None:
+    """Start renewing the tenant configuration in the background before it expires."""
+    if State.REFRESHER is not None:
+        return
+    State.REFRESHER = threading.Thread(
+        target=_refresh, name="tenant-refresher", daemon=True
+    )
+    State.REFRESHER.start()
+
+
 def get_access_token(authorisation_code) -> str:
     """Get access token using authorisation code."""
     logger = get_logger()
@@ -82,14 +167,7 @@ def get_access_token(authorisation_code) -> str:
 
     check_cache()
 
-    client = oauth2.WebApplicationClient(
-        client_id=config.CLIENT_ID, code=authorisation_code
-    )
-    request = client.prepare_token_request(
-        token_url=State.TOKEN_URL,
-        redirect_url=config.REDIRECT_URL,
-        client_secret=config.CLIENT_SECRET,
-    )
+    request = prepare_token_request(authorisation_code)
     response = requests.post(
         url=request[0],
         headers=request[1],
@@ -101,6 +179,18 @@ def get_access_token(authorisation_code) -> str:
     return response.text
 
 
+def prepare_token_request(authorisation_code) -> (str, dict, str):
+    """Prepare the url, headers and body of the tenant token request."""
+    client = oauth2.WebApplicationClient(
+        client_id=config.CLIENT_ID, code=authorisation_code
+    )
+    return client.prepare_token_request(
+        token_url=State.TOKEN_URL,
+        redirect_url=config.REDIRECT_URL,
+        client_secret=config.CLIENT_SECRET,
+    )
+
+
 def validate_access_token(token, asserted_claims) -> bool:
     """Validate access token and verify claims."""
     logger = get_logger()
@@ -121,22 +211,75 @@ def validate_access_token(token, asserted_claims) -> bool:
 
     check_cache()
 
+    return verify_access_token(token, asserted_claims)
+
+
+def verify_access_token(token, asserted_claims) -> bool:
+    """Verify access token signature with the cached keys and verify claims."""
+    logger = get_logger()
+
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    verified_token = (
+        State.TOKEN_CACHE.get(key) if State.TOKEN_CACHE is not None else None
+    )
+    if verified_token is None:
+        verified_token = _verify_signature(token, asserted_claims)
+        if verified_token is None:
+            return False
+        timeout = verified_token.expires_at - time.time()
+        if State.TOKEN_CACHE is not None and timeout > 0:
+            # until the token expires, later requests skip the signature check
+            State.TOKEN_CACHE.set(key, verified_token, timeout=timeout)
+
+    logger.info("Completed validate access token")
+
+    # space separated claims must all be granted
+    return all(claim in verified_token.scope for claim in asserted_claims.split())
+
+
+def read_token_cache_statistics() -> dict:
+    """Read verified access token cache statistics."""
+    if State.TOKEN_CACHE is None:
+        return {}
+    return State.TOKEN_CACHE.statistics()
+
+
+def _refresh() -> None:
+    refreshed = True
+    while True:
+        # retry sooner after a failed renewal, the current keys stay in use meanwhile
+        time.sleep(
+            config.CACHE_REFRESH_INTERVAL
+            if refreshed
+            else config.WARM_UP_RETRY_INTERVAL
+        )
+        # the warm-up loads the tenant configuration the first time
+        refreshed = State.JWKS is None or refresh_cache_state()
+
+
+def _verify_signature(token, asserted_claims) -> VerifiedToken:
+    logger = get_logger()
+
     jwtoken = jwt.JWT()
     try:
         jwtoken.deserialize(jwt=token)
     except Exception as exception:  # pylint: disable=broad-except
         logger.error("Error deserialising access token", exception=str(exception))
-        return False
+        return None
 
     try:
         jwtoken.validate(key=State.JWKS)
     except Exception as exception:  # pylint: disable=broad-except
         logger.error("Error validating access token", exception=str(exception))
-        return False
+        return None
 
     try:
         claims = json.loads(jwtoken.claims)
-        scope = claims["scope"]
+        verified_token = VerifiedToken(
+            claims=claims,
+            scope=frozenset(claims["scope"].split()),
+            expires_at=float(claims.get("exp", 0)),
+        )
     except Exception as exception:  # pylint: disable=broad-except
         logger.error(
             "Error validating claims from access token",
@@ -144,8 +287,6 @@ def validate_access_token(token, asserted_claims) -> bool:
             claims=jwtoken.claims,
             asserted_claims=asserted_claims,
         )
-        return False
-
-    logger.info("Completed validate access token")
+        return None
 
-    return asserted_claims in scope
+    return verified_token
@@ -0,0 +1,315 @@
+""" Module for a memory-mapped read-only snapshot file of the reference data. """
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from typing import Iterator
+
+import orjson
+from bson.objectid import ObjectId
+from structlog import get_logger
+
+from . import config, document_db, encoding
+
+MAGIC = b"RDSNAP01"
+# magic, version, then per reference collection the offset and length of its json
+# array and the offset of its id index, then the offsets of the lookup indexes
+HEADER = struct.Struct(
+    "<8s32s" + "QQQI" * len(document_db.REFERENCE_COLLECTIONS) + "QIQIQI"
+)
+# id, offset and length of a document within its json array, sorted by id
+ID_RECORD = struct.Struct("<12sQI")
+# subjective symptom id, cause digest and etiology position, sorted
+CAUSE_RECORD = struct.Struct("<12s16sI")
+# symptom digest and subjective symptom position, sorted
+SYMPTOM_RECORD = struct.Struct("<16sI")
+# etiology id and drug position, sorted
+DRUG_RECORD = struct.Struct("<12sI")
+
+
+def write(path, version, collections) -> None:
+    """Write reference data collections as a snapshot file, replacing it at once."""
+    logger = get_logger()
+
+    logger.info("Starting write snapshot", path=path, version=version)
+    body = bytearray()
+    sections = {}
+    documents = {}
+    for collection in document_db.REFERENCE_COLLECTIONS:
+        documents[collection] = sorted(
+            collections[collection], key=lambda document: ObjectId(document["_id"])
+        )
+        # the json array is exactly what 'document_db.serialise' makes, so reads of
+        # whole collections are a slice of the file
+        array_offset = HEADER.size + len(body)
+        records = bytearray()
+        body += b"["
+        for position, document in enumerate(documents[collection]):
+            if position > 0:
+                body += b","
+            encoded = encoding.dumps(document)
+            records += ID_RECORD.pack(
+                ObjectId(document["_id"]).binary,
+                HEADER.size + len(body),
+                len(encoded),
+            )
+            body += encoded
+        body += b"]\n"
+        array_length = HEADER.size + len(body) - array_offset
+        sections[collection] = (
+            array_offset,
+            array_length,
+            HEADER.size + len(body),
+            len(documents[collection]),
+        )
+        body += records
+
+    indexes = []
+    for record, keys in [
+        (
+            CAUSE_RECORD,
+            [
+                (
+                    ObjectId(document["subjective_symptom_id"]).binary,
+                    _digest(document.get("cause")),
+                    position,
+                )
+                for position, document in enumerate(documents["etiologies"])
+                if ObjectId.is_valid(document.get("subjective_symptom_id"))
+            ],
+        ),
+        (
+            SYMPTOM_RECORD,
+            [
+                (_digest(document.get("symptom")), position)
+                for position, document in enumerate(documents["subjective_symptoms"])
+            ],
+        ),
+        (
+            DRUG_RECORD,
+            [
+                (ObjectId(document["etiology_id"]).binary, position)
+                for position, document in enumerate(documents["drugs"])
+                if ObjectId.is_valid(document.get("etiology_id"))
+            ],
+        ),
+    ]:
+        indexes += [HEADER.size + len(body), len(keys)]
+        for key in sorted(keys):
+            body += record.pack(*key)
+
+    header = HEADER.pack(
+        MAGIC,
+        str(version or "").encode("utf-8"),
+        *[
+            value
+            for collection in document_db.REFERENCE_COLLECTIONS
+            for value in sections[collection]
+        ],
+        *indexes,
+    )
+    # workers keep mapping the file they opened until they open it again
+    with open(f"{path}.tmp", "wb") as file:
+        file.write(header)
+        file.write(body)
+    os.replace(f"{path}.tmp", path)
+    logger.info("Completed write snapshot", path=path, size=HEADER.size + len(body))
+
+
+class Storage:
+    """Class for reading reference data from a memory-mapped snapshot file.
+
+    Same interface as 'document_db.MongoStorage', so it stands in for mongodb.
+    Lookups binary search the fixed size index records, and only the documents
+    found are decoded, so workers share the mapped pages instead of each holding
+    its own copy.
+    """
+
+    # reads are in process, so they skip the cache and the query plan checks
+    remote = False
+
+    def __init__(self, path) -> None:
+        logger = get_logger()
+
+        logger.info("Starting open snapshot", path=path)
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        values = HEADER.unpack_from(self.buffer, 0)
+        if values[0] != MAGIC:
+            raise Exception(f"Error: not a reference data snapshot - {path}")
+        self.version = values[1].rstrip(b"\0").decode("utf-8") or None
+        self.sections = {}
+        for number, collection in enumerate(document_db.REFERENCE_COLLECTIONS):
+            self.sections[collection] = values[2 + 4 * number : 6 + 4 * number]
+        indexes = values[2 + 4 * len(document_db.REFERENCE_COLLECTIONS) :]
+        self.cause_index = (CAUSE_RECORD, indexes[0], indexes[1])
+        self.symptom_index = (SYMPTOM_RECORD, indexes[2], indexes[3])
+        self.drug_index = (DRUG_RECORD, indexes[4], indexes[5])
+        # built on first use, the snapshot never changes once written
+        self.symptoms_by_id = None
+        logger.info(
+            "Completed open snapshot",
+            version=self.version,
+            documents={
+                collection: section[3] for collection, section in self.sections.items()
+            },
+        )
+
+    def ping(self) -> None:
+        """Nothing to reach, the data is mapped in memory."""
+
+    def read_version(self) -> str:
+        """Read the reference data version the snapshot was written with."""
+        return self.version
+
+    def read_serialised(self, collection) -> bytes:
+        """Read all documents of a collection as json bytes."""
+        array_offset, array_length, _, _ = self.sections[collection]
+        return self.buffer[array_offset : array_offset + array_length]
+
+    def find_all(self, collection) -> list[dict]:
+        """Find all documents of a collection."""
+        return orjson.loads(self.read_serialised(collection))
+
+    def find_symptoms_by_id(self) -> dict[str, str]:
+        """Find normalised symptoms by document id, built once per snapshot."""
+        symptoms_by_id = self.symptoms_by_id
+        if symptoms_by_id is None:
+            symptoms_by_id = self.symptoms_by_id = document_db.build_symptoms_by_id(
+                self.find_all("subjective_symptoms")
+                + self.find_all("objective_symptoms")
+            )
+        return symptoms_by_id
+
+    def find_etiology(self, subjective_symptom_id, cause) -> dict:
+        """Find an etiology by subjective symptom id and lower case cause."""
+        if not ObjectId.is_valid(subjective_symptom_id):
+            return None
+        key = ObjectId(subjective_symptom_id).binary + _digest(cause)
+        for _, _, position in self._find_records(self.cause_index, key):
+            document = self._read_document("etiologies", position)
+            # digests may collide, the cause itself decides
+            if document.get("cause") == cause:
+                return document
+        return None
+
+    def find_drugs(self, etiology_id) -> list[dict]:
+        """Find drugs by etiology id."""
+        if not ObjectId.is_valid(etiology_id):
+            return []
+        return [
+            self._read_document("drugs", position)
+            for _, position in self._find_records(
+                self.drug_index, ObjectId(etiology_id).binary
+            )
+        ]
+
+    def find_drugs_by_etiologies(self, etiology_ids) -> dict[str, list]:
+        """Find drugs by etiology for many etiology ids."""
+        return {
+            etiology_id: self.find_drugs(etiology_id) for etiology_id in etiology_ids
+        }
+
+    def find_etiologies_with_drugs(self, symptoms_causes) -> dict[tuple, dict]:
+        """Find etiologies with their drugs by symptom and lower case cause."""
+        result = {}
+        for symptom, cause in symptoms_causes:
+            for _, position in self._find_records(self.symptom_index, _digest(symptom)):
+                document = self._read_document("subjective_symptoms", position)
+                if document.get("symptom") != symptom:
+                    continue
+                etiology = self.find_etiology(document["_id"], cause)
+                if etiology is not None:
+                    result[(symptom, cause)] = {
+                        **etiology,
+                        "drugs": self.find_drugs(etiology["_id"]),
+                    }
+                break
+        return result
+
+    def find_ordered(self, collection, after, fields, limit=None) -> Iterator[dict]:
+        """Find documents ordered by id after an id."""
+        _, projection = document_db.page_query(collection, after, fields)
+        _, _, index_offset, count = self.sections[collection]
+        start = 0
+        if after is not None:
+            start = _bisect(
+                self.buffer,
+                (ID_RECORD, index_offset, count),
+                ObjectId(after).binary,
+                right=True,
+            )
+        end = count if limit is None else min(start + limit, count)
+        for position in range(start, end):
+            document = self._read_document(collection, position)
+            if projection is None:
+                yield document
+            else:
+                # as with mongodb, the id is always projected
+                yield {
+                    key: value
+                    for key, value in document.items()
+                    if key == "_id" or key in projection
+                }
+
+    def _read_document(self, collection, position) -> dict:
+        _, _, index_offset, _ = self.sections[collection]
+        _, offset, length = ID_RECORD.unpack_from(
+            self.buffer, index_offset + position * ID_RECORD.size
+        )
+        return orjson.loads(self.buffer[offset : offset + length])
+
+    def _find_records(self, index, key) -> Iterator[tuple]:
+        record, offset, count = index
+        position = _bisect(self.buffer, index, key)
+        while position < count:
+            start = offset + position * record.size
+            if self.buffer[start : start + len(key)] != key:
+                break
+            yield record.unpack_from(self.buffer, start)
+            position += 1
+
+
+def _bisect(buffer, index, key, right=False) -> int:
+    # first record whose key prefix is above, or with 'right' not below, the key
+    record, offset, count = index
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        start = offset + middle * record.size
+        prefix = buffer[start : start + len(key)]
+        if prefix < key or (right and prefix == key):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _digest(value) -> bytes:
+    return hashlib.blake2b(str(value).encode("utf-8"), digest_size=16).digest()
+
+
+def main() -> None:
+    """Entry point to write the snapshot file from mongodb, after the migrations."""
+    config.MONGODB_URL = os.environ.get("MONGODB_URL", default=config.MONGODB_URL)
+    config.STORAGE_SNAPSHOT_FILE = os.environ.get(
+        "STORAGE_SNAPSHOT_FILE", default=config.STORAGE_SNAPSHOT_FILE
+    )
+    if len(sys.argv) > 1:
+        config.STORAGE_SNAPSHOT_FILE = sys.argv[1]
+    document_db.configure_mongodb_client()
+    storage = document_db.State.STORAGE
+    write(
+        config.STORAGE_SNAPSHOT_FILE,
+        storage.read_version(),
+        {
+            collection: storage.find_all(collection)
+            for collection in document_db.REFERENCE_COLLECTIONS
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
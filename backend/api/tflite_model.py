@@ -0,0 +1,123 @@
+""" Module for tensorflow lite model inference and export. """
+
+import argparse
+import threading
+
+import numpy as np
+
+SUPPORTED_QUANTISATIONS = ["float16", "int8"]
+
+
+class Model:
+    """Class for running a tensorflow lite model, same interface as keras 'predict'."""
+
+    def __init__(self, interpreter) -> None:
+        self.interpreter = interpreter
+        self.input_details = interpreter.get_input_details()[0]
+        self.output_details = interpreter.get_output_details()[0]
+        self._batch_size = None
+        # an interpreter holds its tensors, so calls must not interleave
+        self._lock = threading.Lock()
+
+    def predict(self, inputs) -> np.ndarray:
+        """Predict output probabilities for a batch of padded sequences."""
+        values = np.asarray(inputs)
+        with self._lock:
+            if values.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(
+                    self.input_details["index"], values.shape
+                )
+                self.interpreter.allocate_tensors()
+                self._batch_size = values.shape[0]
+            self.interpreter.set_tensor(
+                self.input_details["index"], _quantise(values, self.input_details)
+            )
+            self.interpreter.invoke()
+            return _dequantise(
+                self.interpreter.get_tensor(self.output_details["index"]),
+                self.output_details,
+            )
+
+
+def load_model(file) -> Model:
+    """Load model from a tensorflow lite file."""
+    # prefer the standalone runtime, so serving does not need tensorflow
+    try:
+        # pylint: disable=import-outside-toplevel
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        # pylint: disable=import-outside-toplevel
+        import tensorflow as tf
+
+        Interpreter = tf.lite.Interpreter  # pylint: disable=invalid-name
+
+    return Model(Interpreter(model_path=str(file)))
+
+
+def save_model(model, file, quantisation, representative_sequences=None) -> None:
+    """Export a keras model as a post-training quantised tensorflow lite file."""
+    # pylint: disable=import-outside-toplevel
+    import tensorflow as tf
+
+    if quantisation not in SUPPORTED_QUANTISATIONS:
+        raise Exception(f"Error: unsupported quantisation - {quantisation}")
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantisation == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        if representative_sequences is None:
+            raise Exception("Error: int8 quantisation needs representative sequences")
+        converter.representative_dataset = lambda: (
+            [np.asarray([sequence], dtype=np.float32)]
+            for sequence in representative_sequences
+        )
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(file=file, mode="wb") as tflite_file:
+        tflite_file.write(converter.convert())
+
+
+def _quantise(values, details) -> np.ndarray:
+    scale, zero_point = details["quantization"]
+    if np.issubdtype(details["dtype"], np.integer) and scale != 0:
+        values = np.round(values / scale + zero_point)
+    return values.astype(details["dtype"])
+
+
+def _dequantise(values, details) -> np.ndarray:
+    scale, zero_point = details["quantization"]
+    if np.issubdtype(details["dtype"], np.integer) and scale != 0:
+        return (values.astype(np.float32) - zero_point) * scale
+    return values
+
+
+def main() -> None:
+    """Entry point to export a keras h5 model as a tensorflow lite file."""
+    # pylint: disable=import-outside-toplevel
+    import tensorflow as tf
+
+    parser = argparse.ArgumentParser(description="Export model for tensorflow lite")
+    parser.add_argument("model_file", help="Keras h5 model file to read")
+    parser.add_argument("tflite_file", help="Tensorflow lite file (.tflite) to write")
+    parser.add_argument(
+        "--quantisation", choices=SUPPORTED_QUANTISATIONS, default="float16"
+    )
+    parser.add_argument(
+        "--symptoms-sequences",
+        help="Numpy file (.npy) of padded symptoms sequences for int8 calibration",
+    )
+    args = parser.parse_args()
+    save_model(
+        tf.keras.models.load_model(args.model_file),
+        args.tflite_file,
+        args.quantisation,
+        (
+            np.load(args.symptoms_sequences)
+            if args.symptoms_sequences is not None
+            else None
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
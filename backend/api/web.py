@@ -0,0 +1,115 @@
+""" Module for request parsing and response building shared by the wsgi and asgi apps. """
+
+from bson.objectid import ObjectId
+
+from . import config, document_db, encoding
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def get_bearer_token(request) -> str:
+    """Get the bearer token from the authorisation header, empty if missing."""
+    header = request.headers.get(config.AUTHORISATION_HEADER_KEY)
+    return header.removeprefix("Bearer").strip() if header is not None else ""
+
+
+def get_model_name(request) -> str:
+    """Get the model name requests are routed to, if any."""
+    return request.headers.get(config.MODEL_ROUTING_HEADER_KEY)
+
+
+def get_page_arguments(request, collection) -> (int, str, list[str]):
+    """Get the limit, after and fields arguments of reads, None if invalid."""
+    try:
+        limit = int(request.args["limit"]) if "limit" in request.args else None
+    except ValueError:
+        return None
+    if limit is not None and not 0 < limit <= config.READ_ALL_MAX_LIMIT:
+        return None
+    after = request.args.get("after")
+    if after is not None and not ObjectId.is_valid(after):
+        return None
+    fields = [name for name in request.args.get("fields", "").split(",") if name]
+    # names go into the projection, so operators and unknown paths never reach it
+    if not all(name in document_db.REFERENCE_FIELDS[collection] for name in fields):
+        return None
+    return limit, after, fields or None
+
+
+def get_etiology_ids(etiology_ids) -> list[str]:
+    """Get comma separated etiology ids, None if too many or invalid."""
+    etiology_ids = [item for item in etiology_ids.split(",") if item.strip() != ""]
+    if len(etiology_ids) > config.READ_ALL_MAX_LIMIT or not all(
+        ObjectId.is_valid(item) for item in etiology_ids
+    ):
+        return None
+    return etiology_ids
+
+
+def is_valid_batch(batch) -> bool:
+    """Check a batch of symptoms records is a list within the maximum size."""
+    return isinstance(batch, list) and len(batch) <= config.PREDICTION_MAX_BATCH_SIZE
+
+
+def is_streamed(request) -> bool:
+    """Check the client asked for newline delimited json over a json array."""
+    return (
+        request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+        == NDJSON_MIMETYPE
+    )
+
+
+def make_response(response_class, request, result, validated=False):
+    """Make a response for a result, 404 if none and encoded if json ready."""
+    if result is None:
+        return response_class("", 404)
+    if isinstance(result, (dict, list)):
+        mimetype = encoding.negotiate_mimetype(request.accept_mimetypes)
+        return make_encoded_response(
+            response_class,
+            request,
+            encoding.serialise(result, mimetype),
+            mimetype,
+            validated,
+        )
+    return response_class(result, 200)
+
+
+def make_encoded_response(response_class, request, body, mimetype, validated=False):
+    """Make a compressed response for a body, with an etag if validated."""
+    # validated bodies get an etag, and a 304 if the client has them already
+    status, body, headers = encoding.encode(
+        body, request.accept_encodings, request.if_none_match if validated else None
+    )
+    return response_class(body, status, headers=headers, mimetype=mimetype)
+
+
+def make_serialised_response(response_class, request, serialised):
+    """Make a validated response for a whole collection read as json bytes."""
+    mimetype = encoding.negotiate_mimetype(request.accept_mimetypes)
+    return make_encoded_response(
+        response_class,
+        request,
+        encoding.transcode(serialised, mimetype),
+        mimetype,
+        validated=True,
+    )
+
+
+def make_page_response(response_class, request, documents, next_after):
+    """Make a validated response for a page, with the id the next page follows."""
+    response = make_response(response_class, request, documents, validated=True)
+    if next_after is not None:
+        response.headers["X-Next-After"] = next_after
+    return response
+
+
+def make_prediction_response(
+    response_class, request, result, model_version, model_name
+):
+    """Make a response for a prediction, with the model that served it."""
+    response = make_response(response_class, request, result)
+    if model_version is not None:
+        response.headers["X-Model-Version"] = model_version
+    response.headers[config.MODEL_ROUTING_HEADER_KEY] = model_name
+    return response
@@ -0,0 +1,228 @@
+""" Module for a multi-process inference worker pool with shared model weights. """
+
+import itertools
+import multiprocessing
+import threading
+from dataclasses import dataclass, field
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+from structlog import get_logger
+
+from . import numpy_model
+
+
+@dataclass(init=True)
+class Worker:
+    """Class for a worker process, its own request queue and result pipe."""
+
+    process: multiprocessing.Process
+    requests: object
+    results: connection.Connection
+    # ids of the tasks sent to the worker and not answered yet
+    task_ids: set = field(default_factory=set)
+    # handled, it stays in the pool only once the pool closed
+    exited: bool = False
+
+
+class Pool:
+    """Class for worker processes predicting from weights in shared memory.
+
+    Same interface as keras 'predict', so it stands in for the model. Exited
+    workers are replaced, and the predictions sent to them fail.
+    """
+
+    def __init__(self, model, size, timeout=None) -> None:
+        logger = get_logger()
+
+        logger.info("Starting inference worker pool", size=size)
+        model = numpy_model.from_keras(model)
+        # copy every weight once into shared memory, workers only map it
+        self._blocks = []
+        layers = []
+        for layer in model.layers:
+            weights = []
+            for weight in layer.weights:
+                weight = np.ascontiguousarray(weight)
+                block = shared_memory.SharedMemory(
+                    create=True, size=max(weight.nbytes, 1)
+                )
+                shared = np.ndarray(weight.shape, dtype=weight.dtype, buffer=block.buf)
+                shared[...] = weight
+                del shared
+                self._blocks.append(block)
+                weights.append((block.name, weight.shape, weight.dtype.str))
+            layers.append((layer.class_name, layer.activation, weights))
+
+        # spawn, so workers start without the api process threads and modules
+        self._context = multiprocessing.get_context("spawn")
+        self._layers = layers
+        self._timeout = timeout
+        self._task_ids = itertools.count()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = [self._start_worker(index) for index in range(size)]
+        self._stop_reader, self._stop_writer = self._context.Pipe(duplex=False)
+        self._receiver = threading.Thread(
+            target=self._receive, name="inference-results", daemon=True
+        )
+        self._receiver.start()
+        logger.info(
+            "Completed inference worker pool",
+            size=size,
+            shared_bytes=sum(block.size for block in self._blocks),
+        )
+
+    def predict(self, inputs) -> np.ndarray:
+        """Predict output probabilities for a batch of padded sequences."""
+        inputs = np.asarray(inputs, dtype=np.int32)
+        done = threading.Event()
+        with self._lock:
+            if self._closed:
+                raise Exception("Error: inference worker pool closed")
+            task_id = next(self._task_ids)
+            self._pending[task_id] = [done, None]
+            # the least busy worker, under the lock so no task is queued behind
+            # the stop sentinels
+            worker = min(self._workers, key=lambda item: len(item.task_ids))
+            worker.task_ids.add(task_id)
+            worker.requests.put((task_id, inputs))
+        done.wait(self._timeout)
+        with self._lock:
+            _, result = self._pending.pop(task_id)
+        if result is None:
+            raise Exception("Error: inference worker pool timed out")
+        if isinstance(result, str):
+            raise Exception(result)
+        return result
+
+    def close(self) -> None:
+        """Stop workers after queued requests, then release the shared memory."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for worker in self._workers:
+            worker.requests.put(None)
+        for worker in self._workers:
+            worker.process.join()
+        self._stop_writer.send(None)
+        self._receiver.join()
+        with self._lock:
+            # queued for workers that exited on the way out
+            for task_id in list(self._pending):
+                self._set_result(task_id, "Error: inference worker pool closed")
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+
+    def _start_worker(self, index) -> Worker:
+        # a queue and a pipe per worker, so one exiting while it holds their locks
+        # blocks no other worker
+        requests = self._context.Queue()
+        results, results_writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_work,
+            args=(self._layers, requests, results_writer),
+            name=f"inference-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        results_writer.close()
+        return Worker(process=process, requests=requests, results=results)
+
+    def _receive(self) -> None:
+        while True:
+            with self._lock:
+                workers = [worker for worker in self._workers if not worker.exited]
+            results = {worker.results: worker for worker in workers}
+            sentinels = {worker.process.sentinel: worker for worker in workers}
+            for ready in connection.wait([self._stop_reader, *results, *sentinels]):
+                if ready is self._stop_reader:
+                    return
+                if ready in results:
+                    self._read_results(results[ready])
+                elif not sentinels[ready].exited:
+                    self._replace_worker(sentinels[ready])
+
+    def _read_results(self, worker) -> None:
+        try:
+            while worker.results.poll():
+                task_id, result = worker.results.recv()
+                with self._lock:
+                    worker.task_ids.discard(task_id)
+                    self._set_result(task_id, result)
+        except (EOFError, OSError):
+            # the worker exited, its sentinel says so
+            pass
+
+    def _replace_worker(self, worker) -> None:
+        logger = get_logger()
+
+        # the sentinel may be ready before the process is reaped
+        worker.process.join()
+        # results sent before exiting still count
+        self._read_results(worker)
+        worker.results.close()
+        worker.requests.cancel_join_thread()
+        worker.requests.close()
+        with self._lock:
+            worker.exited = True
+            exitcode = worker.process.exitcode
+            for task_id in worker.task_ids:
+                self._set_result(
+                    task_id, f"Error: inference worker exited - {exitcode}"
+                )
+            if self._closed:
+                return
+            logger.error(
+                "Replacing inference worker",
+                worker=worker.process.name,
+                exitcode=exitcode,
+            )
+            index = self._workers.index(worker)
+            self._workers[index] = self._start_worker(index)
+
+    def _set_result(self, task_id, result) -> None:
+        # callers that timed out already dropped their task
+        pending = self._pending.get(task_id)
+        if pending is not None and pending[1] is None:
+            pending[1] = result
+            pending[0].set()
+
+
+def _work(layers, requests, results) -> None:
+    blocks = []
+    model = _attach(layers, blocks)
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        task_id, inputs = item
+        try:
+            results.send((task_id, model.predict(inputs)))
+        except Exception as exception:  # pylint: disable=broad-except
+            results.send((task_id, f"Error: {exception}"))
+
+    # drop the weight views before unmapping the shared memory
+    del model
+    for block in blocks:
+        block.close()
+
+
+def _attach(layers, blocks) -> numpy_model.Model:
+    model_layers = []
+    for class_name, activation, weights in layers:
+        arrays = []
+        for name, shape, dtype in weights:
+            block = shared_memory.SharedMemory(name=name)
+            blocks.append(block)
+            arrays.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf))
+        model_layers.append(
+            numpy_model.Layer(
+                class_name=class_name, activation=activation, weights=arrays
+            )
+        )
+    return numpy_model.Model(model_layers)
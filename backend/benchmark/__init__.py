@@ -0,0 +1 @@
+""" Module for backend api benchmarks. """
@@ -0,0 +1,95 @@
+""" Module for benchmarking bson to json conversion of documents. """
+
+import argparse
+import json
+import re
+import sys
+import time
+
+from bson import json_util
+from bson.objectid import ObjectId
+
+from api import document_db
+
+
+def main() -> None:
+    """Entry point to run the conversion benchmarks and write the results file."""
+    parser = argparse.ArgumentParser(description="Benchmark document db")
+    parser.add_argument("--output", default="benchmark_document_db.json")
+    parser.add_argument("--documents", default="1000,10000")
+    parser.add_argument("--object-ids", default="2,10,100")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {"results": []}
+    for documents_count in [int(item) for item in args.documents.split(",")]:
+        for object_ids_count in [int(item) for item in args.object_ids.split(",")]:
+            documents = make_documents(documents_count, object_ids_count)
+            if [document_db.to_json(item) for item in documents] != [
+                _legacy_to_json(item) for item in documents
+            ]:
+                raise Exception("Error: conversions differ")
+            for name, function in [
+                ("legacy", _legacy_to_json),
+                ("to_json", document_db.to_json),
+            ]:
+                seconds = min(_time(function, documents) for _ in range(args.repeat))
+                results["results"].append(
+                    {
+                        "benchmark": name,
+                        "documents": documents_count,
+                        "object_ids_per_document": object_ids_count,
+                        "seconds": seconds,
+                        "documents_per_second": documents_count / seconds,
+                    }
+                )
+                print(
+                    f"{name} {documents_count} documents, {object_ids_count} "
+                    f"object ids each: {seconds:.3f} s",
+                    file=sys.stderr,
+                )
+
+    with open(file=args.output, mode="w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+
+def make_documents(count, object_ids_count) -> list[dict]:
+    """Make drug like documents, each with at least 2 and the given object ids."""
+    return [
+        {
+            "_id": ObjectId(),
+            "etiology_id": ObjectId(),
+            "drug_category": f"drug category {index}",
+            "drug_use": "drug use",
+            "dose": "dose",
+            "mode_of_action": "mode of action",
+            "interaction_ids": [
+                ObjectId() for _ in range(max(object_ids_count - 2, 0))
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+def _legacy_to_json(document) -> dict:
+    # the conversion before 'document_db.to_json', kept to measure against
+    string = json_util.dumps(document)
+    while True:
+        pattern = re.compile(r'{\s*"\$oid":\s*("[a-z0-9]{1,}")\s*}')
+        match = re.search(pattern, string)
+        if match:
+            string = string.replace(match.group(0), match.group(1))
+        else:
+            return json.loads(string)
+
+
+def _time(function, documents) -> float:
+    started_at = time.perf_counter()
+    for document in documents:
+        function(document)
+    return time.perf_counter() - started_at
+
+
+if __name__ == "__main__":
+    main()
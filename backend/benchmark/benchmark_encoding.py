@@ -0,0 +1,95 @@
+""" Module for benchmarking json and message pack encoding of response bodies. """
+
+import argparse
+import json
+import sys
+import time
+
+import msgpack
+import orjson
+
+from api import document_db, encoding
+from benchmark import benchmark_document_db, synthetic
+
+
+def main() -> None:
+    """Entry point to run the encoding benchmarks and write the results file."""
+    parser = argparse.ArgumentParser(description="Benchmark encoding")
+    parser.add_argument("--output", default="benchmark_encoding.json")
+    parser.add_argument("--documents", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {"results": []}
+    for count in [int(item) for item in args.documents.split(",")]:
+        for payload, value in [
+            ("reference_data", make_reference_data(count)),
+            ("predictions", make_predictions(count)),
+        ]:
+            if not round_trips(value):
+                raise Exception("Error: message pack and json forms differ")
+            for name, encode, decode in [
+                ("json", lambda value: json.dumps(value).encode("utf-8"), json.loads),
+                ("orjson", encoding.dumps, orjson.loads),
+                ("msgpack", encoding.packb, msgpack.unpackb),
+            ]:
+                body = encode(value)
+                encode_seconds = min(_time(encode, value) for _ in range(args.repeat))
+                decode_seconds = min(_time(decode, body) for _ in range(args.repeat))
+                results["results"].append(
+                    {
+                        "benchmark": name,
+                        "payload": payload,
+                        "documents": count,
+                        "bytes": len(body),
+                        "encode_seconds": encode_seconds,
+                        "decode_seconds": decode_seconds,
+                    }
+                )
+                print(
+                    f"{name} {payload} {count} documents: {len(body)} bytes, "
+                    f"encode {encode_seconds * 1000:.2f} ms, "
+                    f"decode {decode_seconds * 1000:.2f} ms",
+                    file=sys.stderr,
+                )
+
+    with open(file=args.output, mode="w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+
+def make_reference_data(count) -> list[dict]:
+    """Make drug like documents, as the read-all endpoints send them."""
+    return [
+        document_db.to_json(document)
+        for document in benchmark_document_db.make_documents(count, 2)
+    ]
+
+
+def make_predictions(count) -> list[dict]:
+    """Make batch prediction results, as '/predict-causes' sends them."""
+    return [
+        {
+            **record,
+            "causes": [
+                [f"{record['subjective_symptoms']}|cause {index}", 100 / (index + 2)]
+                for index in range(synthetic.CAUSES_PER_SYMPTOM)
+            ],
+        }
+        for record in synthetic.make_records(count)
+    ]
+
+
+def round_trips(value) -> bool:
+    """Check the message pack form decodes to the same values as the json form."""
+    return msgpack.unpackb(encoding.packb(value)) == orjson.loads(encoding.dumps(value))
+
+
+def _time(function, value) -> float:
+    started_at = time.perf_counter()
+    function(value)
+    return time.perf_counter() - started_at
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+""" Module for benchmarking predictions by backend, batch size and concurrency. """
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import structlog
+
+from . import synthetic
+
+BACKEND_MODEL_FILES = {"keras": "model.h5", "numpy": "model.npz", "tflite": "model.h5"}
+
+
+def main() -> None:
+    """Entry point to run the benchmarks and write the results file."""
+    parser = argparse.ArgumentParser(description="Benchmark machine learning")
+    parser.add_argument("--output", default="benchmark_machine_learning.json")
+    parser.add_argument(
+        "--artefacts-directory",
+        help="Directory with synthetic model files, trained into it if missing",
+    )
+    parser.add_argument("--backends", default="numpy,keras,tflite")
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--batch-sizes", default="1,8,32,128,256")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--inference-workers", type=int, default=0)
+    parser.add_argument("--prediction-cache", action="store_true")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    directory = args.artefacts_directory or os.path.join(
+        tempfile.gettempdir(), "medicine-prescriber-benchmark"
+    )
+    files = {
+        "symptoms_tokeniser_file": os.path.join(directory, "symptoms_tokeniser.json"),
+        "causes_tokeniser_file": os.path.join(directory, "causes_tokeniser.json"),
+    }
+    if not os.path.exists(os.path.join(directory, "model.npz")):
+        print(f"Training synthetic model into {directory}", file=sys.stderr)
+        synthetic.write_artefacts(directory)
+
+    settings = {
+        "requests": args.requests,
+        "concurrency": [int(item) for item in args.concurrency.split(",")],
+        "batch_sizes": [int(item) for item in args.batch_sizes.split(",")],
+        "inference_workers": args.inference_workers,
+        "prediction_cache": args.prediction_cache,
+    }
+    results = {
+        "commit": _read_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": settings,
+        "backends": {},
+    }
+    # a fresh process per backend, so load time and memory are not shared
+    for backend in args.backends.split(","):
+        print(f"Benchmarking {backend} backend", file=sys.stderr)
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results["backends"][backend] = executor.submit(
+                run_backend,
+                backend,
+                {
+                    "model_file": os.path.join(directory, BACKEND_MODEL_FILES[backend]),
+                    **files,
+                },
+                settings,
+            ).result()
+
+    with open(file=args.output, mode="w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+    if args.baseline is not None:
+        with open(file=args.baseline, mode="r", encoding="utf-8") as baseline_file:
+            regressions = compare(json.load(baseline_file), results, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if len(regressions) > 0:
+            sys.exit(1)
+
+
+def run_backend(backend, files, settings) -> dict:
+    """Load the model with a backend and run every benchmark against it."""
+    # pylint: disable=import-outside-toplevel
+    from api import batch_scheduler, config, machine_learning
+
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING)
+    )
+    config.MODEL_BACKEND = backend
+    config.MODEL_FILE = files["model_file"]
+    config.SYMPTOMS_TOKENISER_FILE = files["symptoms_tokeniser_file"]
+    config.CAUSES_TOKENISER_FILE = files["causes_tokeniser_file"]
+    config.INFERENCE_WORKERS = settings["inference_workers"]
+    if not settings["prediction_cache"]:
+        config.PREDICTION_CACHE_MAX_SIZE = 0
+
+    rss_before_load = _read_rss_mb()
+    started_at = time.perf_counter()
+    try:
+        machine_learning.configure()
+        machine_learning.warm_up()
+    except Exception as exception:  # pylint: disable=broad-except
+        return {"error": str(exception)}
+    result = {
+        "load_seconds": time.perf_counter() - started_at,
+        "rss_mb_before_load": rss_before_load,
+        "rss_mb_after_load": _read_rss_mb(),
+        "results": [],
+    }
+
+    records = synthetic.make_records(settings["requests"], seed=7)
+    for concurrency in settings["concurrency"]:
+        result["results"].append(
+            _measure(
+                "predict_cause",
+                records,
+                concurrency,
+                1,
+                lambda record: machine_learning.predict_cause(
+                    record["subjective_symptoms"],
+                    record["objective_symptoms"],
+                    record["gender"],
+                ),
+            )
+        )
+    for batch_size in settings["batch_sizes"]:
+        batches = [
+            records[index : index + batch_size]
+            for index in range(0, len(records), batch_size)
+        ]
+        result["results"].append(
+            _measure("predict_causes", batches, 1, batch_size, _predict_batch)
+        )
+    batch_scheduler.start()
+    for concurrency in settings["concurrency"]:
+        result["results"].append(
+            _measure(
+                "batch_scheduler.predict_cause",
+                records,
+                concurrency,
+                1,
+                lambda record: batch_scheduler.predict_cause(
+                    record["subjective_symptoms"],
+                    record["objective_symptoms"],
+                    record["gender"],
+                ),
+            )
+        )
+    batch_scheduler.stop()
+
+    result["rss_mb_peak"] = _read_rss_mb("VmHWM")
+    close = getattr(machine_learning.State.ARTEFACTS.model, "close", None)
+    if close is not None:
+        close()
+
+    return result
+
+
+def compare(baseline, results, tolerance) -> list[str]:
+    """Compare results with a baseline, listing latency and throughput regressions."""
+    regressions = []
+    for backend, backend_results in results["backends"].items():
+        baseline_results = baseline.get("backends", {}).get(backend, {})
+        baseline_by_key = {
+            _key(item): item for item in baseline_results.get("results", [])
+        }
+        for item in backend_results.get("results", []):
+            baseline_item = baseline_by_key.get(_key(item))
+            if baseline_item is None:
+                continue
+            name = f"{backend} {' '.join(str(part) for part in _key(item))}"
+            if item["latency_ms"]["p95"] > baseline_item["latency_ms"]["p95"] * (
+                1 + tolerance
+            ):
+                regressions.append(
+                    f"{name} p95 latency {baseline_item['latency_ms']['p95']:.3f}"
+                    f" -> {item['latency_ms']['p95']:.3f} ms"
+                )
+            if item["throughput_rps"] < baseline_item["throughput_rps"] * (
+                1 - tolerance
+            ):
+                regressions.append(
+                    f"{name} throughput {baseline_item['throughput_rps']:.1f}"
+                    f" -> {item['throughput_rps']:.1f} records/s"
+                )
+    return regressions
+
+
+def _predict_batch(batch):
+    # pylint: disable=import-outside-toplevel
+    from api import machine_learning
+
+    return machine_learning.predict_causes(batch)
+
+
+def _measure(benchmark, items, concurrency, batch_size, function) -> dict:
+    latencies = [[] for _ in range(concurrency)]
+
+    def work(thread_index):
+        for item in items[thread_index::concurrency]:
+            started_at = time.perf_counter()
+            function(item)
+            latencies[thread_index].append((time.perf_counter() - started_at) * 1000)
+
+    threads = [
+        threading.Thread(target=work, args=(index,)) for index in range(concurrency)
+    ]
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started_at
+
+    latencies = np.concatenate([np.asarray(item) for item in latencies])
+    records = sum(len(item) if batch_size > 1 else 1 for item in items)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+    return {
+        "benchmark": benchmark,
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "calls": len(latencies),
+        "records": records,
+        "latency_ms": {
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "mean": float(latencies.mean()),
+        },
+        "throughput_rps": records / duration,
+    }
+
+
+def _key(item) -> tuple:
+    return (item["benchmark"], item["concurrency"], item["batch_size"])
+
+
+def _read_rss_mb(field="VmRSS") -> float:
+    # the kernel keeps the parent peak across spawn, so prefer the process status
+    try:
+        with open(file="/proc/self/status", mode="r", encoding="utf-8") as status:
+            for line in status:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _read_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+""" Module for a small model trained offline from synthetic data. """
+
+import json
+import os
+
+import numpy as np
+
+SUBJECTIVE_SYMPTOMS = [f"subjective symptom {index}" for index in range(16)]
+OBJECTIVE_SYMPTOMS = [f"objective symptom {index}" for index in range(48)]
+GENDERS = ["female", "male"]
+CAUSES_PER_SYMPTOM = 4
+
+
+def make_records(count, seed=42) -> list[dict]:
+    """Make symptoms records, as posted to '/predict-causes'."""
+    generator = np.random.default_rng(seed=seed)
+    return [
+        {
+            "subjective_symptoms": SUBJECTIVE_SYMPTOMS[
+                generator.integers(len(SUBJECTIVE_SYMPTOMS))
+            ],
+            "objective_symptoms": ";".join(
+                generator.choice(
+                    OBJECTIVE_SYMPTOMS, size=generator.integers(1, 7), replace=False
+                )
+            ),
+            "gender": GENDERS[generator.integers(len(GENDERS))],
+        }
+        for _ in range(count)
+    ]
+
+
+def write_artefacts(directory, epochs=20) -> dict:
+    """Train and write model, numpy and tflite exports and tokenisers to a directory."""
+    # pylint: disable=import-outside-toplevel
+    import tensorflow as tf
+
+    from api import numpy_model, tflite_model
+
+    os.makedirs(directory, exist_ok=True)
+    symptoms = SUBJECTIVE_SYMPTOMS + OBJECTIVE_SYMPTOMS + GENDERS
+    symptoms_word_index = {symptom: index + 1 for index, symptom in enumerate(symptoms)}
+    causes = [
+        f"{symptom}|cause {index}"
+        for symptom in SUBJECTIVE_SYMPTOMS
+        for index in range(CAUSES_PER_SYMPTOM)
+    ]
+    causes_word_index = {cause: index + 1 for index, cause in enumerate(causes)}
+
+    # the cause depends on the subjective symptom and the first objective symptom
+    records = make_records(4096)
+    symptoms_sequences = [
+        [
+            symptoms_word_index[item]
+            for item in (
+                record["subjective_symptoms"]
+                + ";"
+                + record["objective_symptoms"]
+                + ";"
+                + record["gender"]
+            ).split(";")
+        ]
+        for record in records
+    ]
+    symptoms_padded = numpy_model.pad_sequences(symptoms_sequences, "pre", 9)
+    causes_labels = np.array(
+        [
+            SUBJECTIVE_SYMPTOMS.index(record["subjective_symptoms"])
+            * CAUSES_PER_SYMPTOM
+            + int(record["objective_symptoms"].split(";")[0].split(" ")[-1])
+            % CAUSES_PER_SYMPTOM
+            for record in records
+        ]
+    )
+
+    tf.keras.utils.set_random_seed(42)
+    model = tf.keras.Sequential(
+        [
+            tf.keras.Input(shape=(9,)),
+            tf.keras.layers.Embedding(input_dim=len(symptoms) + 1, output_dim=16),
+            tf.keras.layers.GlobalAveragePooling1D(),
+            tf.keras.layers.Dense(32, activation="relu"),
+            tf.keras.layers.Dense(len(causes), activation="softmax"),
+        ]
+    )
+    model.compile(
+        loss="sparse_categorical_crossentropy", optimizer="adam", metrics=["accuracy"]
+    )
+    model.fit(x=symptoms_padded, y=causes_labels, epochs=epochs, verbose=0)
+
+    files = {
+        "model_file": os.path.join(directory, "model.h5"),
+        "symptoms_tokeniser_file": os.path.join(directory, "symptoms_tokeniser.json"),
+        "causes_tokeniser_file": os.path.join(directory, "causes_tokeniser.json"),
+    }
+    model.save(files["model_file"])
+    numpy_model.save_model(
+        numpy_model.from_keras(model), os.path.join(directory, "model.npz")
+    )
+    for quantisation in tflite_model.SUPPORTED_QUANTISATIONS:
+        tflite_model.save_model(
+            model,
+            os.path.join(directory, f"model_{quantisation}.tflite"),
+            quantisation,
+            symptoms_padded[:256],
+        )
+    for file, word_index in [
+        (files["symptoms_tokeniser_file"], symptoms_word_index),
+        (files["causes_tokeniser_file"], causes_word_index),
+    ]:
+        with open(file=file, mode="w", encoding="utf-8") as tokeniser_file:
+            json.dump(
+                {
+                    "class_name": "Tokenizer",
+                    "config": {"word_index": json.dumps(word_index)},
+                },
+                tokeniser_file,
+            )
+
+    return files
@@ -0,0 +1,150 @@
+import asyncio
+
+import api.async_document_db
+import api.document_db
+import pytest
+from bson.objectid import ObjectId
+
+
+class MockAsyncCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction):
+        return MockAsyncCursor(
+            sorted(self.documents, key=lambda item: item[key], reverse=direction < 0)
+        )
+
+    def limit(self, limit):
+        return MockAsyncCursor(self.documents[:limit])
+
+    def batch_size(self, _):
+        return self
+
+    async def close(self):
+        pass
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+
+class MockEtiologies:
+    ids = [
+        ObjectId("630840445b96e72df489b6a8"),
+        ObjectId("630840445b96e72df489b6a7"),
+    ]
+
+    def find(self, filter, projection=None):
+        return MockAsyncCursor(
+            [
+                {"_id": id, "cause": "test cause"}
+                for id in self.ids
+                if "_id" not in filter or id > filter["_id"]["$gt"]
+            ]
+        )
+
+
+class MockDrugs:
+    def find(_, filter):
+        return MockAsyncCursor(
+            [
+                {"_id": ObjectId("6308420c5b96e72df489b6b9"), "etiology_id": item}
+                for item in filter.get("etiology_id", {}).get("$in", [])
+            ]
+        )
+
+
+class MockReferenceDataVersion:
+    async def find_one(_, filter):
+        return {"_id": filter["_id"], "version": "20221002000000"}
+
+
+class MockCollection:
+    def find(_, filter):
+        return MockAsyncCursor([{"_id": ObjectId("63083e7c5b96e72df489b67d")}])
+
+
+class MockDatabase:
+    reference_data_version = MockReferenceDataVersion()
+    subjective_symptoms = MockCollection()
+    objective_symptoms = MockCollection()
+    etiologies = MockEtiologies()
+    drugs = MockDrugs()
+
+
+class MockServer:
+    ai_hospital_services = MockDatabase()
+
+
+class TestAsyncDocumentDB:
+    def test_read_page(_, mocker):
+        # arrange
+        mocker.patch.object(api.async_document_db.State, "MONGODB_CLIENT", MockServer())
+
+        # act
+        documents, next_after = asyncio.run(
+            api.async_document_db.read_page("etiologies", 1)
+        )
+
+        # assert
+        assert documents == [{"_id": "630840445b96e72df489b6a7", "cause": "test cause"}]
+        assert next_after == "630840445b96e72df489b6a7"
+
+    def test_read_drugs_by_etiologies(_, mocker):
+        # arrange
+        mocker.patch.object(api.async_document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(
+            api.async_document_db.config, "REFERENCE_DATA_CACHE_TIMEOUT", 0
+        )
+
+        # act
+        result = asyncio.run(
+            api.async_document_db.read_drugs_by_etiologies(["630840445b96e72df489b6a7"])
+        )
+
+        # assert
+        assert result == {
+            "630840445b96e72df489b6a7": [
+                {
+                    "_id": "6308420c5b96e72df489b6b9",
+                    "etiology_id": "630840445b96e72df489b6a7",
+                }
+            ]
+        }
+
+    def test_read_reference_data_version_changed(_, mocker):
+        # arrange
+        mocker.patch.object(api.async_document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.State, "REFERENCE_DATA", None)
+        mocker.patch.object(api.async_document_db.State, "REFERENCE_DATA_LOCK", None)
+        mocker.patch.object(
+            api.async_document_db.config, "REFERENCE_DATA_VERSION_INTERVAL", 0
+        )
+        api.document_db.State.REFERENCE_DATA = api.document_db.build_reference_data(
+            "20221001000000",
+            {collection: [] for collection in api.document_db.REFERENCE_COLLECTIONS},
+        )
+
+        # act
+        result = asyncio.run(api.async_document_db.read_all_subjective_symptoms())
+
+        # assert
+        assert result == [{"_id": "63083e7c5b96e72df489b67d"}]
+        assert api.document_db.State.REFERENCE_DATA.version == "20221002000000"
+
+    def test_read_reference_data_not_configured(_, mocker):
+        # arrange
+        mocker.patch.object(api.async_document_db.State, "MONGODB_CLIENT", None)
+        mocker.patch.object(api.document_db.State, "REFERENCE_DATA", None)
+        mocker.patch.object(api.async_document_db.State, "REFERENCE_DATA_LOCK", None)
+
+        # act
+        with pytest.raises(Exception) as exception:
+            asyncio.run(api.async_document_db.read_all_subjective_symptoms())
+
+        # assert
+        assert str(exception.value) == "Error: async mongodb client not configured"
@@ -0,0 +1,36 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import api.async_main
+
+
+class TestAsyncMain:
+    def test_predict_cause(_, mocker):
+        # arrange
+        def predict_cause(subjective_symptoms, objective_symptoms, gender, model_name):
+            api.async_main.machine_learning.MODEL_VERSION.set("test version")
+            api.async_main.model_registry.MODEL_NAME.set(model_name)
+            return [("test subjective symptom|test cause", 100.0)]
+
+        mocker.patch.object(api.async_main.main, "predict_cause", predict_cause)
+        mocker.patch.object(
+            api.async_main.State, "INFERENCE_EXECUTOR", ThreadPoolExecutor(1)
+        )
+
+        async def predict():
+            result = await api.async_main.predict_cause(
+                "test subjective symptom", "test objective symptom", "test gender", "b"
+            )
+            return (
+                result,
+                api.async_main.read_model_version(),
+                api.async_main.read_model_name(),
+            )
+
+        # act
+        result, model_version, model_name = asyncio.run(predict())
+
+        # assert
+        assert result == [("test subjective symptom|test cause", 100.0)]
+        assert model_version == "test version"
+        assert model_name == "b"
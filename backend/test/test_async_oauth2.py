@@ -0,0 +1,19 @@
+import asyncio
+
+import api.async_oauth2
+import pytest
+
+
+class TestAsyncOAuth2:
+    def test_check_cache_not_configured(_, mocker):
+        # arrange
+        mocker.patch.object(api.async_oauth2.State, "HTTP_CLIENT", None)
+        mocker.patch.object(api.async_oauth2.State, "LOCK", None)
+        mocker.patch.object(api.async_oauth2.oauth2.State, "JWKS", None)
+
+        # act
+        with pytest.raises(Exception) as exception:
+            asyncio.run(api.async_oauth2.check_cache())
+
+        # assert
+        assert str(exception.value) == "Error: async http client not configured"
@@ -0,0 +1,153 @@
+import contextvars
+import queue
+import threading
+
+import api.batch_scheduler
+import pytest
+
+
+class MockArtefacts:
+    def __init__(self, version):
+        self.version = version
+
+
+class MockMachineLearning:
+    def predict_causes(batch, artefacts=None):
+        return [
+            {"error": "Error: invalid or unknown symptom - unknown symptom"}
+            if record["subjective_symptoms"] == "unknown symptom"
+            else {"causes": [(record["subjective_symptoms"] + "|test cause", 50.00)]}
+            for record in batch
+        ]
+
+
+class TestBatchScheduler:
+    def test_predict_cause(_, mocker):
+        # arrange
+        mocker.patch.object(api.batch_scheduler.config, "BATCHING_MAX_WAIT_MS", 200)
+        mocker.patch.object(api.batch_scheduler.config, "BATCHING_MAX_BATCH_SIZE", 3)
+        mocker.patch(
+            "api.batch_scheduler.machine_learning.predict_causes",
+            MockMachineLearning.predict_causes,
+        )
+        spy_predict_causes = mocker.spy(
+            api.batch_scheduler.machine_learning, "predict_causes"
+        )
+        results = {}
+
+        def call(symptom):
+            results[symptom] = api.batch_scheduler.predict_cause(
+                symptom, "test objective symptom", "test gender"
+            )
+
+        # act
+        api.batch_scheduler.start()
+        threads = [
+            threading.Thread(target=call, args=(f"test symptom {index}",))
+            for index in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        statistics = api.batch_scheduler.read_statistics()
+        api.batch_scheduler.stop()
+
+        # assert
+        spy_predict_causes.assert_called_once()
+        assert len(spy_predict_causes.call_args.args[0]) == 3
+        for index in range(3):
+            assert results[f"test symptom {index}"] == [
+                (f"test symptom {index}|test cause", 50.00)
+            ]
+        assert statistics["batches"] == 1
+        assert statistics["requests"] == 3
+        assert statistics["max_batch_size"] == 3
+        assert statistics["batch_size_histogram"] == {3: 1}
+        assert statistics["queue_depth"] == 0
+
+    def test_predict_cause_error(_, mocker):
+        # arrange
+        mocker.patch.object(api.batch_scheduler.config, "BATCHING_MAX_WAIT_MS", 0)
+        mocker.patch(
+            "api.batch_scheduler.machine_learning.predict_causes",
+            MockMachineLearning.predict_causes,
+        )
+
+        # act
+        api.batch_scheduler.start()
+        with pytest.raises(Exception) as exception:
+            api.batch_scheduler.predict_cause(
+                "unknown symptom", "test objective symptom", "test gender"
+            )
+        api.batch_scheduler.stop()
+
+        # assert
+        assert str(exception.value) == (
+            "Error: invalid or unknown symptom - unknown symptom"
+        )
+
+    def test_predict_cause_not_started(_, mocker):
+        # arrange
+        mocker.patch.object(api.batch_scheduler.State, "QUEUE", None)
+
+        # act
+        with pytest.raises(Exception) as exception:
+            api.batch_scheduler.predict_cause(
+                "test symptom", "test objective symptom", "test gender"
+            )
+
+        # assert
+        assert str(exception.value) == "Error: batch scheduler not started"
+
+    def test_predict_cause_timeout(_, mocker):
+        # arrange
+        mocker.patch.object(api.batch_scheduler.config, "BATCHING_TIMEOUT", 0.01)
+        mocker.patch.object(api.batch_scheduler.State, "QUEUE", queue.Queue())
+
+        # act
+        with pytest.raises(Exception) as exception:
+            api.batch_scheduler.predict_cause(
+                "test symptom", "test objective symptom", "test gender"
+            )
+
+        # assert
+        assert str(exception.value) == "Error: batch scheduler timed out"
+
+    def test_predict_cause_model_reloaded(_, mocker):
+        # arrange
+        mocker.patch.object(api.batch_scheduler.config, "BATCHING_MAX_WAIT_MS", 0)
+        mocker.patch.object(
+            api.batch_scheduler.machine_learning.State,
+            "ARTEFACTS",
+            MockArtefacts("20221001000000"),
+        )
+
+        def predict_causes(batch, artefacts=None):
+            # a reload lands while the batch runs
+            api.batch_scheduler.machine_learning.State.ARTEFACTS = MockArtefacts(
+                "20221002000000"
+            )
+            return MockMachineLearning.predict_causes(batch, artefacts)
+
+        spy_predict_causes = mocker.patch(
+            "api.batch_scheduler.machine_learning.predict_causes",
+            side_effect=predict_causes,
+        )
+
+        def call():
+            api.batch_scheduler.predict_cause(
+                "test symptom", "test objective symptom", "test gender"
+            )
+            return api.batch_scheduler.machine_learning.read_model_version()
+
+        # act
+        api.batch_scheduler.start()
+        model_version = contextvars.copy_context().run(call)
+        api.batch_scheduler.stop()
+
+        # assert
+        assert spy_predict_causes.call_args.kwargs["artefacts"].version == (
+            "20221001000000"
+        )
+        assert model_version == "20221001000000"
@@ -0,0 +1,54 @@
+import benchmark.benchmark_machine_learning
+import benchmark.synthetic
+
+
+def make_results(p95, throughput):
+    return {
+        "backends": {
+            "numpy": {
+                "results": [
+                    {
+                        "benchmark": "predict_cause",
+                        "concurrency": 1,
+                        "batch_size": 1,
+                        "latency_ms": {"p50": p95 / 2, "p95": p95, "p99": p95 * 2},
+                        "throughput_rps": throughput,
+                    }
+                ]
+            }
+        }
+    }
+
+
+class TestBenchmarkMachineLearning:
+    def test_compare(_):
+        # arrange
+        baseline = make_results(1.0, 1000.0)
+
+        # act
+        unchanged = benchmark.benchmark_machine_learning.compare(
+            baseline, make_results(1.1, 900.0), 0.2
+        )
+        regressed = benchmark.benchmark_machine_learning.compare(
+            baseline, make_results(1.5, 500.0), 0.2
+        )
+
+        # assert
+        assert unchanged == []
+        assert regressed == [
+            "numpy predict_cause 1 1 p95 latency 1.000 -> 1.500 ms",
+            "numpy predict_cause 1 1 throughput 1000.0 -> 500.0 records/s",
+        ]
+
+    def test_make_records(_):
+        # act
+        records = benchmark.synthetic.make_records(3)
+
+        # assert
+        assert len(records) == 3
+        assert records == benchmark.synthetic.make_records(3)
+        for record in records:
+            assert (
+                record["subjective_symptoms"] in benchmark.synthetic.SUBJECTIVE_SYMPTOMS
+            )
+            assert record["gender"] in benchmark.synthetic.GENDERS
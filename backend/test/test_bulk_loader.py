@@ -0,0 +1,112 @@
+import api.migrations.bulk_loader
+from bson.objectid import ObjectId
+
+DATA = """[
+  {"_id": {"$oid": "63083e7c5b96e72df489b67d"}, "symptom": "test symptom"},
+  {"_id": {"$oid": "63083e7c5b96e72df489b67e"}, "symptom": "other, symptom ]"},
+  {"_id": {"$oid": "63083e7c5b96e72df489b67f"}, "symptom": "third symptom"}
+]
+"""
+
+
+class MockCollection:
+    def __init__(self):
+        self.batches = []
+        self.indexes = []
+        self.renamed = None
+
+    def drop(self):
+        self.batches = []
+
+    def insert_many(self, documents, ordered):
+        assert not ordered
+        self.batches.append(documents)
+
+    def index_information(self):
+        return {
+            "_id_": {"key": [("_id", 1)]},
+            "etiology_id": {"key": [("etiology_id", 1)]},
+        }
+
+    def create_index(self, keys, name, unique):
+        self.indexes.append((keys, name, unique))
+
+    def rename(self, name, dropTarget):
+        self.renamed = (name, dropTarget)
+
+
+class MockDatabase(dict):
+    def __missing__(self, key):
+        self[key] = MockCollection()
+        return self[key]
+
+    def list_collection_names(self):
+        return ["drugs"]
+
+    def create_collection(self, name):
+        return self[name]
+
+
+class TestBulkLoader:
+    def test_iter_documents(_, tmp_path):
+        # arrange
+        path = tmp_path / "subjective_symptoms.json"
+        path.write_text(DATA)
+
+        # act
+        documents = list(api.migrations.bulk_loader.iter_documents(str(path), 7))
+
+        # assert
+        assert documents == [
+            {"_id": ObjectId("63083e7c5b96e72df489b67d"), "symptom": "test symptom"},
+            {
+                "_id": ObjectId("63083e7c5b96e72df489b67e"),
+                "symptom": "other, symptom ]",
+            },
+            {"_id": ObjectId("63083e7c5b96e72df489b67f"), "symptom": "third symptom"},
+        ]
+
+    def test_load(_, tmp_path):
+        # arrange
+        path = tmp_path / "subjective_symptoms.json"
+        path.write_text(DATA)
+        database = MockDatabase()
+
+        # act
+        count = api.migrations.bulk_loader.load(
+            database, "subjective_symptoms", str(path), 2
+        )
+
+        # assert
+        assert count == 3
+        assert [
+            len(batch) for batch in database["subjective_symptoms_staging"].batches
+        ] == [2, 1]
+
+    def test_load_empty(_, tmp_path):
+        # arrange
+        path = tmp_path / "drugs.json"
+        path.write_text("[]\n")
+        database = MockDatabase()
+
+        # act
+        count = api.migrations.bulk_loader.load(database, "drugs", str(path))
+
+        # assert
+        assert count == 0
+        assert "drugs_staging" in database
+
+    def test_swap(_):
+        # arrange
+        database = MockDatabase()
+
+        # act
+        api.migrations.bulk_loader.swap(database, ["etiologies", "drugs"])
+
+        # assert
+        assert database["etiologies_staging"].indexes == []
+        assert database["etiologies_staging"].renamed == ("etiologies", True)
+        assert database["drugs_staging"].indexes == [
+            ([("etiology_id", 1)], "etiology_id", False)
+        ]
+        assert database["drugs_staging"].renamed == ("drugs", True)
@@ -1,3 +1,5 @@
+import datetime
+
 import api.document_db
 from bson.objectid import ObjectId
 
@@ -8,6 +10,23 @@ class MockSubjectiveSymptoms:
             {"_id": ObjectId("63083e7c5b96e72df489b67d"), "symptom": "test symptom"}
         ]
 
+    def aggregate(_, pipeline):
+        return [
+            {
+                "symptom": "test symptom",
+                "etiology": {
+                    "_id": ObjectId("630840445b96e72df489b6a7"),
+                    "cause": "test cause",
+                    "drugs": [
+                        {
+                            "_id": ObjectId("6308420c5b96e72df489b6b9"),
+                            "etiology_id": ObjectId("630840445b96e72df489b6a7"),
+                        }
+                    ],
+                },
+            }
+        ]
+
 
 class MockObjectiveSymptoms:
     def find(_, filter):
@@ -40,6 +59,68 @@ class MockEtiologies:
         }
 
 
+class MockCursor(list):
+    closed = False
+
+    def sort(self, key, direction):
+        return MockCursor(
+            sorted(self, key=lambda item: item[key], reverse=direction < 0)
+        )
+
+    def limit(self, limit):
+        return MockCursor(self[:limit])
+
+    def batch_size(self, _):
+        return self
+
+    def close(self):
+        self.closed = True
+
+
+class MockOrderedEtiologies:
+    ids = [
+        ObjectId("630840445b96e72df489b6a9"),
+        ObjectId("630840445b96e72df489b6a7"),
+        ObjectId("630840445b96e72df489b6a8"),
+    ]
+
+    def find(self, filter, projection=None):
+        documents = [
+            {"_id": id, "cause": "test cause", "etiology": "test etiology"}
+            for id in self.ids
+            if "_id" not in filter or id > filter["_id"]["$gt"]
+        ]
+        if projection is not None:
+            documents = [
+                {
+                    key: value
+                    for key, value in document.items()
+                    if key in projection or key == "_id"
+                }
+                for document in documents
+            ]
+        return MockCursor(documents)
+
+
+class MockExplainedCollection:
+    def __init__(self, winning_plan):
+        self.winning_plan = winning_plan
+
+    def find(self, filter):
+        return self
+
+    def explain(self):
+        return {"queryPlanner": {"winningPlan": self.winning_plan}}
+
+
+class MockDrugsByEtiologies:
+    def find(_, filter):
+        return [
+            {"_id": ObjectId("6308420c5b96e72df489b6b9"), "etiology_id": etiology_id}
+            for etiology_id in filter["etiology_id"]["$in"]
+        ]
+
+
 class MockDrugs:
     def find(_, filter):
         return [
@@ -48,13 +129,23 @@ class MockDrugs:
                 "dose": "test dose",
                 "drug_category": "test drug category",
                 "drug_use": "test drug use",
-                "etiology_id": ObjectId(filter["etiology_id"]),
+                "etiology_id": ObjectId(
+                    filter.get("etiology_id", "630840445b96e72df489b6a7")
+                ),
                 "mode_of_action": "test mode of action",
             }
         ]
 
 
+class MockReferenceDataVersion:
+    version = "20221001000000"
+
+    def find_one(self, filter):
+        return {"_id": filter["_id"], "version": self.version}
+
+
 class MockDatabase:
+    reference_data_version = MockReferenceDataVersion()
     subjective_symptoms = MockSubjectiveSymptoms()
     objective_symptoms = MockObjectiveSymptoms()
     etiologies = MockEtiologies()
@@ -69,6 +160,7 @@ class TestDocumentDB:
     def test_read_all_subjective_symptoms(_, mocker):
         # arrange
         mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.config, "REFERENCE_DATA_CACHE_TIMEOUT", 0)
         spy_subjective_symptoms_find = mocker.spy(
             api.document_db.State.MONGODB_CLIENT.ai_hospital_services.subjective_symptoms,
             "find",
@@ -87,6 +179,7 @@ class TestDocumentDB:
     def test_read_all_objective_symptoms(_, mocker):
         # arrange
         mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.config, "REFERENCE_DATA_CACHE_TIMEOUT", 0)
         spy_objective_symptoms_find = mocker.spy(
             api.document_db.State.MONGODB_CLIENT.ai_hospital_services.objective_symptoms,
             "find",
@@ -106,6 +199,7 @@ class TestDocumentDB:
     def test_read_all_etiologies(_, mocker):
         # arrange
         mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.config, "REFERENCE_DATA_CACHE_TIMEOUT", 0)
         spy_etiologies_find = mocker.spy(
             api.document_db.State.MONGODB_CLIENT.ai_hospital_services.etiologies,
             "find",
@@ -126,6 +220,7 @@ class TestDocumentDB:
     def test_read_etiology(_, mocker):
         # arrange
         mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.config, "REFERENCE_DATA_CACHE_TIMEOUT", 0)
         spy_etiology_find_one = mocker.spy(
             api.document_db.State.MONGODB_CLIENT.ai_hospital_services.etiologies,
             "find_one",
@@ -141,18 +236,17 @@ class TestDocumentDB:
                 "cause": "test cause",
             }
         )
-        assert result == str(
-            {
-                "_id": "630840445b96e72df489b6a7",
-                "cause": "test cause",
-                "etiology": "test etiology",
-                "subjective_symptom_id": "63083e7c5b96e72df489b67d",
-            }
-        )
+        assert result == {
+            "_id": "630840445b96e72df489b6a7",
+            "cause": "test cause",
+            "etiology": "test etiology",
+            "subjective_symptom_id": "63083e7c5b96e72df489b67d",
+        }
 
     def test_read_drugs(_, mocker):
         # arrange
         mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.config, "REFERENCE_DATA_CACHE_TIMEOUT", 0)
         spy_drugs_find = mocker.spy(
             api.document_db.State.MONGODB_CLIENT.ai_hospital_services.drugs,
             "find",
@@ -173,3 +267,275 @@ class TestDocumentDB:
             "etiology_id": "630840445b96e72df489b6a7",
             "mode_of_action": "test mode of action",
         }
+
+    def test_read_drugs_by_etiologies(_, mocker):
+        # arrange
+        mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.config, "REFERENCE_DATA_CACHE_TIMEOUT", 0)
+        database = api.document_db.State.MONGODB_CLIENT.ai_hospital_services
+        mocker.patch.object(database, "drugs", MockDrugsByEtiologies())
+        spy_drugs_find = mocker.spy(database.drugs, "find")
+
+        # act
+        result = api.document_db.read_drugs_by_etiologies(
+            ["630840445b96e72df489b6a7", "630840445b96e72df489b6a8"]
+        )
+
+        # assert
+        spy_drugs_find.assert_called_once_with(
+            {
+                "etiology_id": {
+                    "$in": [
+                        ObjectId("630840445b96e72df489b6a7"),
+                        ObjectId("630840445b96e72df489b6a8"),
+                    ]
+                }
+            }
+        )
+        assert list(result) == ["630840445b96e72df489b6a7", "630840445b96e72df489b6a8"]
+        assert result["630840445b96e72df489b6a8"][0]["_id"] == (
+            "6308420c5b96e72df489b6b9"
+        )
+
+    def test_read_etiologies_with_drugs(_, mocker):
+        # arrange
+        mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.config, "REFERENCE_DATA_CACHE_TIMEOUT", 0)
+        spy_subjective_symptoms_aggregate = mocker.spy(
+            api.document_db.State.MONGODB_CLIENT.ai_hospital_services.subjective_symptoms,
+            "aggregate",
+        )
+
+        # act
+        result = api.document_db.read_etiologies_with_drugs(
+            [("test symptom", "Test Cause"), ("test symptom", "unknown cause")]
+        )
+
+        # assert
+        spy_subjective_symptoms_aggregate.assert_called_once()
+        assert list(result) == [("test symptom", "test cause")]
+        assert result[("test symptom", "test cause")]["drugs"][0] == {
+            "_id": "6308420c5b96e72df489b6b9",
+            "etiology_id": "630840445b96e72df489b6a7",
+        }
+
+    def test_read_etiologies_with_drugs_cached(_, mocker):
+        # arrange
+        mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.State, "REFERENCE_DATA", None)
+        spy_subjective_symptoms_aggregate = mocker.spy(
+            api.document_db.State.MONGODB_CLIENT.ai_hospital_services.subjective_symptoms,
+            "aggregate",
+        )
+
+        # act
+        result = api.document_db.read_etiologies_with_drugs(
+            [("test symptom", "Test Cause"), ("test symptom", "unknown cause")]
+        )
+
+        # assert
+        spy_subjective_symptoms_aggregate.assert_not_called()
+        assert list(result) == [("test symptom", "test cause")]
+        assert result[("test symptom", "test cause")]["etiology"] == "test etiology"
+        assert result[("test symptom", "test cause")]["drugs"][0]["_id"] == (
+            "6308420c5b96e72df489b6b9"
+        )
+
+    def test_read_reference_data(_, mocker):
+        # arrange
+        mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.State, "REFERENCE_DATA", None)
+        mocker.patch.object(
+            api.document_db.config, "REFERENCE_DATA_VERSION_INTERVAL", 3600
+        )
+        database = api.document_db.State.MONGODB_CLIENT.ai_hospital_services
+        spy_etiologies_find = mocker.spy(database.etiologies, "find")
+        spy_etiology_find_one = mocker.spy(database.etiologies, "find_one")
+        spy_drugs_find = mocker.spy(database.drugs, "find")
+
+        # act
+        api.document_db.load_reference_data()
+        etiology = api.document_db.read_etiology(
+            "63083e7c5b96e72df489b67d", "Test Cause"
+        )
+        missing_etiology = api.document_db.read_etiology(
+            "63083e7c5b96e72df489b67d", "unknown cause"
+        )
+        drugs = api.document_db.read_drugs("630840445b96e72df489b6a7")
+        serialised = api.document_db.read_all_serialised("subjective_symptoms")
+        api.document_db.read_all_etiologies()
+
+        # assert
+        spy_etiologies_find.assert_called_once_with({})
+        spy_etiology_find_one.assert_not_called()
+        spy_drugs_find.assert_called_once_with({})
+        assert etiology == {
+            "_id": "630840445b96e72df489b6a7",
+            "cause": "test cause",
+            "etiology": "test etiology",
+            "subjective_symptom_id": "63083e7c5b96e72df489b67d",
+        }
+        assert missing_etiology is None
+        assert drugs[0]["_id"] == "6308420c5b96e72df489b6b9"
+        assert serialised == (
+            b'[{"_id":"63083e7c5b96e72df489b67d","symptom":"test symptom"}]\n'
+        )
+        assert api.document_db.State.REFERENCE_DATA.version == "20221001000000"
+
+    def test_read_reference_data_version_changed(_, mocker):
+        # arrange
+        mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.State, "REFERENCE_DATA", None)
+        mocker.patch.object(
+            api.document_db.config, "REFERENCE_DATA_VERSION_INTERVAL", 0
+        )
+        database = api.document_db.State.MONGODB_CLIENT.ai_hospital_services
+        spy_subjective_symptoms_find = mocker.spy(database.subjective_symptoms, "find")
+
+        # act
+        api.document_db.read_all_subjective_symptoms()
+        api.document_db.read_all_subjective_symptoms()
+        mocker.patch.object(
+            database.reference_data_version, "version", "20221002000000"
+        )
+        api.document_db.read_all_subjective_symptoms()
+
+        # assert
+        assert spy_subjective_symptoms_find.call_count == 2
+        assert api.document_db.State.REFERENCE_DATA.version == "20221002000000"
+
+    def test_read_symptoms_by_id_version_changed(_, mocker):
+        # arrange
+        mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.State, "REFERENCE_DATA", None)
+        mocker.patch.object(
+            api.document_db.config, "REFERENCE_DATA_VERSION_INTERVAL", 0
+        )
+        database = api.document_db.State.MONGODB_CLIENT.ai_hospital_services
+
+        # act
+        symptoms_by_id = api.document_db.read_symptoms_by_id()
+        mocker.patch.object(
+            database.reference_data_version, "version", "20221002000000"
+        )
+        changed_symptoms_by_id = api.document_db.read_symptoms_by_id()
+
+        # assert
+        assert symptoms_by_id == {
+            "63083e7c5b96e72df489b67d": "test symptom",
+            "63083f3e5b96e72df489b683": "test symptom",
+        }
+        assert changed_symptoms_by_id is not symptoms_by_id
+        assert changed_symptoms_by_id is (
+            api.document_db.State.REFERENCE_DATA.symptoms_by_id
+        )
+
+    def test_read_symptoms_by_id_not_cached(_, mocker):
+        # arrange
+        mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        mocker.patch.object(api.document_db.State, "SYMPTOMS_BY_ID", {})
+        mocker.patch.object(api.document_db.config, "REFERENCE_DATA_CACHE_TIMEOUT", 0)
+        database = api.document_db.State.MONGODB_CLIENT.ai_hospital_services
+        spy_subjective_symptoms_find = mocker.spy(database.subjective_symptoms, "find")
+
+        # act
+        symptoms_by_id = api.document_db.read_symptoms_by_id()
+        again_symptoms_by_id = api.document_db.read_symptoms_by_id()
+        mocker.patch.object(
+            database.reference_data_version, "version", "20221002000000"
+        )
+        changed_symptoms_by_id = api.document_db.read_symptoms_by_id()
+
+        # assert
+        assert spy_subjective_symptoms_find.call_count == 2
+        assert again_symptoms_by_id is symptoms_by_id
+        assert changed_symptoms_by_id is not symptoms_by_id
+        assert changed_symptoms_by_id == symptoms_by_id
+
+    def test_read_page(_, mocker):
+        # arrange
+        mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        database = api.document_db.State.MONGODB_CLIENT.ai_hospital_services
+        mocker.patch.object(database, "etiologies", MockOrderedEtiologies())
+        spy_etiologies_find = mocker.spy(database.etiologies, "find")
+
+        # act
+        first_page, first_after = api.document_db.read_page("etiologies", 2)
+        last_page, last_after = api.document_db.read_page(
+            "etiologies", 2, first_after, ["cause"]
+        )
+
+        # assert
+        assert [document["_id"] for document in first_page] == [
+            "630840445b96e72df489b6a7",
+            "630840445b96e72df489b6a8",
+        ]
+        assert first_after == "630840445b96e72df489b6a8"
+        assert last_page == [{"_id": "630840445b96e72df489b6a9", "cause": "test cause"}]
+        assert last_after is None
+        spy_etiologies_find.assert_called_with(
+            {"_id": {"$gt": ObjectId("630840445b96e72df489b6a8")}}, {"cause": 1}
+        )
+
+    def test_stream_all(_, mocker):
+        # arrange
+        mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        database = api.document_db.State.MONGODB_CLIENT.ai_hospital_services
+        mocker.patch.object(database, "etiologies", MockOrderedEtiologies())
+
+        # act
+        stream = api.document_db.stream_all("etiologies", fields=["etiology"])
+        first_line = next(stream)
+        lines = [first_line, *stream]
+
+        # assert
+        assert first_line == (
+            b'{"_id":"630840445b96e72df489b6a7","etiology":"test etiology"}\n'
+        )
+        assert len(lines) == 3
+
+    def test_check_query_plans(_, mocker):
+        # arrange
+        mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", MockServer())
+        database = api.document_db.State.MONGODB_CLIENT.ai_hospital_services
+        mocker.patch.object(
+            database,
+            "etiologies",
+            MockExplainedCollection(
+                {"queryPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+            ),
+        )
+        mocker.patch.object(
+            database, "drugs", MockExplainedCollection({"stage": "COLLSCAN"})
+        )
+
+        # act
+        result = api.document_db.check_query_plans()
+
+        # assert
+        assert result == ["drugs"]
+
+    def test_to_json(_):
+        # act
+        result = api.document_db.to_json(
+            {
+                "_id": ObjectId("6308420c5b96e72df489b6b9"),
+                "etiology_ids": [
+                    ObjectId("630840445b96e72df489b6a7"),
+                    {"etiology_id": ObjectId("630840445b96e72df489b6a8")},
+                ],
+                "updated_at": datetime.datetime(2022, 9, 1),
+                "dose": "test dose",
+            }
+        )
+
+        # assert
+        assert result == {
+            "_id": "6308420c5b96e72df489b6b9",
+            "etiology_ids": [
+                "630840445b96e72df489b6a7",
+                {"etiology_id": "630840445b96e72df489b6a8"},
+            ],
+            "updated_at": {"$date": "2022-09-01T00:00:00Z"},
+            "dose": "test dose",
+        }
@@ -0,0 +1,111 @@
+import api.document_db
+import api.embedded_db
+from bson import json_util
+from bson.objectid import ObjectId
+
+DATA = {
+    "subjective_symptoms": [
+        {"_id": ObjectId("63083e7c5b96e72df489b67d"), "symptom": "test symptom"}
+    ],
+    "objective_symptoms": [
+        {"_id": ObjectId("63083e7c5b96e72df489b68d"), "symptom": "test objective"}
+    ],
+    "etiologies": [
+        {
+            "_id": ObjectId("630840445b96e72df489b6a8"),
+            "subjective_symptom_id": ObjectId("63083e7c5b96e72df489b67d"),
+            "cause": "other cause",
+        },
+        {
+            "_id": ObjectId("630840445b96e72df489b6a7"),
+            "subjective_symptom_id": ObjectId("63083e7c5b96e72df489b67d"),
+            "cause": "test cause",
+        },
+    ],
+    "drugs": [
+        {
+            "_id": ObjectId("6308420c5b96e72df489b6b9"),
+            "etiology_id": ObjectId("630840445b96e72df489b6a7"),
+            "name": "test drug",
+        }
+    ],
+}
+
+
+def make_storage(tmp_path) -> api.embedded_db.Storage:
+    path = tmp_path / "20220901000000"
+    path.mkdir()
+    for collection, documents in DATA.items():
+        (path / f"{collection}.json").write_text(json_util.dumps(documents))
+    return api.embedded_db.Storage(str(path))
+
+
+class TestEmbeddedDB:
+    def test_read_version(_, tmp_path):
+        # arrange
+        storage = make_storage(tmp_path)
+
+        # act
+        version = storage.read_version()
+
+        # assert
+        assert version == "20220901000000"
+
+    def test_read_etiology(_, mocker, tmp_path):
+        # arrange
+        mocker.patch.object(api.document_db.State, "STORAGE", make_storage(tmp_path))
+
+        # act
+        result = api.document_db.read_etiology("63083e7c5b96e72df489b67d", "Test Cause")
+
+        # assert
+        assert result == {
+            "_id": "630840445b96e72df489b6a7",
+            "subjective_symptom_id": "63083e7c5b96e72df489b67d",
+            "cause": "test cause",
+        }
+
+    def test_read_etiologies_with_drugs(_, mocker, tmp_path):
+        # arrange
+        mocker.patch.object(api.document_db.State, "STORAGE", make_storage(tmp_path))
+
+        # act
+        result = api.document_db.read_etiologies_with_drugs(
+            [("test symptom", "test cause")]
+        )
+
+        # assert
+        assert result[("test symptom", "test cause")]["drugs"] == [
+            {
+                "_id": "6308420c5b96e72df489b6b9",
+                "etiology_id": "630840445b96e72df489b6a7",
+                "name": "test drug",
+            }
+        ]
+
+    def test_read_page(_, mocker, tmp_path):
+        # arrange
+        mocker.patch.object(api.document_db.State, "STORAGE", make_storage(tmp_path))
+
+        # act
+        first, first_after = api.document_db.read_page("etiologies", 1, None, ["cause"])
+        second, second_after = api.document_db.read_page(
+            "etiologies", 1, first_after, ["cause"]
+        )
+
+        # assert
+        assert first == [{"_id": "630840445b96e72df489b6a7", "cause": "test cause"}]
+        assert first_after == "630840445b96e72df489b6a7"
+        assert second == [{"_id": "630840445b96e72df489b6a8", "cause": "other cause"}]
+        assert second_after is None
+
+    def test_check_query_plans(_, mocker, tmp_path):
+        # arrange
+        mocker.patch.object(api.document_db.State, "STORAGE", make_storage(tmp_path))
+        mocker.patch.object(api.document_db.State, "MONGODB_CLIENT", None)
+
+        # act
+        collection_scans = api.document_db.check_query_plans()
+
+        # assert
+        assert collection_scans == []
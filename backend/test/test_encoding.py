@@ -0,0 +1,101 @@
+import gzip
+
+import api.encoding
+import msgpack
+import numpy as np
+from werkzeug.datastructures import Accept, MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags
+
+
+class TestEncoding:
+    def test_dumps(_):
+        # arrange
+        value = {"b": [("cause", np.float32(0.5))], "a": None}
+
+        # act
+        result = api.encoding.dumps(value)
+
+        # assert
+        assert result == b'{"a":null,"b":[["cause",0.5]]}'
+
+    def test_encode_compressed(_, mocker):
+        # arrange
+        mocker.patch.object(api.encoding.config, "RESPONSE_COMPRESSION_MIN_SIZE", 16)
+        mocker.patch.object(api.encoding, "brotli", None)
+        body = b"[" + b'"test symptom",' * 10 + b"null]"
+
+        # act
+        status, result, headers = api.encoding.encode(
+            body, parse_accept_header("br, gzip;q=0.8", Accept)
+        )
+
+        # assert
+        assert status == 200
+        assert headers["Content-Encoding"] == "gzip"
+        assert "ETag" not in headers
+        assert gzip.decompress(result) == body
+
+    def test_encode_small(_, mocker):
+        # arrange
+        mocker.patch.object(api.encoding.config, "RESPONSE_COMPRESSION_MIN_SIZE", 1024)
+
+        # act
+        status, result, headers = api.encoding.encode(
+            b"[]", parse_accept_header("gzip", Accept)
+        )
+
+        # assert
+        assert status == 200
+        assert result == b"[]"
+        assert "Content-Encoding" not in headers
+
+    def test_encode_not_modified(_, mocker):
+        # arrange
+        body = b'[{"_id":"63083e7c5b96e72df489b67d"}]'
+        etag = api.encoding.make_etag(body)
+
+        # act
+        status, result, headers = api.encoding.encode(
+            body, parse_accept_header("", Accept), parse_etags(f'W/"{etag}"')
+        )
+        changed_status, _, changed_headers = api.encoding.encode(
+            body, parse_accept_header("", Accept), parse_etags('W/"old"')
+        )
+
+        # assert
+        assert status == 304
+        assert result == b""
+        assert headers["ETag"] == f'W/"{etag}"'
+        assert changed_status == 200
+        assert changed_headers["ETag"] == f'W/"{etag}"'
+
+    def test_serialise_msgpack(_):
+        # arrange
+        value = [{"_id": "63083e7c5b96e72df489b67d", "causes": [("cause", 62.5)]}]
+
+        # act
+        result = api.encoding.serialise(value, api.encoding.MSGPACK_MIMETYPE)
+        transcoded = api.encoding.transcode(
+            api.encoding.dumps(value), api.encoding.MSGPACK_MIMETYPE
+        )
+
+        # assert
+        assert msgpack.unpackb(result) == [
+            {"_id": "63083e7c5b96e72df489b67d", "causes": [["cause", 62.5]]}
+        ]
+        assert msgpack.unpackb(transcoded) == msgpack.unpackb(result)
+
+    def test_negotiate_mimetype(_, mocker):
+        # arrange
+        accept = parse_accept_header("application/x-msgpack, */*;q=0.1", MIMEAccept)
+
+        # act
+        mimetype = api.encoding.negotiate_mimetype(accept)
+        default_mimetype = api.encoding.negotiate_mimetype(MIMEAccept())
+        mocker.patch.object(api.encoding, "msgpack", None)
+        unavailable_mimetype = api.encoding.negotiate_mimetype(accept)
+
+        # assert
+        assert mimetype == "application/x-msgpack"
+        assert default_mimetype == "application/json"
+        assert unavailable_mimetype == "application/json"
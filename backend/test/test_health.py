@@ -0,0 +1,61 @@
+import api.health
+
+
+class TestHealth:
+    def patch_state(mocker):
+        mocker.patch.object(api.health.State, "SUBSYSTEMS", {})
+        mocker.patch.object(api.health.State, "STARTUP_PHASES", [])
+
+    def test_read_readiness(_, mocker):
+        # arrange
+        TestHealth.patch_state(mocker)
+
+        def fail():
+            raise Exception("test error")
+
+        # act
+        with api.health.timed_phase("config"):
+            pass
+        api.health.run_phase("machine_learning", lambda: None)
+        api.health.run_phase("mongodb", fail)
+        not_ready, failed_status = api.health.read_readiness()
+        api.health.run_phase("mongodb", lambda: None)
+        ready, status = api.health.read_readiness()
+
+        # assert
+        assert not not_ready
+        assert failed_status["subsystems"]["mongodb"] == {
+            "status": "failed",
+            "attempts": 1,
+            "error": "test error",
+        }
+        assert ready
+        assert status["subsystems"] == {
+            "machine_learning": {"status": "ready", "attempts": 1},
+            "mongodb": {"status": "ready", "attempts": 2},
+        }
+        assert [phase["phase"] for phase in status["startup"]["phases"]] == [
+            "config",
+            "machine_learning",
+            "mongodb",
+        ]
+
+    def test_start_warm_up_retries_failed_phases(_, mocker):
+        # arrange
+        TestHealth.patch_state(mocker)
+        mocker.patch.object(api.health.config, "WARM_UP_RETRY_INTERVAL", 0)
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise Exception("test error")
+
+        # act
+        api.health.start_warm_up([("oauth2", flaky)])
+        api.health.State.WARM_UP_THREAD.join()
+        ready, status = api.health.read_readiness()
+
+        # assert
+        assert ready
+        assert status["subsystems"]["oauth2"] == {"status": "ready", "attempts": 3}
@@ -0,0 +1,92 @@
+import threading
+import time
+
+from api.lru_cache import LRUCache
+
+
+class TestLRUCache:
+    def test_get_set_evicts_least_recently_used(_):
+        # arrange
+        cache = LRUCache(max_size=2, timeout=None)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        # act
+        cache.set("c", 3)
+
+        # assert
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.statistics() == {
+            "size": 2,
+            "max_size": 2,
+            "hits": 3,
+            "misses": 1,
+            "evictions": 1,
+            "expirations": 0,
+            "coalesced": 0,
+        }
+
+    def test_get_expired(_, mocker):
+        # arrange
+        cache = LRUCache(max_size=2, timeout=10)
+        cache.set("a", 1)
+        cache.set("b", 2, timeout=100)
+        mocker.patch("api.lru_cache.time.monotonic", return_value=time.monotonic() + 50)
+
+        # act
+        result = (cache.get("a"), cache.get("b"))
+
+        # assert
+        assert result == (None, 2)
+        assert cache.statistics()["expirations"] == 1
+
+    def test_get_or_set_single_flight(_):
+        # arrange
+        cache = LRUCache(max_size=2, timeout=None)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return "value"
+
+        def call():
+            results.append(cache.get_or_set("key", compute))
+
+        # act
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        while cache.statistics()["coalesced"] < 2:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        # assert
+        assert len(calls) == 1
+        assert results == ["value", "value", "value"]
+
+    def test_get_or_set_cleared_while_computing(_):
+        # arrange
+        cache = LRUCache(max_size=2, timeout=None)
+
+        def compute():
+            cache.clear()
+            return "stale value"
+
+        # act
+        result = cache.get_or_set("key", compute)
+
+        # assert
+        assert result == "stale value"
+        assert cache.get("key") is None
@@ -1,101 +1,435 @@
-import array as arr
+import json
 
 import api.machine_learning
+import api.numpy_model
+import numpy as np
+import pytest
+from api.lru_cache import LRUCache
 
+SYMPTOMS_VOCABULARY = {
+    "test subjective symptom": 1,
+    "test objective symptom": 2,
+    "test gender": 3,
+}
 
-class MockSymptomsTokeniser:
-    def texts_to_sequences(_, corpus):
-        return [[1, 2, 3]]
+CAUSES_VOCABULARY = ["test cause 1", "test cause 2", "test cause 3"]
 
-    word_index = {
-        "test subjective symptom": 1,
-        "test objective symptom": 2,
-        "test gender": 3,
-    }
 
+class MockModel:
+    def predict(_, symptoms_padded):
+        return [[0.5, 0.25, 0.15, 0.04, 0.03, 0.01, 0.01, 0.01]]
 
-class MockCausesTokeniser:
-    index_word = {
-        1: "test cause 1",
-        2: "test cause 2",
-        3: "test cause 3",
-    }
 
+def build_numpy_model():
+    generator = np.random.default_rng(seed=42)
+    return api.numpy_model.Model(
+        [
+            api.numpy_model.Layer("Embedding", weights=[generator.normal(size=(4, 8))]),
+            api.numpy_model.Layer("GlobalAveragePooling1D"),
+            api.numpy_model.Layer(
+                "Dense",
+                activation="softmax",
+                weights=[generator.normal(size=(8, 3)), generator.normal(size=3)],
+            ),
+        ]
+    )
 
-class MockModel:
+
+class MockReversedModel:
     def predict(_, symptoms_padded):
-        return [[0.5, 0.25, 0.15, 0.04, 0.03, 0.01, 0.01, 0.01]]
+        return [[0.01, 0.01, 0.01, 0.03, 0.04, 0.15, 0.25, 0.5]]
 
 
-class TestMachineLearning:
-    def mock_pad_sequences(sequence, padding, maxlen):
-        return [[0, 0, 0, 0, 0, 0, 1, 2, 3]]
+class MockBatchModel:
+    def predict(_, symptoms_padded):
+        return [
+            [0.5, 0.25, 0.15, 0.04, 0.03, 0.01, 0.01, 0.01]
+            if row[-1] == 3
+            else [0.1, 0.2, 0.6, 0.04, 0.03, 0.01, 0.01, 0.01]
+            for row in symptoms_padded
+        ]
 
-    def mock_array(array):
-        return arr.array("i", [0, 0, 0, 0, 0, 0, 1, 2, 3])
 
-    def mock_argsort(array):
-        return arr.array("i", [7, 6, 5, 4, 3, 2, 1, 0])
+class TestMachineLearning:
+    def patch_state(mocker, model, prediction_cache=None):
+        mocker.patch.object(
+            api.machine_learning.State,
+            "ARTEFACTS",
+            api.machine_learning.Artefacts(
+                version="test version",
+                model=model,
+                symptoms_vocabulary=SYMPTOMS_VOCABULARY,
+                causes_vocabulary=CAUSES_VOCABULARY,
+                prediction_cache=prediction_cache,
+            ),
+        )
+        mocker.patch.object(
+            api.machine_learning.State, "SESSIONS", LRUCache(max_size=2, timeout=60)
+        )
 
-    def test_predict_cause(_, mocker):
-        # arrange
+    def write_artefacts(tmp_path, causes_word_index):
+        for name, word_index in [
+            ("symptoms_tokeniser.json", SYMPTOMS_VOCABULARY),
+            ("causes_tokeniser.json", causes_word_index),
+        ]:
+            (tmp_path / name).write_text(
+                json.dumps(
+                    {
+                        "class_name": "Tokenizer",
+                        "config": {
+                            "word_counts": json.dumps({"test": 1}),
+                            "word_docs": json.dumps({"test": 1}),
+                            "word_index": json.dumps(word_index),
+                        },
+                    }
+                )
+            )
+        (tmp_path / "model.h5").write_bytes(b"test model")
+
+    def patch_config(mocker, tmp_path):
+        mocker.patch.object(api.machine_learning.config, "MODEL_BACKEND", "numpy")
         mocker.patch.object(
-            api.machine_learning.State, "SYMPTOMS_TOKENISER", MockSymptomsTokeniser()
+            api.machine_learning.config,
+            "SYMPTOMS_TOKENISER_FILE",
+            str(tmp_path / "symptoms_tokeniser.json"),
         )
-        mocker.patch(
-            "api.machine_learning.tf.keras.preprocessing.sequence.pad_sequences",
-            TestMachineLearning.mock_pad_sequences,
+        mocker.patch.object(
+            api.machine_learning.config,
+            "CAUSES_TOKENISER_FILE",
+            str(tmp_path / "causes_tokeniser.json"),
+        )
+        mocker.patch.object(
+            api.machine_learning.config, "MODEL_FILE", str(tmp_path / "model.h5")
         )
-        mocker.patch("api.machine_learning.np.array", TestMachineLearning.mock_array)
-        mocker.patch.object(api.machine_learning.State, "MODEL", MockModel())
         mocker.patch(
-            "api.machine_learning.np.argsort", TestMachineLearning.mock_argsort
+            "api.machine_learning.numpy_model.load_model", return_value=MockModel()
         )
-        mocker.patch.object(
-            api.machine_learning.State, "CAUSES_TOKENISER", MockCausesTokeniser()
+        mocker.patch.object(api.machine_learning.State, "ARTEFACTS", None)
+
+    def test_configure(_, mocker, tmp_path):
+        # arrange
+        TestMachineLearning.write_artefacts(
+            tmp_path, {"test cause 2": 2, "test cause 1": 1}
         )
-        spy_symptoms_tokeniser_texts_to_sequences = mocker.spy(
-            api.machine_learning.State.SYMPTOMS_TOKENISER,
-            "texts_to_sequences",
+        TestMachineLearning.patch_config(mocker, tmp_path)
+
+        # act
+        api.machine_learning.configure()
+
+        # assert
+        artefacts = api.machine_learning.State.ARTEFACTS
+        assert artefacts.symptoms_vocabulary == SYMPTOMS_VOCABULARY
+        assert artefacts.causes_vocabulary == ["test cause 1", "test cause 2"]
+        assert len(artefacts.version) == 12
+
+    def test_configure_tflite(_, mocker, tmp_path):
+        # arrange
+        TestMachineLearning.write_artefacts(tmp_path, {"test cause 1": 1})
+        TestMachineLearning.patch_config(mocker, tmp_path)
+        mocker.patch.object(api.machine_learning.config, "MODEL_BACKEND", "tflite")
+        (tmp_path / "model_float16.tflite").write_bytes(b"test tflite model")
+        mock_load_model = mocker.patch(
+            "api.machine_learning.tflite_model.load_model", return_value=MockModel()
         )
-        spy_tf_pad_sequences = mocker.spy(
-            api.machine_learning.tf.keras.preprocessing.sequence,
-            "pad_sequences",
+
+        # act
+        api.machine_learning.configure()
+        mocker.patch(
+            "api.machine_learning.tflite_model.load_model",
+            return_value=MockReversedModel(),
         )
-        spy_numpy_array = mocker.spy(
-            api.machine_learning.np,
-            "array",
+        with pytest.raises(Exception) as exception:
+            api.machine_learning.load_artefacts()
+
+        # assert
+        mock_load_model.assert_called_once_with(str(tmp_path / "model_float16.tflite"))
+        assert isinstance(api.machine_learning.State.ARTEFACTS.model, MockModel)
+        assert str(exception.value) == (
+            "Error: top 3 agreement with the float model too low - 0.0"
+        )
+
+    def test_reload(_, mocker, tmp_path):
+        # arrange
+        TestMachineLearning.write_artefacts(tmp_path, {"test cause 1": 1})
+        TestMachineLearning.patch_config(mocker, tmp_path)
+        api.machine_learning.configure()
+        previous = api.machine_learning.State.ARTEFACTS
+
+        # act
+        unchanged = api.machine_learning.reload()
+        TestMachineLearning.write_artefacts(
+            tmp_path, {"test cause 1": 1, "test cause 2": 2}
         )
+        changed = api.machine_learning.reload()
+
+        # assert
+        assert unchanged == {"version": previous.version, "reloaded": False}
+        assert changed["reloaded"]
+        assert changed["version"] != previous.version
+        assert api.machine_learning.State.ARTEFACTS is not previous
+        assert api.machine_learning.State.ARTEFACTS.causes_vocabulary == [
+            "test cause 1",
+            "test cause 2",
+        ]
+        assert previous.causes_vocabulary == ["test cause 1"]
+
+    def test_reload_worker_pool(_, mocker, tmp_path):
+        # arrange
+        TestMachineLearning.write_artefacts(tmp_path, {"test cause 1": 1})
+        TestMachineLearning.patch_config(mocker, tmp_path)
+        mocker.patch.object(
+            api.machine_learning.config, "MODEL_RELOAD_GRACE_PERIOD", 60
+        )
+        api.machine_learning.configure()
+        pool = mocker.Mock(spec=api.machine_learning.worker_pool.Pool)
+        api.machine_learning.State.ARTEFACTS.model = pool
+        mock_timer = mocker.patch.object(api.machine_learning.threading, "Timer")
+
+        # act
+        api.machine_learning.reload(force=True)
+
+        # assert
+        pool.close.assert_not_called()
+        mock_timer.assert_called_once_with(60, pool.close)
+        mock_timer.return_value.start.assert_called_once()
+
+    def test_predict_cause(_, mocker):
+        # arrange
+        TestMachineLearning.patch_state(mocker, MockModel())
         spy_model_predict = mocker.spy(
-            api.machine_learning.State.MODEL,
+            api.machine_learning.State.ARTEFACTS.model,
             "predict",
         )
-        spy_numpy_argsort = mocker.spy(
+        spy_numpy_argpartition = mocker.spy(
             api.machine_learning.np,
-            "argsort",
+            "argpartition",
         )
 
         # act
         result = api.machine_learning.predict_cause(
+            "Test subjective symptom", "test objective symptom ", "test gender"
+        )
+
+        # assert
+        spy_model_predict.assert_called_once()
+        assert spy_model_predict.call_args.args[0].tolist() == [
+            [0, 0, 0, 0, 0, 0, 1, 2, 3]
+        ]
+        spy_numpy_argpartition.assert_called_once()
+        assert result == [
+            ("test cause 1", 50.00),
+            ("test cause 2", 25.00),
+            ("test cause 3", 15.00),
+        ]
+        assert api.machine_learning.read_model_version() == "test version"
+
+    def test_predict_cause_cached(_, mocker):
+        # arrange
+        TestMachineLearning.patch_state(
+            mocker,
+            MockModel(),
+            api.machine_learning.LRUCache(max_size=2, timeout=60),
+        )
+        spy_model_predict = mocker.spy(
+            api.machine_learning.State.ARTEFACTS.model,
+            "predict",
+        )
+
+        # act
+        first = api.machine_learning.predict_cause(
             "test subjective symptom", "test objective symptom", "test gender"
         )
+        second = api.machine_learning.predict_cause(
+            "test objective symptom", "test subjective symptom", "test gender"
+        )
+        batch = api.machine_learning.predict_causes(
+            [
+                {
+                    "subjective_symptoms": "test objective symptom",
+                    "objective_symptoms": "test gender",
+                    "gender": "test subjective symptom",
+                }
+            ]
+        )
 
         # assert
-        spy_symptoms_tokeniser_texts_to_sequences.assert_called_once_with(
-            ["test subjective symptom;test objective symptom;test gender"]
+        spy_model_predict.assert_called_once()
+        assert first == second == batch[0]["causes"]
+        statistics = api.machine_learning.read_cache_statistics()
+        assert statistics["hits"] == 2
+        assert statistics["misses"] == 1
+
+    def test_predict_cause_invalid_symptom(_, mocker):
+        # arrange
+        TestMachineLearning.patch_state(mocker, MockModel())
+
+        # act
+        with pytest.raises(Exception) as exception:
+            api.machine_learning.predict_cause(
+                "unknown symptom", "test objective symptom", "test gender"
+            )
+
+        # assert
+        assert str(exception.value) == (
+            "Error: invalid or unknown symptom - unknown symptom"
+        )
+
+    def test_update_session(_, mocker):
+        # arrange
+        model = build_numpy_model()
+        TestMachineLearning.patch_state(mocker, model)
+        embedding, head = api.numpy_model.split_embedding(model)
+        api.machine_learning.State.ARTEFACTS.embedding = embedding
+        api.machine_learning.State.ARTEFACTS.head = head
+        mocker.patch.object(api.machine_learning.config, "GENDERS", "test gender")
+
+        # act
+        session_id = api.machine_learning.create_session("Test Gender")
+        added = api.machine_learning.update_session(
+            session_id, add_symptoms="test subjective symptom;test objective symptom"
         )
-        spy_tf_pad_sequences.assert_called_once_with(
-            [[1, 2, 3]], padding="pre", maxlen=9
+        removed = api.machine_learning.update_session(
+            session_id, remove_symptoms="test objective symptom"
         )
-        spy_numpy_array.assert_called_once_with([[0, 0, 0, 0, 0, 0, 1, 2, 3]])
-        spy_model_predict.assert_called_once_with(
-            arr.array("i", [0, 0, 0, 0, 0, 0, 1, 2, 3])
+        unknown = api.machine_learning.update_session("unknown session")
+
+        # assert
+        assert added == api.machine_learning.predict_cause(
+            "test subjective symptom", "test objective symptom", "test gender"
         )
-        spy_numpy_argsort.assert_called_once_with(
-            [0.5, 0.25, 0.15, 0.04, 0.03, 0.01, 0.01, 0.01]
+        probabilities = model.predict(
+            api.numpy_model.pad_sequences([[1, 3]], padding="pre", maxlen=9)
+        )[0]
+        assert removed == [
+            (CAUSES_VOCABULARY[index], round(float(probabilities[index]) * 100, 2))
+            for index in np.argsort(-probabilities)
+        ]
+        assert unknown is None
+
+    def test_create_session_invalid_gender(_, mocker):
+        # arrange
+        TestMachineLearning.patch_state(mocker, MockModel())
+        mocker.patch.object(
+            api.machine_learning.config, "GENDERS", "test gender;other gender"
         )
-        assert result == [
-            ("test cause 1", 50.00),
-            ("test cause 2", 25.00),
-            ("test cause 3", 15.00),
+
+        # act
+        with pytest.raises(Exception) as symptom_exception:
+            api.machine_learning.create_session("test subjective symptom")
+        with pytest.raises(Exception) as unknown_exception:
+            api.machine_learning.create_session("other gender")
+
+        # assert
+        assert str(symptom_exception.value) == (
+            "Error: invalid or unknown gender - test subjective symptom"
+        )
+        assert str(unknown_exception.value) == (
+            "Error: invalid or unknown symptom - other gender"
+        )
+
+    def test_update_session_invalid_symptom(_, mocker):
+        # arrange
+        TestMachineLearning.patch_state(mocker, MockModel())
+        mocker.patch.object(api.machine_learning.config, "GENDERS", "test gender")
+        session_id = api.machine_learning.create_session("test gender")
+
+        # act
+        with pytest.raises(Exception) as unknown_exception:
+            api.machine_learning.update_session(
+                session_id, add_symptoms="unknown symptom"
+            )
+        with pytest.raises(Exception) as missing_exception:
+            api.machine_learning.update_session(
+                session_id, remove_symptoms="test subjective symptom"
+            )
+
+        # assert
+        assert str(unknown_exception.value) == (
+            "Error: invalid or unknown symptom - unknown symptom"
+        )
+        assert str(missing_exception.value) == (
+            "Error: symptom not in session - test subjective symptom"
+        )
+        assert api.machine_learning.State.SESSIONS.get(session_id).symptoms == []
+
+    def test_predict_cause_by_ids(_, mocker):
+        # arrange
+        TestMachineLearning.patch_state(mocker, MockModel())
+        symptoms_by_id = {
+            "63083e7c5b96e72df489b67d": "test subjective symptom",
+            "63083f3e5b96e72df489b683": "test objective symptom",
+            "63083f3e5b96e72df489b684": "not in vocabulary",
+        }
+        spy_model_predict = mocker.spy(
+            api.machine_learning.State.ARTEFACTS.model,
+            "predict",
+        )
+
+        # act
+        result = api.machine_learning.predict_cause_by_ids(
+            "63083e7c5b96e72df489b67d",
+            "63083f3e5b96e72df489b683",
+            "test gender",
+            symptoms_by_id,
+        )
+
+        # assert
+        assert spy_model_predict.call_args.args[0].tolist() == [
+            [0, 0, 0, 0, 0, 0, 1, 2, 3]
+        ]
+        assert result[0] == ("test cause 1", 50.00)
+        with pytest.raises(Exception):
+            api.machine_learning.predict_cause_by_ids(
+                "63083f3e5b96e72df489b684",
+                "63083f3e5b96e72df489b683",
+                "test gender",
+                symptoms_by_id,
+            )
+
+    def test_predict_causes(_, mocker):
+        # arrange
+        TestMachineLearning.patch_state(mocker, MockBatchModel())
+        spy_model_predict = mocker.spy(
+            api.machine_learning.State.ARTEFACTS.model,
+            "predict",
+        )
+
+        # act
+        result = api.machine_learning.predict_causes(
+            [
+                {
+                    "subjective_symptoms": "test subjective symptom",
+                    "objective_symptoms": "test objective symptom",
+                    "gender": "test gender",
+                },
+                {
+                    "subjective_symptoms": "unknown symptom",
+                    "objective_symptoms": "test objective symptom",
+                    "gender": "test gender",
+                },
+                {
+                    "subjective_symptoms": "test subjective symptom",
+                    "objective_symptoms": "test gender",
+                    "gender": "test objective symptom",
+                },
+                {"subjective_symptoms": "test subjective symptom"},
+            ],
+            top_k=2,
+        )
+
+        # assert
+        spy_model_predict.assert_called_once()
+        assert spy_model_predict.call_args.args[0].tolist() == [
+            [0, 0, 0, 0, 0, 0, 1, 2, 3],
+            [0, 0, 0, 0, 0, 0, 1, 3, 2],
         ]
+        assert result[0] == {
+            "causes": [("test cause 1", 50.00), ("test cause 2", 25.00)]
+        }
+        assert result[1] == {
+            "error": "Error: invalid or unknown symptom - unknown symptom"
+        }
+        assert result[2] == {
+            "causes": [("test cause 3", 60.00), ("test cause 2", 20.00)]
+        }
+        assert "error" in result[3]
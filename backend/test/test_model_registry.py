@@ -0,0 +1,102 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import api.model_registry
+
+
+def patch_state(mocker, models, weights, shadow=""):
+    mocker.patch.object(api.model_registry.config, "MODEL_NAME", "default")
+    mocker.patch.object(api.model_registry.config, "MODEL_SHADOW", shadow)
+    mocker.patch.object(api.model_registry.State, "MODELS", models)
+    mocker.patch.object(api.model_registry.State, "WEIGHTS", weights)
+    mocker.patch.object(api.model_registry.State, "STATISTICS", {})
+    mocker.patch.object(
+        api.model_registry.State, "SHADOW_EXECUTOR", ThreadPoolExecutor(max_workers=1)
+    )
+    mocker.patch.object(
+        api.model_registry.State, "SHADOW_SLOTS", threading.BoundedSemaphore(1)
+    )
+
+
+def predict(artefacts):
+    if artefacts is None:
+        return [
+            ("test symptom|test cause 1", 60.0),
+            ("test symptom|test cause 2", 40.0),
+        ]
+    return [("test symptom|test cause 2", 70.0), ("test symptom|test cause 3", 30.0)]
+
+
+class TestModelRegistry:
+    def test_predict_routing_header(_, mocker):
+        # arrange
+        patch_state(mocker, {"candidate": "test artefacts"}, {"candidate": 0.0})
+
+        # act
+        result = api.model_registry.predict(predict, "candidate")
+        model_name = api.model_registry.read_model_name()
+
+        # assert
+        assert result == [
+            ("test symptom|test cause 2", 70.0),
+            ("test symptom|test cause 3", 30.0),
+        ]
+        assert model_name == "candidate"
+
+    def test_predict_routing_weight(_, mocker):
+        # arrange
+        patch_state(
+            mocker,
+            {"candidate": "test artefacts"},
+            {"candidate": 1.0, "default": 0.0},
+        )
+
+        # act
+        api.model_registry.predict(predict, "unknown model")
+        statistics = api.model_registry.read_statistics()
+
+        # assert
+        assert statistics["candidate"]["requests"] == 1
+        assert "default" not in statistics
+
+    def test_predict_shadow(_, mocker):
+        # arrange
+        patch_state(
+            mocker,
+            {"candidate": "test artefacts"},
+            {"candidate": 0.0, "default": 1.0},
+            shadow="candidate",
+        )
+
+        # act
+        result = api.model_registry.predict(predict)
+        api.model_registry.State.SHADOW_EXECUTOR.shutdown(wait=True)
+        statistics = api.model_registry.read_statistics()
+
+        # assert
+        assert result[0] == ("test symptom|test cause 1", 60.0)
+        assert api.model_registry.read_model_name() == "default"
+        assert statistics["default"]["requests"] == 1
+        assert statistics["candidate"]["requests"] == 1
+        assert statistics["candidate"]["shadow_comparisons"] == 1
+        assert statistics["candidate"]["top1_agreement_rate"] == 0.0
+        assert statistics["candidate"]["mean_topk_overlap"] == 0.5
+        assert set(statistics["default"]["latency_ms"]) == {"p50", "p95", "p99"}
+
+    def test_predict_shadow_dropped(_, mocker):
+        # arrange
+        patch_state(
+            mocker,
+            {"candidate": "test artefacts"},
+            {"candidate": 0.0, "default": 1.0},
+            shadow="candidate",
+        )
+        api.model_registry.State.SHADOW_SLOTS.acquire()
+
+        # act
+        api.model_registry.predict(predict)
+        statistics = api.model_registry.read_statistics()
+
+        # assert
+        assert statistics["candidate"]["shadow_dropped"] == 1
+        assert statistics["candidate"]["shadow_comparisons"] == 0
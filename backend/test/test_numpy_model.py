@@ -0,0 +1,98 @@
+import api.numpy_model
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+
+def build_keras_model():
+    tf.random.set_seed(42)
+    model = tf.keras.Sequential(
+        [
+            tf.keras.Input(shape=(9,)),
+            tf.keras.layers.Embedding(input_dim=12, output_dim=16),
+            tf.keras.layers.GlobalAveragePooling1D(),
+            tf.keras.layers.Dense(32, activation="relu"),
+            tf.keras.layers.Dense(8, activation="softmax"),
+        ]
+    )
+    return model
+
+
+class TestNumpyModel:
+    symptoms_padded = np.array(
+        [
+            [0, 0, 0, 0, 0, 0, 1, 2, 3],
+            [0, 0, 0, 0, 0, 4, 5, 6, 11],
+            [7, 8, 9, 10, 1, 2, 3, 4, 5],
+        ]
+    )
+
+    def test_load_model_h5(_, tmp_path):
+        # arrange
+        keras_model = build_keras_model()
+        keras_model.save(tmp_path / "model.h5")
+
+        # act
+        model = api.numpy_model.load_model(str(tmp_path / "model.h5"))
+        result = model.predict(TestNumpyModel.symptoms_padded)
+
+        # assert
+        assert [layer.class_name for layer in model.layers] == [
+            "Embedding",
+            "GlobalAveragePooling1D",
+            "Dense",
+            "Dense",
+        ]
+        np.testing.assert_allclose(
+            result,
+            keras_model.predict(TestNumpyModel.symptoms_padded),
+            rtol=1e-5,
+            atol=1e-6,
+        )
+
+    def test_save_model_npz(_, tmp_path):
+        # arrange
+        keras_model = build_keras_model()
+        keras_model.save(tmp_path / "model.h5")
+        model = api.numpy_model.load_model(str(tmp_path / "model.h5"))
+
+        # act
+        api.numpy_model.save_model(model, str(tmp_path / "model.npz"))
+        result = api.numpy_model.load_model(str(tmp_path / "model.npz"))
+
+        # assert
+        np.testing.assert_array_equal(
+            result.predict(TestNumpyModel.symptoms_padded),
+            model.predict(TestNumpyModel.symptoms_padded),
+        )
+
+    def test_split_embedding(_):
+        # arrange
+        keras_model = build_keras_model()
+
+        # act
+        embedding, head = api.numpy_model.split_embedding(keras_model)
+        result = head.predict(embedding[TestNumpyModel.symptoms_padded].mean(axis=1))
+
+        # assert
+        assert [layer.class_name for layer in head.layers] == ["Dense", "Dense"]
+        np.testing.assert_allclose(
+            result,
+            keras_model.predict(TestNumpyModel.symptoms_padded),
+            rtol=1e-5,
+            atol=1e-6,
+        )
+
+    def test_pad_sequences(_):
+        # act
+        result = api.numpy_model.pad_sequences(
+            [[1, 2, 3], [], list(range(1, 12))], padding="pre", maxlen=9
+        )
+
+        # assert
+        assert result.tolist() == [
+            [0, 0, 0, 0, 0, 0, 1, 2, 3],
+            [0, 0, 0, 0, 0, 0, 0, 0, 0],
+            [3, 4, 5, 6, 7, 8, 9, 10, 11],
+        ]
@@ -0,0 +1,131 @@
+import time
+
+import api.oauth2
+from jwcrypto import jwk, jwt
+
+KEY = jwk.JWK.generate(kty="RSA", size=2048, kid="test key")
+
+
+def make_token(scope, expires_in=3600) -> str:
+    token = jwt.JWT(
+        header={"alg": "RS256", "kid": "test key"},
+        claims={"scope": scope, "exp": int(time.time()) + expires_in},
+    )
+    token.make_signed_token(KEY)
+    return token.serialize()
+
+
+def set_tenant_configuration(mocker) -> None:
+    keys = jwk.JWKSet()
+    keys.add(KEY)
+    mocker.patch.object(api.oauth2.State, "CACHE", None)
+    mocker.patch.object(api.oauth2.State, "JWKS_SOURCE", None)
+    mocker.patch.object(api.oauth2.State, "JWKS", None)
+    mocker.patch.object(api.oauth2.State, "TOKEN_URL", None)
+    mocker.patch.object(api.oauth2.State, "TOKEN_CACHE", None)
+    mocker.patch.object(api.oauth2.config, "TOKEN_CACHE_MAX_SIZE", 2)
+    api.oauth2.configure_token_cache()
+    api.oauth2.set_tenant_configuration(
+        {"token_endpoint": "https://tenant/oauth/token"},
+        keys.export(private_keys=False),
+    )
+
+
+class TestOAuth2:
+    def test_verify_access_token_cached(_, mocker):
+        # arrange
+        set_tenant_configuration(mocker)
+        token = make_token("read:drugs read:etiologies")
+        spy_deserialize = mocker.spy(jwt.JWT, "deserialize")
+
+        # act
+        first = api.oauth2.verify_access_token(token, "read:drugs")
+        second = api.oauth2.verify_access_token(token, "read:etiologies read:drugs")
+        missing = api.oauth2.verify_access_token(token, "read")
+
+        # assert
+        assert first is True
+        assert second is True
+        assert missing is False
+        spy_deserialize.assert_called_once()
+        assert api.oauth2.read_token_cache_statistics()["hits"] == 2
+
+    def test_verify_access_token_expired(_, mocker):
+        # arrange
+        set_tenant_configuration(mocker)
+        token = make_token("read:drugs", expires_in=-3600)
+
+        # act
+        result = api.oauth2.verify_access_token(token, "read:drugs")
+
+        # assert
+        assert result is False
+        assert api.oauth2.read_token_cache_statistics()["size"] == 0
+
+    def test_verify_access_token_keys_changed(_, mocker):
+        # arrange
+        set_tenant_configuration(mocker)
+        token = make_token("read:drugs")
+        api.oauth2.verify_access_token(token, "read:drugs")
+        other_keys = jwk.JWKSet()
+        other_keys.add(jwk.JWK.generate(kty="RSA", size=2048, kid="test key"))
+
+        # act
+        api.oauth2.set_tenant_configuration(
+            {"token_endpoint": "https://tenant/oauth/token"},
+            other_keys.export(private_keys=False),
+        )
+        result = api.oauth2.verify_access_token(token, "read:drugs")
+
+        # assert
+        assert result is False
+
+    def test_refresh_cache_state_failed(_, mocker):
+        # arrange
+        set_tenant_configuration(mocker)
+        jwks = api.oauth2.State.JWKS
+        mocker.patch.object(api.oauth2.State, "REFRESH_TRIED_AT", None)
+        mock_init_cache_state = mocker.patch.object(
+            api.oauth2, "init_cache_state", side_effect=Exception("tenant down")
+        )
+
+        # act
+        refreshed = api.oauth2.refresh_cache_state()
+
+        # assert
+        assert refreshed is False
+        mock_init_cache_state.assert_called_once()
+        assert api.oauth2.State.JWKS is jwks
+        assert api.oauth2.is_refresh_due() is False
+
+    def test_refresh_cache_state_running(_, mocker):
+        # arrange
+        set_tenant_configuration(mocker)
+        mock_init_cache_state = mocker.patch.object(api.oauth2, "init_cache_state")
+
+        # act
+        with api.oauth2.State.LOCK:
+            refreshed = api.oauth2.refresh_cache_state()
+
+        # assert
+        assert refreshed is False
+        mock_init_cache_state.assert_not_called()
+
+    def test_check_cache_expired(_, mocker):
+        # arrange
+        set_tenant_configuration(mocker)
+        mocker.patch.object(api.oauth2.State, "REFRESH_TRIED_AT", None)
+        api.oauth2.State.CACHE.clear()
+        mock_thread = mocker.patch.object(api.oauth2.threading, "Thread")
+        mock_init_cache_state = mocker.patch.object(api.oauth2, "init_cache_state")
+
+        # act
+        api.oauth2.check_cache()
+        api.oauth2.check_cache()
+
+        # assert
+        mock_init_cache_state.assert_not_called()
+        mock_thread.assert_called_once_with(
+            target=api.oauth2.refresh_cache_state, name="tenant-refresh", daemon=True
+        )
+        assert api.oauth2.State.REFRESH_TRIED_AT is not None
@@ -0,0 +1,120 @@
+import api.document_db
+import api.snapshot
+
+COLLECTIONS = {
+    "subjective_symptoms": [
+        {"_id": "63083e7c5b96e72df489b67d", "symptom": "test symptom"},
+        {"_id": "63083e7c5b96e72df489b67e", "symptom": "other symptom"},
+    ],
+    "objective_symptoms": [{"_id": "63083e7c5b96e72df489b68d", "symptom": "é"}],
+    "etiologies": [
+        {
+            "_id": "630840445b96e72df489b6a8",
+            "subjective_symptom_id": "63083e7c5b96e72df489b67d",
+            "cause": "other cause",
+        },
+        {
+            "_id": "630840445b96e72df489b6a7",
+            "subjective_symptom_id": "63083e7c5b96e72df489b67d",
+            "cause": "test cause",
+        },
+    ],
+    "drugs": [
+        {
+            "_id": "6308420c5b96e72df489b6ba",
+            "etiology_id": "630840445b96e72df489b6a7",
+            "name": "second drug",
+        },
+        {
+            "_id": "6308420c5b96e72df489b6b9",
+            "etiology_id": "630840445b96e72df489b6a7",
+            "name": "first drug",
+        },
+    ],
+}
+
+
+def make_storage(tmp_path) -> api.snapshot.Storage:
+    path = str(tmp_path / "reference_data.snapshot")
+    api.snapshot.write(path, "20221002000000", COLLECTIONS)
+    return api.snapshot.Storage(path)
+
+
+class TestSnapshot:
+    def test_read_serialised(_, mocker, tmp_path):
+        # arrange
+        mocker.patch.object(api.document_db.State, "STORAGE", make_storage(tmp_path))
+
+        # act
+        result = api.document_db.read_all_serialised("etiologies")
+
+        # assert
+        assert result == api.document_db.serialise(
+            sorted(COLLECTIONS["etiologies"], key=lambda document: document["_id"])
+        )
+        assert api.document_db.State.STORAGE.read_version() == "20221002000000"
+
+    def test_read_etiology(_, mocker, tmp_path):
+        # arrange
+        mocker.patch.object(api.document_db.State, "STORAGE", make_storage(tmp_path))
+
+        # act
+        result = api.document_db.read_etiology("63083e7c5b96e72df489b67d", "Test Cause")
+        missing = api.document_db.read_etiology(
+            "63083e7c5b96e72df489b67e", "test cause"
+        )
+
+        # assert
+        assert result == COLLECTIONS["etiologies"][1]
+        assert missing is None
+
+    def test_read_etiologies_with_drugs(_, mocker, tmp_path):
+        # arrange
+        mocker.patch.object(api.document_db.State, "STORAGE", make_storage(tmp_path))
+
+        # act
+        result = api.document_db.read_etiologies_with_drugs(
+            [("test symptom", "test cause"), ("other symptom", "test cause")]
+        )
+
+        # assert
+        assert result == {
+            ("test symptom", "test cause"): {
+                **COLLECTIONS["etiologies"][1],
+                "drugs": [COLLECTIONS["drugs"][1], COLLECTIONS["drugs"][0]],
+            }
+        }
+
+    def test_read_page(_, mocker, tmp_path):
+        # arrange
+        mocker.patch.object(api.document_db.State, "STORAGE", make_storage(tmp_path))
+
+        # act
+        first, first_after = api.document_db.read_page("drugs", 1, None, ["name"])
+        second, second_after = api.document_db.read_page(
+            "drugs", 1, first_after, ["name"]
+        )
+
+        # assert
+        assert first == [{"_id": "6308420c5b96e72df489b6b9", "name": "first drug"}]
+        assert first_after == "6308420c5b96e72df489b6b9"
+        assert second == [{"_id": "6308420c5b96e72df489b6ba", "name": "second drug"}]
+        assert second_after is None
+
+    def test_read_symptoms_by_id(_, mocker, tmp_path):
+        # arrange
+        mocker.patch.object(api.document_db.State, "STORAGE", make_storage(tmp_path))
+        spy_find_all = mocker.spy(api.document_db.State.STORAGE, "find_all")
+
+        # act
+        result = api.document_db.read_symptoms_by_id()
+        again = api.document_db.read_symptoms_by_id()
+
+        # assert
+        assert result == {
+            "63083e7c5b96e72df489b67d": "test symptom",
+            "63083e7c5b96e72df489b67e": "other symptom",
+            "63083e7c5b96e72df489b68d": "é",
+        }
+        assert again is result
+        assert spy_find_all.call_count == 2
@@ -0,0 +1,77 @@
+import api.tflite_model
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+
+def build_keras_model():
+    tf.random.set_seed(42)
+    model = tf.keras.Sequential(
+        [
+            tf.keras.Input(shape=(9,)),
+            tf.keras.layers.Embedding(input_dim=12, output_dim=16),
+            tf.keras.layers.GlobalAveragePooling1D(),
+            tf.keras.layers.Dense(32, activation="relu"),
+            tf.keras.layers.Dense(8, activation="softmax"),
+        ]
+    )
+    return model
+
+
+class TestTfliteModel:
+    symptoms_padded = np.array(
+        [
+            [0, 0, 0, 0, 0, 0, 1, 2, 3],
+            [0, 0, 0, 0, 0, 4, 5, 6, 11],
+            [7, 8, 9, 10, 1, 2, 3, 4, 5],
+        ]
+    )
+
+    def test_save_model_float16(_, tmp_path):
+        # arrange
+        keras_model = build_keras_model()
+
+        # act
+        api.tflite_model.save_model(
+            keras_model, str(tmp_path / "model_float16.tflite"), "float16"
+        )
+        model = api.tflite_model.load_model(str(tmp_path / "model_float16.tflite"))
+        result = model.predict(TestTfliteModel.symptoms_padded)
+        single_result = model.predict(TestTfliteModel.symptoms_padded[:1])
+
+        # assert
+        np.testing.assert_allclose(
+            result,
+            keras_model.predict(TestTfliteModel.symptoms_padded),
+            atol=1e-3,
+        )
+        np.testing.assert_allclose(single_result, result[:1], atol=1e-6)
+
+    def test_save_model_int8(_, tmp_path):
+        # arrange
+        keras_model = build_keras_model()
+
+        # act
+        api.tflite_model.save_model(
+            keras_model,
+            str(tmp_path / "model_int8.tflite"),
+            "int8",
+            TestTfliteModel.symptoms_padded,
+        )
+        model = api.tflite_model.load_model(str(tmp_path / "model_int8.tflite"))
+        result = model.predict(TestTfliteModel.symptoms_padded)
+
+        # assert
+        assert result.shape == (3, 8)
+        np.testing.assert_allclose(result.sum(axis=1), 1, atol=0.05)
+
+    def test_save_model_unsupported(_, tmp_path):
+        # act
+        with pytest.raises(Exception) as exception:
+            api.tflite_model.save_model(
+                build_keras_model(), str(tmp_path / "model.tflite"), "int4"
+            )
+
+        # assert
+        assert str(exception.value) == "Error: unsupported quantisation - int4"
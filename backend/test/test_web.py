@@ -0,0 +1,82 @@
+import api.web
+from flask import Response
+from werkzeug.datastructures import Accept, MIMEAccept
+from werkzeug.http import parse_accept_header
+
+
+class MockRequest:
+    def __init__(self, args=None, headers=None, accept="application/json"):
+        self.args = args or {}
+        self.headers = headers or {}
+        self.accept_mimetypes = parse_accept_header(accept, MIMEAccept)
+        self.accept_encodings = parse_accept_header("", Accept)
+        self.if_none_match = None
+
+
+class TestWeb:
+    def test_get_page_arguments(_):
+        # arrange
+        request = MockRequest(
+            args={
+                "limit": "2",
+                "after": "630840445b96e72df489b6a7",
+                "fields": "cause,,etiology",
+            }
+        )
+
+        # act
+        result = api.web.get_page_arguments(request, "etiologies")
+
+        # assert
+        assert result == (2, "630840445b96e72df489b6a7", ["cause", "etiology"])
+
+    def test_get_page_arguments_invalid(_):
+        # act
+        results = [
+            api.web.get_page_arguments(MockRequest(args=args), "etiologies")
+            for args in [
+                {"limit": "x"},
+                {"limit": "0"},
+                {"after": "x"},
+                {"fields": "cause,unknown"},
+                {"fields": "$where"},
+                {"fields": "symptom"},
+            ]
+        ]
+
+        # assert
+        assert results == [None] * 6
+
+    def test_get_etiology_ids(_):
+        # act
+        result = api.web.get_etiology_ids("630840445b96e72df489b6a7,,")
+        invalid = api.web.get_etiology_ids("630840445b96e72df489b6a7,x")
+
+        # assert
+        assert result == ["630840445b96e72df489b6a7"]
+        assert invalid is None
+
+    def test_make_prediction_response(_, mocker):
+        # arrange
+        mocker.patch.object(api.web.config, "MODEL_ROUTING_HEADER_KEY", "X-Model")
+        request = MockRequest(headers={"X-Model": "test model"})
+
+        # act
+        response = api.web.make_prediction_response(
+            Response,
+            request,
+            [{"causes": []}],
+            "20221001000000",
+            api.web.get_model_name(request),
+        )
+        missing = api.web.make_prediction_response(
+            Response, request, None, None, "test model"
+        )
+
+        # assert
+        assert response.status_code == 200
+        assert response.get_data() == b'[{"causes":[]}]'
+        assert response.headers["X-Model-Version"] == "20221001000000"
+        assert response.headers["X-Model"] == "test model"
+        assert missing.status_code == 404
+        assert "X-Model-Version" not in missing.headers
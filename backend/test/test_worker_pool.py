@@ -0,0 +1,129 @@
+import os
+import signal
+import threading
+import time
+
+import api.numpy_model
+import api.worker_pool
+import numpy as np
+import pytest
+
+
+def build_numpy_model():
+    generator = np.random.default_rng(seed=42)
+    return api.numpy_model.Model(
+        [
+            api.numpy_model.Layer(
+                "Embedding", weights=[generator.normal(size=(12, 8))]
+            ),
+            api.numpy_model.Layer("GlobalAveragePooling1D"),
+            api.numpy_model.Layer(
+                "Dense",
+                activation="softmax",
+                weights=[generator.normal(size=(8, 4)), generator.normal(size=4)],
+            ),
+        ]
+    )
+
+
+class TestWorkerPool:
+    symptoms_padded = np.array(
+        [
+            [0, 0, 0, 0, 0, 0, 1, 2, 3],
+            [0, 0, 0, 0, 0, 4, 5, 6, 11],
+            [7, 8, 9, 10, 1, 2, 3, 4, 5],
+        ]
+    )
+
+    def test_predict(_):
+        # arrange
+        model = build_numpy_model()
+        pool = api.worker_pool.Pool(model, 2)
+        results = {}
+
+        def call(row):
+            results[row] = pool.predict(TestWorkerPool.symptoms_padded[row : row + 1])
+
+        # act
+        try:
+            result = pool.predict(TestWorkerPool.symptoms_padded)
+            threads = [threading.Thread(target=call, args=(row,)) for row in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            pool.close()
+
+        # assert
+        expected = model.predict(TestWorkerPool.symptoms_padded)
+        np.testing.assert_allclose(result, expected)
+        for row in range(3):
+            np.testing.assert_allclose(results[row], expected[row : row + 1])
+
+    def test_predict_error(_):
+        # arrange
+        pool = api.worker_pool.Pool(build_numpy_model(), 1)
+
+        # act
+        try:
+            with pytest.raises(Exception) as exception:
+                pool.predict([[0, 0, 99]])
+        finally:
+            pool.close()
+        with pytest.raises(Exception) as closed_exception:
+            pool.predict(TestWorkerPool.symptoms_padded)
+
+        # assert
+        assert str(exception.value).startswith("Error: index 99 is out of bounds")
+        assert str(closed_exception.value) == "Error: inference worker pool closed"
+
+    def test_predict_timeout(_):
+        # arrange
+        pool = api.worker_pool.Pool(build_numpy_model(), 1, timeout=0.001)
+
+        # act
+        try:
+            # the worker is still starting
+            with pytest.raises(Exception) as exception:
+                pool.predict(TestWorkerPool.symptoms_padded)
+        finally:
+            pool.close()
+
+        # assert
+        assert str(exception.value) == "Error: inference worker pool timed out"
+
+    def test_predict_worker_exited(_):
+        # arrange
+        model = build_numpy_model()
+        pool = api.worker_pool.Pool(model, 1, timeout=30)
+        pool.predict(TestWorkerPool.symptoms_padded)
+        exited = pool._workers[0]
+        # stopped, so the task is sent to it before it exits
+        os.kill(exited.process.pid, signal.SIGSTOP)
+        errors = []
+
+        def call():
+            try:
+                pool.predict(TestWorkerPool.symptoms_padded)
+            except Exception as exception:
+                errors.append(str(exception))
+
+        # act
+        try:
+            thread = threading.Thread(target=call)
+            thread.start()
+            while not exited.task_ids:
+                time.sleep(0.01)
+            exited.process.kill()
+            thread.join()
+            result = pool.predict(TestWorkerPool.symptoms_padded)
+        finally:
+            pool.close()
+
+        # assert
+        assert errors == ["Error: inference worker exited - -9"]
+        np.testing.assert_allclose(
+            result, model.predict(TestWorkerPool.symptoms_padded)
+        )
+        assert pool._workers[0] is not exited
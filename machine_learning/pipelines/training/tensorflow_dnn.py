@@ -118,6 +118,20 @@ def train_model(
         f.write(causes_tokeniser.to_json())
     model.save(f"{model_path}/model.h5")
 
+    # post-training quantised exports for the tflite serving backend
+    for quantisation in ["float16", "int8"]:
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if quantisation == "float16":
+            converter.target_spec.supported_types = [tf.float16]
+        else:
+            converter.representative_dataset = lambda: (
+                [np.array([item], dtype=np.float32)] for item in symptoms_padded
+            )
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        with open(file=f"{model_path}/model_{quantisation}.tflite", mode="wb") as f:
+            f.write(converter.convert())
+
 
 train_model_op = kfp.components.create_component_from_func(
     train_model,
@@ -228,6 +242,11 @@ def trained_files_to_gcs(
         blob = bucket.blob("model.h5")
         blob.upload_from_file(file, content_type="bytes")
 
+    for quantisation in ["float16", "int8"]:
+        with open(file=f"{model_path}/model_{quantisation}.tflite", mode="rb") as file:
+            blob = bucket.blob(f"model_{quantisation}.tflite")
+            blob.upload_from_file(file, content_type="bytes")
+
     return True
 
 